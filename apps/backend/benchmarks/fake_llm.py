@@ -0,0 +1,204 @@
+"""
+Deterministic offline stand-in for the Gemini chat model.
+
+Answers tool calls with arguments generated from the tool's JSON schema after
+a configurable latency, and fails a configurable fraction of calls with a
+retryable connection error. Install it with ``install_fake_model``.
+"""
+
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import Any, Optional
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+from src.core.models import ModelSettings, model_registry
+
+# Number of pieces a streamed tool call is split into
+STREAM_CHUNKS = 4
+
+
+def fake_value(name: str, schema: dict[str, Any]) -> Any:
+    """A fixed value of the JSON schema type of field ``name``."""
+    if "enum" in schema:
+        return schema["enum"][-1]
+    if "anyOf" in schema:
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        return fake_value(name, options[0] if options else {})
+    kind = schema.get("type")
+    if kind == "integer":
+        return 5
+    if kind == "number":
+        return 0.5
+    if kind == "boolean":
+        return False
+    if kind == "array":
+        return [fake_value(name, schema.get("items", {"type": "string"}))]
+    if kind == "object":
+        return fake_arguments(schema)
+    return f"fake {name}"
+
+
+def fake_arguments(parameters: dict[str, Any]) -> dict[str, Any]:
+    """Arguments filling every property of a tool's parameter schema."""
+    return {
+        name: fake_value(name, schema)
+        for name, schema in parameters.get("properties", {}).items()
+    }
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model answering after ``latency_ms`` plus up to ``jitter_ms``,
+    raising ConnectionError for a ``error_rate`` fraction of calls.
+    Bound tools are answered with a call to the first tool.
+    """
+
+    model_name: str = "fake"
+    latency_ms: float = 50
+    jitter_ms: float = 0
+    error_rate: float = 0
+    seed: int = 0
+
+    _random: random.Random = PrivateAttr()
+
+    def model_post_init(self, context: Any) -> None:
+        self._random = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def bind_tools(
+        self,
+        tools: Sequence[Any],
+        *,
+        tool_choice: Optional[str] = None,
+        **kwargs: Any,
+    ) -> Runnable:
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    def _delay(self) -> float:
+        """Seconds the next call takes; raises for injected failures."""
+        if self._random.random() < self.error_rate:
+            raise ConnectionError("Injected fake model failure")
+        return (self.latency_ms + self._random.uniform(0, self.jitter_ms)) / 1000
+
+    def _respond(
+        self, messages: list[BaseMessage], tools: Optional[list[dict[str, Any]]]
+    ) -> AIMessage:
+        prompt = "".join(str(message.content) for message in messages)
+        if tools:
+            function = tools[0]["function"]
+            arguments = fake_arguments(function.get("parameters", {}))
+            tool_calls = [
+                {
+                    "name": function["name"],
+                    "args": arguments,
+                    "id": f"call_{uuid.uuid4().hex}",
+                    "type": "tool_call",
+                }
+            ]
+            output = json.dumps(arguments)
+        else:
+            tool_calls = []
+            output = "fake response"
+
+        input_tokens, output_tokens = len(prompt) // 4, len(output) // 4
+        return AIMessage(
+            content="" if tool_calls else output,
+            tool_calls=tool_calls,
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+            response_metadata={"model_name": self.model_name},
+        )
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        tools: Optional[list[dict[str, Any]]] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self._delay())
+        message = self._respond(messages, tools)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        tools: Optional[list[dict[str, Any]]] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self._delay())
+        message = self._respond(messages, tools)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _chunks(self, message: AIMessage) -> Iterator[AIMessageChunk]:
+        """Split a response into chunks, tool call arguments in pieces."""
+        if not message.tool_calls:
+            yield AIMessageChunk(
+                content=message.content, usage_metadata=message.usage_metadata
+            )
+            return
+
+        call = message.tool_calls[0]
+        arguments = json.dumps(call["args"])
+        size = -(-len(arguments) // STREAM_CHUNKS)
+        for i, start in enumerate(range(0, len(arguments), size)):
+            first = i == 0
+            yield AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {
+                        "name": call["name"] if first else None,
+                        "args": arguments[start : start + size],
+                        "id": call["id"] if first else None,
+                        "index": 0,
+                    }
+                ],
+                usage_metadata=message.usage_metadata if first else None,
+            )
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        tools: Optional[list[dict[str, Any]]] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        # Time to first chunk is the whole latency, the rest arrives at once
+        await asyncio.sleep(self._delay())
+        for chunk in self._chunks(self._respond(messages, tools)):
+            yield ChatGenerationChunk(message=chunk)
+
+
+def install_fake_model(**options: Any) -> None:
+    """Serve every model client from a shared ``FakeChatModel``."""
+    model = FakeChatModel(**options)
+
+    def factory(settings: ModelSettings) -> BaseChatModel:
+        return model
+
+    model_registry.clear()
+    model_registry.factory = factory
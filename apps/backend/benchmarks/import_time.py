@@ -0,0 +1,90 @@
+"""
+Import-time benchmark for the API process.
+
+Imports ``src.main`` in fresh interpreters with ``-X importtime``, reports the
+slowest modules and fails when the median import time regresses beyond the
+baseline, or when a module that must load lazily is imported eagerly.
+
+    uv run python -m benchmarks.import_time [--runs 5] [--top 15] [--update-baseline]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "import_time.json"
+
+
+def measure_import(module: str) -> dict[str, tuple[int, int]]:
+    """
+    Import ``module`` in a fresh interpreter.
+    Returns a mapping of module name to (self, cumulative) import time in us.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    timings = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def run(runs: int, top: int, update_baseline: bool) -> int:
+    baseline = json.loads(BASELINE_PATH.read_text())
+    module = baseline["module"]
+
+    samples = [measure_import(module) for _ in range(runs)]
+    totals_ms = [timings[module][1] / 1000 for timings in samples]
+    median_ms = statistics.median(totals_ms)
+
+    slowest = sorted(samples[-1].items(), key=lambda item: item[1][1], reverse=True)[
+        :top
+    ]
+    print(f"Import time of {module} over {runs} runs: median {median_ms:.1f} ms")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, (self_us, cumulative_us) in slowest:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+    if update_baseline:
+        baseline["baseline_ms"] = round(median_ms, 1)
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"Updated baseline to {median_ms:.1f} ms")
+        return 0
+
+    failed = False
+    eager = sorted(set(baseline["lazy_modules"]).intersection(samples[-1]))
+    if eager:
+        print(f"FAIL: modules expected to load lazily were imported: {eager}")
+        failed = True
+
+    budget_ms = baseline["baseline_ms"] * (1 + baseline["max_regression"])
+    if median_ms > budget_ms:
+        print(f"FAIL: {median_ms:.1f} ms exceeds the budget of {budget_ms:.1f} ms")
+        failed = True
+
+    return 1 if failed else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+    sys.exit(run(args.runs, args.top, args.update_baseline))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Super-step and orchestration overhead benchmark for routing node folding.
+
+Runs ``TriageWorkflow`` and ``PatientSpecificWorkflow`` against a zero-latency
+``FakeChatModel``, compiled as declared and with their routing nodes folded,
+and reports the super-steps, checkpoints and wall time per run. Fails when a
+folded workflow takes more steps or returns a different result.
+
+    uv run python -m benchmarks.supersteps [--runs 200]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from typing import Any, Callable
+
+from benchmarks.throughput import transcript
+
+# Runs before measuring, warming up model clients and caches
+WARMUP_RUNS = 10
+
+
+def workflows() -> dict[str, Callable[[], Any]]:
+    from src.graphs.main_graph import TriageWorkflow
+    from src.graphs.workflows.patient_workflow import PatientSpecificWorkflow
+
+    return {
+        "triage": TriageWorkflow,
+        "patient": lambda: PatientSpecificWorkflow(["diabetes"]),
+    }
+
+
+def comparable(result: dict[str, Any]) -> dict[str, Any]:
+    """The agents' outputs of a run, without run-specific fields."""
+    from src.api.serialization import DEFAULT_RESULT_FIELDS, project_result
+
+    projected = project_result(result, (*DEFAULT_RESULT_FIELDS, "workflow_step"))
+    return {key: value for key, value in projected.items() if key != "errors"}
+
+
+async def measure(workflow: Any, runs: int) -> dict[str, Any]:
+    """Run ``workflow`` ``runs`` times, one at a time, each on a new thread."""
+    from src.graphs.main_graph import conversation_update, new_thread_id
+
+    puts = 0
+    put = workflow.memory.aput
+
+    async def counting_put(*args: Any, **kwargs: Any) -> Any:
+        nonlocal puts
+        puts += 1
+        return await put(*args, **kwargs)
+
+    workflow.memory.aput = counting_put
+    for i in range(WARMUP_RUNS):
+        await workflow.run(conversation_update(transcript(runs + i)))
+
+    steps = puts = 0
+    results = []
+    start = time.perf_counter()
+    for i in range(runs):
+        thread_id = new_thread_id()
+        result = await workflow.run(conversation_update(transcript(i)), thread_id)
+        results.append(comparable(result))
+        snapshot = await workflow.app.aget_state(
+            {"configurable": {"thread_id": thread_id}}
+        )
+        steps += snapshot.metadata["step"]
+    elapsed = time.perf_counter() - start
+
+    return {
+        "steps": steps / runs,
+        "checkpoints": puts / runs,
+        "ms_per_run": round(elapsed / runs * 1000, 2),
+        "results": results,
+    }
+
+
+def run(runs: int) -> int:
+    from benchmarks.fake_llm import install_fake_model
+    from src.core import config
+
+    install_fake_model(latency_ms=0, jitter_ms=0, error_rate=0, seed=7)
+    config.extraction_cache_enabled = False
+
+    print(f"{runs} sequential runs per workflow, zero-latency fake model")
+    print(
+        f"{'workflow':<10} {'folded':>7} {'steps':>7} {'checkpoints':>12} {'ms/run':>8}"
+    )
+    failures = []
+    for name, create in workflows().items():
+        measured = {}
+        for fold in (False, True):
+            config.fold_routing_nodes = fold
+            measured[fold] = result = asyncio.run(measure(create(), runs))
+            print(
+                f"{name:<10} {'yes' if fold else 'no':>7} {result['steps']:>7.2f} "
+                f"{result['checkpoints']:>12.2f} {result['ms_per_run']:>8}"
+            )
+
+        if measured[True]["steps"] > measured[False]["steps"]:
+            failures.append(f"{name}: folding added super-steps")
+        if measured[True]["results"] != measured[False]["results"]:
+            failures.append(f"{name}: folded runs returned different results")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+    sys.exit(run(args.runs))
+
+
+if __name__ == "__main__":
+    main()
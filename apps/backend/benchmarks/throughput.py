@@ -0,0 +1,305 @@
+"""
+End-to-end throughput and latency benchmark with a fake model provider.
+
+Drives ``POST /api/agents/patient/intake`` and ``TriageWorkflow.run()`` at a
+fixed concurrency against ``FakeChatModel``, so it runs fully offline. Each
+scenario runs in a fresh interpreter and reports throughput, p50/p95/p99
+latency and peak RSS, failing when any regresses beyond the baseline.
+
+    uv run python -m benchmarks.throughput [--scenario api_intake] [--requests 300]
+        [--concurrency 32] [--update-baseline]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import subprocess
+import sys
+import time
+from collections.abc import Awaitable
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "throughput.json"
+
+TRANSCRIPTS = [
+    "Nurse: What brings you in? Patient: I sprained my wrist playing tennis.",
+    "Nurse: How are you feeling? Patient: I've had a sore throat for three days.",
+    "Nurse: What happened? Patient: I have a rash on my arm, pain is a 2.",
+    "Nurse: Any pain? Patient: My lower back hurts, about a 6 out of 10.",
+    "Nurse: What brings you in? Patient: I have crushing chest pain.",
+]
+PATIENT_IDS = ["P001", "P002", "P003", None]
+
+
+def transcript(i: int) -> str:
+    """A distinct transcript per request, so extraction results aren't cached."""
+    return f"Visit {i}. {TRANSCRIPTS[i % len(TRANSCRIPTS)]}"
+
+
+def patient_id(i: int) -> Optional[str]:
+    return PATIENT_IDS[i % len(PATIENT_IDS)]
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Nearest-rank percentile of ``values``."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process, None where unsupported."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS, in kilobytes elsewhere
+    return round(peak / 2**20 if sys.platform == "darwin" else peak / 2**10, 1)
+
+
+async def drive(
+    call: Callable[[int], Awaitable[bool]], requests: int, concurrency: int
+) -> dict[str, Any]:
+    """
+    Run ``requests`` calls from ``concurrency`` closed-loop workers.
+    ``call`` returns whether the request succeeded; exceptions count as errors.
+    """
+    latencies: list[float] = []
+    errors = 0
+    indices = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in indices:
+            start = time.perf_counter()
+            try:
+                ok = await call(i)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round((requests - errors) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+async def api_intake(requests: int, concurrency: int, warmup: int) -> dict[str, Any]:
+    """Intake requests through the ASGI app, middleware and all."""
+    import httpx
+
+    from src.main import app
+
+    async def call(i: int) -> bool:
+        response = await client.post(
+            "/api/agents/patient/intake",
+            json={"conversation": transcript(i), "patient_id": patient_id(i)},
+        )
+        return response.status_code == 200
+
+    transport = httpx.ASGITransport(app=app)
+    async with (
+        app.router.lifespan_context(app),
+        httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark", timeout=None
+        ) as client,
+    ):
+        await drive(lambda i: call(requests + i), warmup, concurrency)
+        return await drive(call, requests, concurrency)
+
+
+async def workflow_run(requests: int, concurrency: int, warmup: int) -> dict[str, Any]:
+    """Workflow runs without the API layer."""
+    from langchain_core.messages import HumanMessage
+
+    from src.graphs import get_triage_workflow
+
+    workflow = get_triage_workflow()
+
+    async def call(i: int) -> bool:
+        state = {"messages": [HumanMessage(content=transcript(i))]}
+        if patient_id(i):
+            state["context"] = {"patient_id": patient_id(i)}
+        result = await workflow.run(state)
+        return bool(result.get("intake_conversation_info"))
+
+    await drive(lambda i: call(requests + i), warmup, concurrency)
+    return await drive(call, requests, concurrency)
+
+
+SCENARIOS = {"api_intake": api_intake, "workflow_run": workflow_run}
+
+
+def run_scenario(
+    name: str,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    fake_model: dict[str, Any],
+) -> dict[str, Any]:
+    """Run one scenario in this process against the fake model."""
+    from benchmarks.fake_llm import install_fake_model
+
+    install_fake_model(**fake_model)
+    result = asyncio.run(SCENARIOS[name](requests, concurrency, warmup))
+    result["concurrency"] = concurrency
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def measure(
+    name: str,
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    fake_model: dict[str, Any],
+) -> dict[str, Any]:
+    """Run one scenario in a fresh interpreter, isolating its caches and RSS."""
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.throughput",
+            "--scenario",
+            name,
+            "--requests",
+            str(requests),
+            "--concurrency",
+            str(concurrency),
+            "--warmup",
+            str(warmup),
+            "--fake-model",
+            json.dumps(fake_model),
+            "--json",
+        ],
+        cwd=BACKEND_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def regressions(
+    name: str, result: dict[str, Any], expected: dict[str, Any], baseline: dict
+) -> list[str]:
+    """Describe every way ``result`` is worse than the baseline allows."""
+    allowed = baseline["max_regression"]
+    failures = []
+
+    floor = expected["throughput_rps"] * (1 - allowed)
+    if result["throughput_rps"] < floor:
+        failures.append(
+            f"{name}: throughput {result['throughput_rps']} req/s "
+            f"is below {floor:.1f} req/s"
+        )
+    for metric in ("p50_ms", "p95_ms", "p99_ms", "peak_rss_mb"):
+        if result[metric] is None or expected.get(metric) is None:
+            continue
+        ceiling = expected[metric] * (1 + allowed)
+        if result[metric] > ceiling:
+            failures.append(f"{name}: {metric} {result[metric]} exceeds {ceiling:.1f}")
+    if result["errors"] > baseline["max_error_rate"] * result["requests"]:
+        failures.append(f"{name}: {result['errors']} of {result['requests']} failed")
+    return failures
+
+
+def run(
+    scenarios: list[str],
+    requests: Optional[int],
+    concurrency: Optional[int],
+    update_baseline: bool,
+) -> int:
+    baseline = json.loads(BASELINE_PATH.read_text())
+    requests = requests or baseline["requests"]
+    concurrency = concurrency or baseline["concurrency"]
+    comparable = (requests, concurrency) == (
+        baseline["requests"],
+        baseline["concurrency"],
+    )
+
+    print(
+        f"{requests} requests at concurrency {concurrency}, "
+        f"fake model {baseline['fake_model']}"
+    )
+    print(
+        f"{'scenario':<14} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'errors':>7} {'peak RSS MB':>12}"
+    )
+
+    failures = []
+    for name in scenarios:
+        result = measure(
+            name, requests, concurrency, baseline["warmup"], baseline["fake_model"]
+        )
+        rss = result["peak_rss_mb"]
+        print(
+            f"{name:<14} {result['throughput_rps']:>8} {result['p50_ms']:>8} "
+            f"{result['p95_ms']:>8} {result['p99_ms']:>8} {result['errors']:>7} "
+            f"{'n/a' if rss is None else rss:>12}"
+        )
+
+        if update_baseline:
+            baseline["scenarios"][name] = result
+        elif comparable and name in baseline["scenarios"]:
+            failures += regressions(name, result, baseline["scenarios"][name], baseline)
+
+    if update_baseline:
+        baseline["requests"], baseline["concurrency"] = requests, concurrency
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"Updated baseline for {', '.join(scenarios)}")
+        return 0
+
+    if not comparable:
+        print("Not compared: the baseline was measured at a different load")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--scenario", choices=SCENARIOS, action="append", dest="scenarios"
+    )
+    parser.add_argument("--requests", type=int)
+    parser.add_argument("--concurrency", type=int)
+    parser.add_argument("--update-baseline", action="store_true")
+    # Used when running a single scenario in a child interpreter
+    parser.add_argument("--warmup", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--fake-model", type=json.loads, help=argparse.SUPPRESS)
+    parser.add_argument("--json", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.json:
+        (name,) = args.scenarios
+        result = run_scenario(
+            name, args.requests, args.concurrency, args.warmup, args.fake_model
+        )
+        print(json.dumps(result))
+        return
+
+    sys.exit(
+        run(
+            args.scenarios or list(SCENARIOS),
+            args.requests,
+            args.concurrency,
+            args.update_baseline,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
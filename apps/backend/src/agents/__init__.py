@@ -1,3 +1,11 @@
-from .intake import intake_agent
+from .intake import get_intake_agent
+from .triage import get_triage_agent
 
-__all__ = ["intake_agent"]
+__all__ = ["get_intake_agent", "get_triage_agent", "intake_agent"]
+
+
+def __getattr__(name: str):
+    # The shared agent is built on first access rather than at import time
+    if name == "intake_agent":
+        return get_intake_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
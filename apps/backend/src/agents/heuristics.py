@@ -0,0 +1,171 @@
+"""
+Rule-based intake extraction, the last tier of degraded operation.
+
+Fills an ``IntakeConversationInfo`` without a model call: symptoms from a
+lexicon, skipping negated mentions and questions like red flags do, the pain
+level from numeric ratings and the chief complaint from the patient's first
+turn mentioning a symptom.
+"""
+
+import re
+from collections.abc import Mapping, Sequence
+from functools import lru_cache
+from typing import Optional
+
+from src.core import config
+from src.state import IntakeConversationInfo
+
+from .red_flags import RedFlagDetector
+from .transcripts import Turn, is_clinician, split_turns
+
+# Symptom -> phrases indicating it, matched case-insensitively
+DEFAULT_SYMPTOM_LEXICON: dict[str, list[str]] = {
+    "abdominal pain": [
+        "abdominal pain",
+        "stomach pain",
+        "stomach ache",
+        "stomachache",
+        "belly pain",
+        "pain in my stomach",
+        "cramping",
+    ],
+    "back pain": ["back pain", "pain in my back", "backache"],
+    "bleeding": ["bleeding", "blood in my", "coughing up blood"],
+    "chest pain": [
+        "chest pain",
+        "chest pains",
+        "chest pressure",
+        "chest tightness",
+        "tightness in my chest",
+        "pressure in my chest",
+    ],
+    "confusion": ["confused", "confusion", "disoriented"],
+    "cough": ["cough", "coughing"],
+    "diarrhea": ["diarrhea", "diarrhoea", "loose stools"],
+    "dizziness": ["dizzy", "dizziness", "lightheaded", "light headed", "vertigo"],
+    "fatigue": ["fatigue", "tired all the time", "exhausted", "no energy"],
+    "fever": ["fever", "feverish", "high temperature", "chills"],
+    "headache": ["headache", "headaches", "migraine", "my head hurts"],
+    "injury": ["sprained", "twisted my", "broke my", "cut myself", "burned my"],
+    "joint pain": [
+        "joint pain",
+        "knee pain",
+        "hip pain",
+        "shoulder pain",
+        "ankle pain",
+    ],
+    "nausea": ["nausea", "nauseous", "nauseated", "feel sick", "feeling sick"],
+    "numbness": ["numbness", "numb", "tingling", "pins and needles"],
+    "palpitations": ["palpitations", "heart racing", "racing heart", "heart pounding"],
+    "rash": ["rash", "hives", "itchy skin"],
+    "shortness of breath": [
+        "shortness of breath",
+        "short of breath",
+        "difficulty breathing",
+        "trouble breathing",
+        "can't breathe",
+        "breathless",
+        "wheezing",
+    ],
+    "sore throat": ["sore throat", "my throat hurts", "painful to swallow"],
+    "swelling": ["swelling", "swollen"],
+    "vomiting": ["vomiting", "vomited", "throwing up", "threw up"],
+}
+
+# "7/10", "7 out of 10"
+_PAIN_SCALE = re.compile(r"\b(10|[0-9])\s*(?:/|out of)\s*10\b")
+# "the pain is about a 7", "I'd rate it an 8", not "hurts for 3 days", "pain
+# since 10 am" or "hurts on 2 sides"
+_PAIN_RATING = re.compile(
+    r"\b(?:pain|hurts?|rate|rated|rating)\b[^.!?\n\d]{0,25}?"
+    r"\b(?:a|an|at|level|is)\s+(10|[0-9])\b"
+    r"(?!\s*(?:minutes?|hours?|days?|weeks?|months?|years?|times?|am|pm)\b"
+    r"|\s*(?:[ap]\.|o['\u2019]clock)|:\d)"
+)
+_SENTENCE = re.compile(r"[^.!?\n]+[.!?]*")
+
+MAX_CHIEF_COMPLAINT_CHARS = 200
+
+
+def _sentences(text: str) -> list[str]:
+    return [match.group().strip() for match in _SENTENCE.finditer(text)]
+
+
+def _statement(sentence: str) -> str:
+    """
+    The sentence without its question: all of a plain question, the last
+    clause of "It hurts about a 6, is that bad?", and the alternatives of
+    "Is it a 7, or worse?".
+    """
+    if not sentence.endswith("?"):
+        return sentence
+    while (cut := max(sentence.rfind(","), sentence.rfind(";"))) >= 0:
+        question = sentence[cut + 1 :].lower().split()
+        sentence = sentence[:cut]
+        if question[:1] not in (["or"], ["nor"]):
+            return sentence
+    return ""
+
+
+def pain_level(text: str) -> int:
+    """The highest 0-10 pain rating stated outside questions, 0 without one."""
+    ratings = [
+        int(match.group(1))
+        for sentence in _sentences(text)
+        for pattern in (_PAIN_SCALE, _PAIN_RATING)
+        for match in pattern.finditer(_statement(sentence).lower())
+    ]
+    return max(ratings, default=0)
+
+
+class HeuristicExtractor:
+    """Extracts intake information with rules, without a model call."""
+
+    def __init__(
+        self,
+        lexicon: Optional[Mapping[str, Sequence[str]]] = None,
+        negation_cues: Optional[Sequence[str]] = None,
+        negation_window: int = 5,
+    ):
+        self._symptoms = RedFlagDetector(
+            DEFAULT_SYMPTOM_LEXICON if lexicon is None else lexicon,
+            negation_cues,
+            negation_window,
+        )
+
+    def symptoms(self, text: str) -> list[str]:
+        """Symptoms asserted in the text, in order of first mention."""
+        return [match.flag for match in self._symptoms.detect(text)]
+
+    def extract(self, conversation: str) -> IntakeConversationInfo:
+        """Extract what the patient said, ignoring the clinician's turns."""
+        turns = split_turns(conversation)
+        patient_turns = [turn for turn in turns if not is_clinician(turn)]
+        patient_text = "\n".join(turn.text for turn in patient_turns)
+
+        return IntakeConversationInfo(
+            symptoms=self.symptoms(patient_text),
+            pain_level=pain_level(patient_text),
+            chief_complaint=self.chief_complaint(patient_turns),
+            additional_notes="",
+        )
+
+    def chief_complaint(self, patient_turns: Sequence[Turn]) -> str:
+        """The first sentence mentioning a symptom, else the first one."""
+        sentences = [
+            sentence for turn in patient_turns for sentence in _sentences(turn.text)
+        ]
+        complaint = next(
+            (sentence for sentence in sentences if self.symptoms(sentence)),
+            sentences[0] if sentences else "",
+        )
+        return complaint[:MAX_CHIEF_COMPLAINT_CHARS]
+
+
+@lru_cache(maxsize=1)
+def get_heuristic_extractor() -> HeuristicExtractor:
+    """Get the shared extractor, negating symptoms like red flags."""
+    return HeuristicExtractor(
+        negation_cues=config.red_flag_negation_cues,
+        negation_window=config.red_flag_negation_window,
+    )
@@ -1,80 +1,220 @@
-import os
-from typing import Any
-
-from langchain_core.messages import HumanMessage, SystemMessage
+import asyncio
+import hashlib
+import json
+import unicodedata
+from collections.abc import Awaitable
+from contextlib import AbstractContextManager, nullcontext
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from langchain_core.callbacks import adispatch_custom_event
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import Runnable, RunnableConfig
 from langchain_core.tools import tool
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langgraph.graph import END, StateGraph
-
-from src.state import IntakeConversationInfo, WorkflowState
+from langgraph.graph import END, START, StateGraph
+
+from src.checkpoint import DURABILITY_STEP, checkpoint_durability
+from src.core import config
+from src.core.cache import LRUCache, SQLiteCache, TieredCache
+from src.core.degradation import (
+    TIER_HEURISTIC,
+    TIER_PRIMARY,
+    current_tier,
+    get_degradation_controller,
+    tier_scope,
+    tier_settings,
+)
+from src.core.metrics import ERRORS
+from src.core.models import default_settings, model_registry
+from src.core.resilience import (
+    CircuitOpenError,
+    DeadlineExceededError,
+    ResilientExecutor,
+    get_executor,
+)
+from src.core.scheduler import (
+    PRIORITY_CRITICAL,
+    AdmissionRejectedError,
+    estimate_tokens,
+    get_scheduler,
+    priority_scope,
+)
+from src.core.tracing import span
+from src.repositories import UNKNOWN_PATIENT, get_patient_repository
+from src.state import IntakeConversationInfo, PatientInfo, WorkflowState
+
+from .heuristics import get_heuristic_extractor
+from .transcripts import merge_extractions, prepare_transcript
 
 
-# Mock database functions (to be replaced with real database calls later)
 @tool
-def get_patient_details(patient_id: str) -> dict[str, Any]:
+async def get_patient_details(patient_id: str) -> dict[str, Any]:
+    """
+    Get patient details from the patient repository.
+    Unknown patients get a placeholder record.
+    """
+    record = await get_patient_repository().get(patient_id)
+    return UNKNOWN_PATIENT if record is None else record
+
+
+class ExtractionBatcher:
     """
-    Mock function to get patient details from database.
-    Later this will be replaced with actual database calls.
+    Coalesces concurrent extraction requests into a single ``abatch`` call.
+    Requests arriving within ``window_ms`` of each other (up to ``max_size``)
+    are sent to the model together, so a burst costs fewer round trips.
     """
-    # Mock patient database
-    mock_patients = {
-        "P001": {
-            "name": "John Doe",
-            "age": 45,
-            "gender": "Male",
-            "medical_history": ["Hypertension", "Type 2 Diabetes"],
-            "allergies": ["Penicillin", "Nuts"],
-            "current_medications": ["Metformin", "Lisinopril"],
-            "emergency_contact": "Jane Doe - 555-0123",
-        },
-        "P002": {
-            "name": "Sarah Smith",
-            "age": 32,
-            "gender": "Female",
-            "medical_history": ["Asthma"],
-            "allergies": ["Latex"],
-            "current_medications": ["Albuterol inhaler"],
-            "emergency_contact": "Mike Smith - 555-0456",
-        },
-        "P003": {
-            "name": "Robert Johnson",
-            "age": 67,
-            "gender": "Male",
-            "medical_history": ["Heart Disease", "Arthritis"],
-            "allergies": ["Aspirin"],
-            "current_medications": ["Metoprolol", "Ibuprofen"],
-            "emergency_contact": "Mary Johnson - 555-0789",
-        },
-    }
-
-    return mock_patients.get(
-        patient_id,
-        {
-            "name": "Unknown Patient",
-            "age": None,
-            "gender": "Unknown",
-            "medical_history": [],
-            "allergies": [],
-            "current_medications": [],
-            "emergency_contact": "Not provided",
-        },
+
+    def __init__(self, window_ms: int, max_size: int):
+        self.window = window_ms / 1000
+        self.max_size = max_size
+        self._pending: list[tuple[list[BaseMessage], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def submit(self, runnable: Runnable, messages: list[BaseMessage]) -> Any:
+        """Queue messages for the next batch and wait for their result."""
+        if self.window <= 0 or self.max_size <= 1 or not hasattr(runnable, "abatch"):
+            return await runnable.ainvoke(messages)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((messages, future))
+
+        if len(self._pending) >= self.max_size:
+            self._flush(runnable)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush, runnable)
+
+        return await future
+
+    def _flush(self, runnable: Runnable) -> None:
+        """Send all pending requests to the model as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run_batch(runnable, batch))
+
+    async def _run_batch(
+        self, runnable: Runnable, batch: list[tuple[list[BaseMessage], asyncio.Future]]
+    ) -> None:
+        """Execute a batch and resolve the futures of its callers."""
+        try:
+            results = await runnable.abatch(
+                [messages for messages, _ in batch], return_exceptions=True
+            )
+        except Exception as e:
+            results = [e] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+INTAKE_SYSTEM_PROMPT = """
+            You are a medical intake specialist. 
+            Extract key patient information from the conversation.
+            The conversation is between a nurse and patient.
+            
+            Guidelines:
+            - Extract symptoms mentioned by the patient
+            - Look for pain ratings on a 1-10 scale
+            - Summarize the conversation into a single sentence as the chief complaint
+            - Extract any additional notes from the conversation
+            - Be precise and only include information explicitly mentioned
+            - Use null for missing information
+            """
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def schema_fingerprint() -> str:
+    """Hash of the extraction schema, invalidating cached results when it changes."""
+    return _sha256(
+        json.dumps(IntakeConversationInfo.model_json_schema(), sort_keys=True)
     )
 
 
-def _get_model():
-    """Get the ChatGoogleGenerativeAI model, initialized lazily."""
-    return ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash-preview-05-20",
-        temperature=1.0,
-        max_retries=1,
-        google_api_key=os.getenv("GEMINI_API_KEY"),
+def extraction_cache_key(conversation: str, model_name: Optional[str] = None) -> str:
+    """
+    Cache key for an extraction: the whitespace-normalized transcript plus
+    everything else that shapes the model's answer.
+    """
+    normalized = " ".join(unicodedata.normalize("NFC", conversation).split())
+    return _sha256(
+        "\x1f".join(
+            [
+                normalized,
+                model_name or config.model_name,
+                repr(config.temperature),
+                _sha256(INTAKE_SYSTEM_PROMPT),
+                schema_fingerprint(),
+            ]
+        )
     )
 
 
+def _build_extraction_cache() -> Optional[TieredCache[IntakeConversationInfo]]:
+    """Build the extraction result cache, or None when caching is disabled."""
+    if not config.extraction_cache_enabled:
+        return None
+
+    disk = None
+    if config.extraction_cache_path:
+        disk = SQLiteCache(
+            config.extraction_cache_path,
+            namespace=schema_fingerprint(),
+            ttl_seconds=config.extraction_cache_ttl_seconds,
+        )
+
+    return TieredCache(
+        LRUCache(config.extraction_cache_size, config.extraction_cache_ttl_seconds),
+        disk,
+        dumps=IntakeConversationInfo.model_dump_json,
+        loads=IntakeConversationInfo.model_validate_json,
+    )
+
+
+def _chunk_messages(chunk: str, part: int, parts: int) -> list[BaseMessage]:
+    """Extraction prompt for one chunk of a long conversation."""
+    human_prompt = f"""Extract patient information from this conversation,
+            part {part} of {parts}:
+            {chunk}
+            """
+    return [
+        SystemMessage(content=INTAKE_SYSTEM_PROMPT),
+        HumanMessage(content=human_prompt),
+    ]
+
+
 EXTRACT_CONVERSATION_INFO_NODE = "extract_conversation_info"
 GET_PATIENT_HISTORY_NODE = "get_patient_history"
 VALIDATE_AND_COMPILE_NODE = "validate_and_compile"
 
+# State keys the intake subgraph produces for the parent workflow
+INTAKE_OUTPUT_KEYS = (
+    "intake_conversation_info",
+    "intake_message_count",
+    "intake_tier",
+    "patient_details",
+    "patient_info",
+)
+
+# Set in the run config to stream partial extraction results as custom events
+STREAM_INTAKE_KEY = "stream_intake"
+INTAKE_PARTIAL_EVENT = "intake_partial"
+
+# Set in the run config to a ``SpeculativeTriage`` fed with partial results
+SPECULATIVE_TRIAGE_KEY = "speculative_triage"
+
 
 class IntakeAgent:
     """
@@ -84,16 +224,55 @@ class IntakeAgent:
 
     def __init__(self):
         self.graph = self._build_graph()
+        # Checkpointed by the workflow's checkpointer when run inside it
         self.app = self.graph.compile()
+        self.unsaved_app = self.graph.compile(checkpointer=False)
         self._model = None
+        self._structured_model = None
+        self._partial_model = None
+        self._batcher = ExtractionBatcher(
+            window_ms=config.intake_batch_window_ms,
+            max_size=config.intake_batch_max_size,
+        )
+        self.cache = _build_extraction_cache()
 
     @property
     def model(self):
-        """Lazily initialize the model when first accessed."""
+        """Lazily get the shared model client when first accessed."""
         if self._model is None:
-            self._model = _get_model()
+            self._model = model_registry.get_model()
         return self._model
 
+    @property
+    def structured_model(self) -> Runnable:
+        """Model bound to the ``IntakeConversationInfo`` output schema."""
+        if (tier := current_tier()) != TIER_PRIMARY:
+            return model_registry.get_structured_model(
+                IntakeConversationInfo, tier_settings(tier)
+            )
+        if self._structured_model is None:
+            self._structured_model = model_registry.get_structured_model(
+                IntakeConversationInfo
+            )
+        return self._structured_model
+
+    @property
+    def partial_model(self) -> Runnable:
+        """Model streaming partial ``IntakeConversationInfo`` fields as dicts."""
+        if (tier := current_tier()) != TIER_PRIMARY:
+            return model_registry.get_partial_model(
+                IntakeConversationInfo, tier_settings(tier)
+            )
+        if self._partial_model is None:
+            self._partial_model = model_registry.get_partial_model(
+                IntakeConversationInfo
+            )
+        return self._partial_model
+
+    def warmup(self) -> bool:
+        """Construct the model client and compile the extraction runnables."""
+        return model_registry.warmup([IntakeConversationInfo])
+
     def _build_graph(self) -> StateGraph:
         """Build the intake agent graph."""
 
@@ -102,101 +281,325 @@ class IntakeAgent:
         workflow.add_node(
             EXTRACT_CONVERSATION_INFO_NODE, self._extract_conversation_info
         )
-
-        workflow.set_entry_point(EXTRACT_CONVERSATION_INFO_NODE)
-        workflow.add_edge(EXTRACT_CONVERSATION_INFO_NODE, END)
+        workflow.add_node(GET_PATIENT_HISTORY_NODE, self._get_patient_history)
+        workflow.add_node(VALIDATE_AND_COMPILE_NODE, self._validate_and_compile)
+
+        # Extraction and history lookup run in parallel and join before compiling
+        workflow.add_edge(START, EXTRACT_CONVERSATION_INFO_NODE)
+        workflow.add_edge(START, GET_PATIENT_HISTORY_NODE)
+        workflow.add_edge(
+            [EXTRACT_CONVERSATION_INFO_NODE, GET_PATIENT_HISTORY_NODE],
+            VALIDATE_AND_COMPILE_NODE,
+        )
+        workflow.add_edge(VALIDATE_AND_COMPILE_NODE, END)
 
         return workflow
 
-    async def _extract_conversation_info(self, state: WorkflowState) -> WorkflowState:
-        """Extract patient information from the conversation using LLM."""
+    async def _extract_conversation_info(
+        self, state: WorkflowState, config: RunnableConfig
+    ) -> dict[str, Any]:
+        """
+        Extract patient information from the messages not yet extracted and
+        merge it into the thread's earlier extraction, so a follow-up segment
+        costs only its own length. Clearing ``intake_conversation_info``
+        re-extracts the whole conversation.
+
+        The extraction runs on the tier the degradation controller picks, and
+        the tier is recorded in ``intake_tier`` for downstream consumers.
+        """
 
-        # Get the last message which should contain the conversation
         messages = state.get("messages", [])
-        if not messages:
-            return state
-
-        # Get the last message content
-        last_message = messages[-1]
-        conversation = (
-            last_message.content
-            if hasattr(last_message, "content")
-            else str(last_message)
+        previous_info = state.get("intake_conversation_info")
+        start = state.get("intake_message_count", 0) if previous_info else 0
+        if len(messages) <= start:
+            return {}
+
+        conversation = "\n".join(
+            message.content if hasattr(message, "content") else str(message)
+            for message in messages[start:]
         )
 
-        # Extract information using LLM
+        tier = self._select_tier()
+
+        # Extract information using LLM, ahead of routine calls if red-flagged
         try:
-            extracted_info = await self._llm_parse_conversation(conversation)
+            if tier == TIER_HEURISTIC:
+                extracted_info = get_heuristic_extractor().extract(conversation)
+                await self._emit_partial(extracted_info.model_dump(), config)
+            else:
+                with (
+                    tier_scope(tier),
+                    priority_scope(
+                        PRIORITY_CRITICAL if state.get("red_flags") else None
+                    ),
+                ):
+                    extracted_info = await self._llm_parse_conversation(
+                        conversation, config
+                    )
+        except (AdmissionRejectedError, CircuitOpenError, DeadlineExceededError):
+            # Surface these to the caller rather than as a partial result
+            raise
         except Exception as e:
-            return {
-                **state,
-                "errors": [f"Error extracting conversation info: {str(e)}"],
-            }
-
-        return {**state, "intake_conversation_info": extracted_info}
-
-    async def _llm_parse_conversation(self, conversation: str) -> dict[str, Any]:
+            ERRORS.inc(component=EXTRACT_CONVERSATION_INFO_NODE, type=type(e).__name__)
+            return {"errors": [f"Error extracting conversation info: {str(e)}"]}
+
+        if previous_info:
+            extracted_info = merge_extractions([previous_info, extracted_info])
+        return {
+            "intake_conversation_info": extracted_info,
+            "intake_message_count": len(messages),
+            "intake_tier": tier,
+        }
+
+    async def _llm_parse_conversation(
+        self, conversation: str, config: Optional[RunnableConfig] = None
+    ) -> dict[str, Any]:
         """Use LLM to parse conversation and extract patient information."""
 
-        system_prompt = """
-            You are a medical intake specialist. 
-            Extract key patient information from the conversation.
-            The conversation is between a nurse and patient.
-            
-            Guidelines:
-            - Extract symptoms mentioned by the patient
-            - Look for pain ratings on a 1-10 scale
-            - Summarize the conversation into a single sentence as the chief complaint
-            - Extract any additional notes from the conversation
-            - Be precise and only include information explicitly mentioned
-            - Use null for missing information
-            """
+        configurable = (config or {}).get("configurable", {})
+        stream = configurable.get(STREAM_INTAKE_KEY)
+        speculation = configurable.get(SPECULATIVE_TRIAGE_KEY)
+
+        if self._is_long_transcript(conversation):
+            # Chunks are extracted concurrently, there are no partials to stream
+            extracted_info = await self._cached(
+                conversation, lambda: self._map_reduce_conversation(conversation)
+            )
+            await self._emit_partial(extracted_info.model_dump(), config)
+            return extracted_info
 
         human_prompt = f"""Extract patient information from this conversation:
             {conversation}
             """
 
         messages = [
-            SystemMessage(content=system_prompt),
+            SystemMessage(content=INTAKE_SYSTEM_PROMPT),
             HumanMessage(content=human_prompt),
         ]
 
-        structured_model = self._model.with_structured_output(IntakeConversationInfo)
-
-        response = await structured_model.ainvoke(messages)
+        if not stream and speculation is None:
+            return await self._cached(conversation, lambda: self._extract(messages))
+
+        # Streamed for the client, or for triage to start on the first fields
+        streamed = False
+
+        async def stream_extraction() -> IntakeConversationInfo:
+            nonlocal streamed
+            streamed = True
+            # Partial results are already on their way out, don't race a hedge
+            tokens = self._estimate_tokens(messages)
+            attributes = self._span_attributes(tokens, streamed=True)
+            with span("intake.extract", **attributes), self._observed():
+                return await self._executor().call(
+                    lambda: self._stream_parse_conversation(messages, config),
+                    hedge=False,
+                    slot=lambda: get_scheduler().slot(tokens),
+                )
+
+        extracted_info = await self._cached(conversation, stream_extraction)
+        if not streamed:
+            # Cached, or streamed to whoever asked for the same extraction first
+            await self._emit_partial(extracted_info.model_dump(), config)
+        return extracted_info
+
+    async def _cached(
+        self,
+        conversation: str,
+        compute: Callable[[], Awaitable[IntakeConversationInfo]],
+    ) -> IntakeConversationInfo:
+        """Serve the conversation's extraction from the cache, else compute it."""
+        if self.cache is None:
+            return await compute()
+        return await self.cache.get_or_compute(
+            extraction_cache_key(conversation, self._model_name()), compute
+        )
 
-        return response
+    @staticmethod
+    def _estimate_tokens(messages: list[BaseMessage]) -> int:
+        prompt = "".join(str(message.content) for message in messages)
+        return estimate_tokens(prompt, default_settings().max_tokens)
+
+    async def _extract(self, messages: list[BaseMessage]) -> IntakeConversationInfo:
+        """Run one extraction call through the scheduler and executor."""
+        # A batch goes to a single model, degraded tiers call theirs directly
+        batched = current_tier() == TIER_PRIMARY
+        tokens = self._estimate_tokens(messages)
+        # Covers the waits for scheduler slots and retries, not just the call
+        attributes = self._span_attributes(tokens, batched=batched)
+        with span("intake.extract", **attributes), self._observed():
+            return await self._executor().call(
+                lambda: (
+                    self._batcher.submit(self.structured_model, messages)
+                    if batched
+                    else self.structured_model.ainvoke(messages)
+                ),
+                slot=lambda: get_scheduler().slot(tokens),
+            )
+
+    @classmethod
+    def _span_attributes(cls, tokens: int, **attributes: Any) -> dict[str, Any]:
+        """Attributes of an extraction's trace span."""
+        return {
+            "intake.tier": current_tier(),
+            "intake.estimated_tokens": tokens,
+            "gen_ai.request.model": cls._model_name(),
+            **{f"intake.{key}": value for key, value in attributes.items()},
+        }
+
+    @staticmethod
+    def _select_tier() -> str:
+        """The tier for the next extraction, primary unless degradation is on."""
+        if not config.degradation_enabled:
+            return TIER_PRIMARY
+        return get_degradation_controller().tier()
+
+    @staticmethod
+    def _model_name() -> str:
+        return tier_settings(current_tier()).model_name
+
+    @staticmethod
+    def _executor() -> ResilientExecutor:
+        """Executor of the current tier, each tier has its own circuit."""
+        tier = current_tier()
+        return get_executor("intake" if tier == TIER_PRIMARY else f"intake_{tier}")
+
+    @staticmethod
+    def _observed() -> AbstractContextManager[None]:
+        """Report the latency and outcome of a model call to the controller."""
+        if not config.degradation_enabled:
+            return nullcontext()
+        return get_degradation_controller().observe(current_tier())
+
+    @staticmethod
+    def _is_long_transcript(conversation: str) -> bool:
+        threshold = config.long_transcript_threshold_chars
+        return bool(threshold) and len(conversation) > threshold
+
+    async def _map_reduce_conversation(
+        self, conversation: str
+    ) -> IntakeConversationInfo:
+        """
+        Extract a long conversation chunk by chunk, concurrently, and merge.
+        Filler and repeated turns are dropped before chunking.
+        """
+        chunks = prepare_transcript(conversation, config.transcript_chunk_chars)
+        extractions = await asyncio.gather(
+            *(
+                self._extract(_chunk_messages(chunk, i, len(chunks)))
+                for i, chunk in enumerate(chunks, start=1)
+            )
+        )
+        return merge_extractions(extractions)
+
+    async def _stream_parse_conversation(
+        self, messages: list[BaseMessage], config: RunnableConfig
+    ) -> IntakeConversationInfo:
+        """Parse the conversation, emitting partial fields as they arrive."""
+
+        partial: dict[str, Any] = {}
+        async for chunk in self.partial_model.astream(messages, config):
+            if chunk and chunk != partial:
+                partial = chunk
+                await self._emit_partial(partial, config)
+
+        return IntakeConversationInfo.model_validate(partial)
+
+    @staticmethod
+    async def _emit_partial(
+        partial: dict[str, Any], config: Optional[RunnableConfig]
+    ) -> None:
+        """Hand a partial result to speculative triage and the event stream."""
+        configurable = (config or {}).get("configurable", {})
+        if (speculation := configurable.get(SPECULATIVE_TRIAGE_KEY)) is not None:
+            speculation.offer(partial)
+        if configurable.get(STREAM_INTAKE_KEY):
+            await adispatch_custom_event(INTAKE_PARTIAL_EVENT, partial, config=config)
+
+    @staticmethod
+    def _get_patient_id(state: WorkflowState) -> Optional[str]:
+        """
+        Get the patient ID from the request context, which a follow-up
+        segment may change, or else from the patient info.
+        """
+        if patient_id := state.get("context", {}).get("patient_id"):
+            return patient_id
+        return IntakeAgent._compiled_patient_id(state)
+
+    @staticmethod
+    def _compiled_patient_id(state: WorkflowState) -> Optional[str]:
+        """The patient ID of the patient info, whose details are in the state."""
+        if state.get("patient_info") and hasattr(state["patient_info"], "patient_id"):
+            return state["patient_info"].patient_id
+        elif isinstance(state.get("patient_info"), dict):
+            return state["patient_info"].get("patient_id")
+        return None
 
     async def _get_patient_history(self, state: WorkflowState) -> dict[str, Any]:
         """Retrieve patient history from the database."""
 
-        patient_id = None
-
-        # Try to get patient_id from state
-        if state.get("patient_info") and hasattr(state["patient_info"], "patient_id"):
-            patient_id = state["patient_info"].patient_id
-        elif isinstance(state.get("patient_info"), dict):
-            patient_id = state["patient_info"].get("patient_id")
-        elif state.get("context", {}).get("patient_id"):
-            patient_id = state["context"]["patient_id"]
-
+        # Walk-in patients are not in the database yet, nothing to look up
+        patient_id = self._get_patient_id(state)
         if not patient_id:
+            return {}
+        # Already looked up for an earlier segment about the same patient
+        if (
+            state.get("patient_details")
+            and self._compiled_patient_id(state) == patient_id
+        ):
+            return {}
+
+        try:
+            patient_details = await get_patient_details.ainvoke(patient_id)
+        except Exception as e:
+            ERRORS.inc(component=GET_PATIENT_HISTORY_NODE, type=type(e).__name__)
+            # Don't compile another patient's details from an earlier segment
             return {
-                "errors": state.get("errors", []) + ["No patient ID found in state"],
-                "patient_details": {},
+                "errors": [f"Error retrieving patient history: {str(e)}"],
+                "patient_details": None,
             }
 
-        # Get patient details using mock function
-        patient_details = get_patient_details(patient_id)
-
-        return {"patient_details": patient_details, "patient_history_retrieved": True}
-
-    async def run(self, state: WorkflowState) -> dict[str, Any]:
-        """Run the intake agent subgraph."""
-
-        result = await self.app.ainvoke(state)
+        return {"patient_details": patient_details}
+
+    async def _validate_and_compile(self, state: WorkflowState) -> dict[str, Any]:
+        """Join the parallel branches into the patient's info."""
+
+        patient_id = self._get_patient_id(state)
+        patient_details = state.get("patient_details")
+        if not patient_id or not patient_details:
+            # The patient changed but their details couldn't be looked up
+            if self._compiled_patient_id(state) not in (None, patient_id):
+                return {"patient_info": None}
+            return {}
+
+        extracted_info = state.get("intake_conversation_info")
+        return {
+            "patient_info": PatientInfo(
+                patient_id=patient_id,
+                name=patient_details.get("name", ""),
+                age=patient_details.get("age"),
+                medical_history=patient_details.get("medical_history"),
+                current_symptoms=extracted_info.symptoms if extracted_info else None,
+            )
+        }
+
+    async def run(
+        self, state: WorkflowState, config: Optional[RunnableConfig] = None
+    ) -> dict[str, Any]:
+        """
+        Run the intake agent subgraph. Its steps are only checkpointed with
+        the ``step`` checkpoint durability, otherwise the workflow saves the
+        subgraph's output when the intake node exits.
+        """
+
+        app = (
+            self.app if checkpoint_durability() == DURABILITY_STEP else self.unsaved_app
+        )
+        result = await app.ainvoke(state, config)
 
         return result
 
 
-intake_agent = IntakeAgent()
+@lru_cache(maxsize=1)
+def get_intake_agent() -> IntakeAgent:
+    """Get the shared intake agent, building its graph on first use."""
+    return IntakeAgent()
@@ -0,0 +1,311 @@
+"""
+Deterministic red-flag detection on raw intake transcripts.
+
+Runs before any model call so that routing critical patients to the emergency
+protocol does not wait on the LLM.
+"""
+
+import re
+from collections import deque
+from collections.abc import Iterator, Mapping, Sequence
+from functools import lru_cache
+from typing import Optional
+
+from src.core import config
+from src.state import RedFlag
+
+from .transcripts import is_clinician, split_turns
+
+# Canonical red flag -> phrases indicating it, matched case-insensitively
+DEFAULT_RED_FLAG_LEXICON: dict[str, list[str]] = {
+    "chest_pain": [
+        "chest pain",
+        "chest pains",
+        "chest pressure",
+        "chest tightness",
+        "tightness in my chest",
+        "pressure in my chest",
+        "crushing pain",
+        "pain radiating to my arm",
+        "pain radiating to my jaw",
+    ],
+    "difficulty_breathing": [
+        "difficulty breathing",
+        "trouble breathing",
+        "can't breathe",
+        "cannot breathe",
+        "can not breathe",
+        "short of breath",
+        "shortness of breath",
+        "struggling to breathe",
+        "gasping for air",
+    ],
+    "severe_bleeding": [
+        "severe bleeding",
+        "heavy bleeding",
+        "bleeding heavily",
+        "won't stop bleeding",
+        "bleeding won't stop",
+        "coughing up blood",
+        "vomiting blood",
+    ],
+    "stroke_symptoms": [
+        "face drooping",
+        "facial droop",
+        "slurred speech",
+        "slurring my words",
+        "numbness on one side",
+        "weakness on one side",
+        "sudden confusion",
+    ],
+    "loss_of_consciousness": [
+        "passed out",
+        "fainted",
+        "blacked out",
+        "lost consciousness",
+        "unconscious",
+        "unresponsive",
+    ],
+    "seizure": ["seizure", "seizures", "convulsing", "convulsions"],
+    "anaphylaxis": [
+        "anaphylaxis",
+        "throat is closing",
+        "throat closing",
+        "swelling of my throat",
+        "tongue swelling",
+    ],
+    "suicidal_ideation": [
+        "suicidal",
+        "kill myself",
+        "end my life",
+        "want to die",
+    ],
+    "worst_headache": [
+        "worst headache of my life",
+        "thunderclap headache",
+    ],
+}
+
+# Cues negating a red flag later in the same clause
+DEFAULT_NEGATION_CUES: list[str] = [
+    "no",
+    "not",
+    "denies",
+    "denied",
+    "deny",
+    "without",
+    "negative for",
+    "free of",
+    "never",
+    "don't",
+    "doesn't",
+    "didn't",
+    "haven't",
+    "hasn't",
+    "isn't",
+]
+
+# Words ending the scope of a preceding negation ("no fever but chest pain")
+_NEGATION_TERMINATORS = frozenset(["but", "however", "although", "though", "except"])
+
+# A negation carries over a comma into a list the cue heads directly ("no
+# fever, cough, or chest pain"): clauses starting with these words continue
+# the list, as do clauses of at most LIST_ITEM_WORDS words before one of them
+_LIST_CONJUNCTIONS = frozenset(["or", "and", "nor"])
+LIST_ITEM_WORDS = 2
+
+_SENTENCE_END = re.compile(r"[.!?;\n]")
+_CLAUSE_END = re.compile(r"[,.!?;\n]")
+_WHITESPACE = re.compile(r"[^\S\n]+")
+_WORD = re.compile(r"[a-z0-9']+")
+_APOSTROPHES = str.maketrans({"\u2018": "'", "\u2019": "'"})
+
+
+class _Automaton:
+    """Aho-Corasick automaton matching many phrases in one pass over the text."""
+
+    def __init__(self, patterns: Mapping[str, str]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[tuple[str, str]]] = [[]]
+
+        for pattern, label in patterns.items():
+            node = 0
+            for char in pattern:
+                child = self._goto[node].get(char)
+                if child is None:
+                    child = len(self._goto)
+                    self._goto[node][char] = child
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = child
+            self._out[node].append((pattern, label))
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def finditer(self, text: str) -> Iterator[tuple[int, int, str, str]]:
+        """Yield ``(start, end, pattern, label)`` for every occurrence."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for pattern, label in out[node]:
+                yield i - len(pattern) + 1, i + 1, pattern, label
+
+
+def _normalize(text: str) -> str:
+    # Lowercase, straighten curly apostrophes and collapse whitespace, keeping
+    # newlines as sentence breaks
+    return _WHITESPACE.sub(" ", text.lower().translate(_APOSTROPHES))
+
+
+class RedFlagDetector:
+    """
+    Matches a red-flag lexicon against a transcript in a single pass.
+
+    A phrase only matches on word boundaries. Matches are dropped when a
+    negation cue appears within ``negation_window`` words before them in the
+    same clause (``"denies chest pain"``), the list it starts included. They
+    are also dropped when their own clause is a question, or their sentence
+    is a question in a clinician's turn (``"Nurse: Any chest pain, fever?"``),
+    since those ask rather than report. A patient's question after a report
+    (``"I have chest pain, is it my heart?"``) keeps the match.
+    """
+
+    def __init__(
+        self,
+        lexicon: Optional[Mapping[str, Sequence[str]]] = None,
+        negation_cues: Optional[Sequence[str]] = None,
+        negation_window: int = 5,
+    ):
+        lexicon = DEFAULT_RED_FLAG_LEXICON if lexicon is None else lexicon
+        negation_cues = (
+            DEFAULT_NEGATION_CUES if negation_cues is None else negation_cues
+        )
+        self.negation_window = negation_window
+        self._automaton = _Automaton(
+            {
+                _normalize(phrase): flag
+                for flag, phrases in lexicon.items()
+                for phrase in phrases
+            }
+        )
+        self._negation_cues = [
+            tuple(_WORD.findall(_normalize(cue))) for cue in negation_cues
+        ]
+
+    def detect(self, text: str) -> list[RedFlag]:
+        """Get the red flags asserted in the text, one per flag, in order."""
+        found: dict[str, RedFlag] = {}
+        for turn in split_turns(text):
+            self._detect_turn(_normalize(turn.text), is_clinician(turn), found)
+        return list(found.values())
+
+    def _detect_turn(
+        self, text: str, clinician: bool, found: dict[str, RedFlag]
+    ) -> None:
+        for start, end, term, flag in self._automaton.finditer(text):
+            if flag in found or not self._is_word(text, start, end):
+                continue
+
+            clause_end = _CLAUSE_END.search(text, end)
+            if clause_end and clause_end.group() == "?":
+                continue
+            if clinician:
+                sentence_end = _SENTENCE_END.search(text, end)
+                if sentence_end and sentence_end.group() == "?":
+                    continue
+            scope_start = self._negation_scope_start(text, start, end)
+            if self._is_negated(text[scope_start:start]):
+                continue
+
+            found[flag] = RedFlag(flag=flag, term=term)
+
+    @staticmethod
+    def _is_word(text: str, start: int, end: int) -> bool:
+        before = text[start - 1] if start > 0 else " "
+        after = text[end] if end < len(text) else " "
+        return not (before.isalnum() or after.isalnum())
+
+    @staticmethod
+    def _boundary_before(text: str, position: int, chars: str) -> int:
+        return max(text.rfind(char, 0, position) for char in chars) + 1
+
+    def _negation_scope_start(self, text: str, start: int, end: int) -> int:
+        """
+        Start of the text a negation of the match at ``start`` may come from:
+        its clause, or its sentence back to the head of the list it is in.
+        """
+        sentence_start = self._boundary_before(text, start, ".!?;\n")
+        sentence_end = _SENTENCE_END.search(text, end)
+        sentence = text[
+            sentence_start : sentence_end.start() if sentence_end else len(text)
+        ]
+        clauses = sentence.split(",")
+        offsets = [sentence_start]
+        for clause in clauses[:-1]:
+            offsets.append(offsets[-1] + len(clause) + 1)
+        index = max(i for i, offset in enumerate(offsets) if offset <= start)
+
+        # Walk back over the list's items to the clause heading it
+        led = [self._starts_with_conjunction(clause) for clause in clauses]
+        short = [len(_WORD.findall(clause)) <= LIST_ITEM_WORDS for clause in clauses]
+        head = index
+        while head > 0 and (led[head] or (short[head] and any(led[head:]))):
+            head -= 1
+        if head < index and self._heads_list(clauses[head]):
+            return offsets[head]
+        return offsets[index]
+
+    @staticmethod
+    def _starts_with_conjunction(clause: str) -> bool:
+        words = _WORD.findall(clause)
+        return bool(words) and words[0] in _LIST_CONJUNCTIONS
+
+    def _heads_list(self, clause: str) -> bool:
+        # A cue directly followed by the list's first item ("no fever"), not
+        # a bare answer ("no,") or an unrelated clause ("i don't know why,")
+        words = _WORD.findall(clause)
+        for cue in self._negation_cues:
+            for i in range(len(words) - len(cue) + 1):
+                if tuple(words[i : i + len(cue)]) == cue:
+                    item = len(words) - i - len(cue)
+                    if 0 < item <= LIST_ITEM_WORDS:
+                        return True
+        return False
+
+    def _is_negated(self, preceding: str) -> bool:
+        words = _WORD.findall(preceding)
+        for i in range(len(words) - 1, -1, -1):
+            if words[i] in _NEGATION_TERMINATORS:
+                words = words[i + 1 :]
+                break
+        words = words[-self.negation_window :] if self.negation_window > 0 else []
+
+        for cue in self._negation_cues:
+            for i in range(len(words) - len(cue) + 1):
+                if tuple(words[i : i + len(cue)]) == cue:
+                    return True
+        return False
+
+
+@lru_cache(maxsize=1)
+def get_red_flag_detector() -> RedFlagDetector:
+    """Get the shared detector for the configured lexicon."""
+    return RedFlagDetector(
+        lexicon=config.red_flag_lexicon,
+        negation_cues=config.red_flag_negation_cues,
+        negation_window=config.red_flag_negation_window,
+    )
@@ -0,0 +1,205 @@
+"""
+Preparation of long intake transcripts for chunked extraction.
+
+Long conversations are cleaned of filler and repeated turns, split into
+chunks on turn boundaries, extracted chunk by chunk and merged back into one
+``IntakeConversationInfo``.
+"""
+
+import re
+from collections import Counter
+from collections.abc import Sequence
+from typing import NamedTuple, Optional
+
+from src.state import IntakeConversationInfo
+
+# A speaker label such as "Nurse:" or "Dr Smith:", at the start of a line or
+# after the end of the previous sentence
+SPEAKER_PATTERN = re.compile(
+    r"(?:^[ \t]*|(?<=[.!?\"')\]])\s+)"
+    r"(?P<speaker>[A-Z][A-Za-z]*(?: [A-Z][A-Za-z]*)?):\s+",
+    re.MULTILINE,
+)
+
+# Turns consisting only of these carry nothing to extract. Answers such as
+# "yes" or "no" are kept, they are meaningful after a question.
+FILLER_PHRASES = frozenset(
+    {
+        "ok",
+        "okay",
+        "alright",
+        "all right",
+        "mm",
+        "mhm",
+        "mm hmm",
+        "uh huh",
+        "hmm",
+        "um",
+        "uh",
+        "er",
+        "i see",
+        "got it",
+        "thanks",
+        "thank you",
+        "thank you very much",
+    }
+)
+
+# Speakers whose turns are questions and remarks rather than the complaint
+CLINICIAN_SPEAKERS = frozenset(
+    {"nurse", "doctor", "dr", "physician", "provider", "clinician", "triage"}
+)
+
+_WORDS = re.compile(r"[a-z0-9']+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+class Turn(NamedTuple):
+    """One speaker's turn in a conversation; speaker is None when unlabelled."""
+
+    speaker: Optional[str]
+    text: str
+
+    def render(self) -> str:
+        return f"{self.speaker}: {self.text}" if self.speaker else self.text
+
+
+def is_clinician(turn: Turn) -> bool:
+    """Whether the turn is the clinician's, judged by its speaker label."""
+    speaker = (turn.speaker or "").lower().split()
+    return bool(speaker) and speaker[0] in CLINICIAN_SPEAKERS
+
+
+def _normalize(text: str) -> str:
+    return " ".join(_WORDS.findall(text.lower().replace("-", " ")))
+
+
+def split_turns(conversation: str) -> list[Turn]:
+    """Split a conversation into speaker turns."""
+    turns = []
+    matches = list(SPEAKER_PATTERN.finditer(conversation))
+    preamble = conversation[: matches[0].start() if matches else None].strip()
+    if preamble:
+        turns.append(Turn(None, preamble))
+
+    for match, following in zip(matches, [*matches[1:], None]):
+        end = following.start() if following else len(conversation)
+        text = conversation[match.end() : end].strip()
+        if text:
+            turns.append(Turn(match["speaker"], text))
+    return turns
+
+
+def clean_turns(turns: Sequence[Turn]) -> list[Turn]:
+    """Drop filler turns and turns repeating an earlier one word for word."""
+    cleaned = []
+    seen = set()
+    for turn in turns:
+        normalized = _normalize(turn.text)
+        if not normalized or normalized in FILLER_PHRASES:
+            continue
+        key = (turn.speaker, normalized)
+        # Short answers like "no" legitimately repeat
+        if key in seen and len(normalized) > 20:
+            continue
+        seen.add(key)
+        cleaned.append(turn)
+    return cleaned
+
+
+def _split_long_turn(turn: Turn, max_chars: int) -> list[Turn]:
+    """Split a turn longer than ``max_chars`` at sentence ends where possible."""
+    max_chars -= len(turn.render()) - len(turn.text)
+    pieces: list[str] = []
+    for sentence in _SENTENCE_END.split(turn.text):
+        while len(sentence) > max_chars:
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if pieces and len(pieces[-1]) + len(sentence) + 1 <= max_chars:
+            pieces[-1] = f"{pieces[-1]} {sentence}"
+        else:
+            pieces.append(sentence)
+    return [Turn(turn.speaker, piece) for piece in pieces]
+
+
+def chunk_turns(turns: Sequence[Turn], max_chars: int) -> list[str]:
+    """
+    Pack whole turns into chunks of about ``max_chars`` characters.
+    A question is kept in the same chunk as the answer that follows it.
+    """
+    chunks: list[list[Turn]] = []
+    current: list[Turn] = []
+    size = 0
+
+    pieces = [
+        piece
+        for turn in turns
+        for piece in (
+            _split_long_turn(turn, max_chars)
+            if len(turn.render()) > max_chars
+            else [turn]
+        )
+    ]
+    for turn in pieces:
+        length = len(turn.render()) + 1
+        if current and size + length > max_chars:
+            # Carry a trailing question over to its answer
+            carried = []
+            if len(current) > 1 and current[-1].text.endswith("?"):
+                carried = [current.pop()]
+            chunks.append(current)
+            current = carried
+            size = sum(len(t.render()) + 1 for t in current)
+        current.append(turn)
+        size += length
+
+    if current:
+        chunks.append(current)
+    return ["\n".join(turn.render() for turn in chunk) for chunk in chunks]
+
+
+def prepare_transcript(conversation: str, max_chars: int) -> list[str]:
+    """Clean a long conversation and split it into extraction chunks."""
+    return chunk_turns(clean_turns(split_turns(conversation)), max_chars)
+
+
+def merge_extractions(
+    extractions: Sequence[IntakeConversationInfo],
+) -> IntakeConversationInfo:
+    """
+    Merge per-chunk extractions, in conversation order, deterministically:
+    symptoms are unioned in order of first mention, the pain level is the
+    highest reported, the chief complaint is the one most chunks agree on
+    (the earliest on a tie) and notes are concatenated without repeats.
+    """
+    symptoms: dict[str, str] = {}
+    for extraction in extractions:
+        for symptom in extraction.symptoms:
+            symptoms.setdefault(_normalize(symptom), symptom.strip())
+
+    complaints = [
+        extraction.chief_complaint.strip()
+        for extraction in extractions
+        if extraction.chief_complaint and extraction.chief_complaint.strip()
+    ]
+    votes = Counter(_normalize(complaint) for complaint in complaints)
+    chief_complaint = max(
+        complaints,
+        key=lambda complaint: votes[_normalize(complaint)],
+        default="",
+    )
+
+    notes: dict[str, str] = {}
+    for extraction in extractions:
+        note = (extraction.additional_notes or "").strip()
+        if note:
+            notes.setdefault(_normalize(note), note)
+
+    return IntakeConversationInfo(
+        symptoms=[symptom for key, symptom in symptoms.items() if key],
+        pain_level=max(
+            (extraction.pain_level for extraction in extractions), default=0
+        ),
+        chief_complaint=chief_complaint,
+        additional_notes=" ".join(notes.values()),
+    )
@@ -1,17 +1,268 @@
-import os
-
-from langchain_google_genai import ChatGoogleGenerativeAI
-
 """
 Triage Agent
 
-Its core prompt should be a chain-of-thought process that walks through the ESI decision points using the symptoms, 
-history, AND vital signs.
+Its core prompt should be a chain-of-thought process that walks through the ESI
+decision points using the symptoms, history, AND vital signs.
+
+A decision depends only on the symptoms and pain level of the intake, which
+the extraction streams first, so it can start speculatively while the rest of
+the extraction is still streaming; see ``SpeculativeTriage``.
 """
 
-model = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash-preview-05-20",
-    temperature=1.0,
-    max_retries=1,
-    google_api_key=os.getenv("GEMINI_API_KEY"),
+import asyncio
+import json
+from collections.abc import Mapping, Sequence
+from contextlib import suppress
+from functools import lru_cache
+from typing import Any, NamedTuple, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import Runnable
+
+from src.core.models import default_settings, model_registry
+from src.core.resilience import get_executor
+from src.core.scheduler import (
+    PRIORITY_CRITICAL,
+    estimate_tokens,
+    get_scheduler,
+    priority_scope,
 )
+from src.state import IntakeConversationInfo, RedFlag, TriageDecision
+
+from .intake import get_patient_details
+from .transcripts import merge_extractions
+
+
+def get_model() -> BaseChatModel:
+    """Get the shared model client configured by the workflow config."""
+    return model_registry.get_model()
+
+
+TRIAGE_SYSTEM_PROMPT = """
+            You are an emergency department triage nurse.
+            Assign the patient an Emergency Severity Index (ESI) priority level,
+            from 1 (most urgent) to 5 (least urgent).
+
+            Walk through the ESI decision points in order:
+            - A: Does the patient need an immediate life-saving intervention? ESI 1
+            - B: Is it a high-risk situation, is the patient confused, lethargic
+              or disoriented, or in severe pain or distress? ESI 2
+            - C: How many resources (labs, imaging, IV fluids, consults,
+              procedures) will the patient need? Many is ESI 3, one is ESI 4,
+              none is ESI 5
+            - D: Are the vital signs in the danger zone? Consider ESI 2
+
+            Guidelines:
+            - Use the symptoms, pain level, medical history and vital signs
+            - Give your reasoning step by step through the decision points
+            - Recommend the next actions for the care team
+            """
+
+# Patient record fields that inform the decision
+PATIENT_CONTEXT_KEYS = (
+    "age",
+    "medical_history",
+    "current_medications",
+    "allergies",
+    "vital_signs",
+)
+
+
+class TriageInputs(NamedTuple):
+    """The intake findings a triage decision depends on."""
+
+    symptoms: tuple[str, ...]
+    pain_level: int
+
+    @classmethod
+    def from_info(cls, info: IntakeConversationInfo) -> "TriageInputs":
+        return cls(
+            tuple(symptom.strip().lower() for symptom in info.symptoms),
+            info.pain_level,
+        )
+
+
+def partial_intake_info(
+    partial: Mapping[str, Any],
+) -> Optional[IntakeConversationInfo]:
+    """
+    Intake info from a partial extraction once it has the fields triage needs.
+    Fields stream in schema order, so the symptoms are complete by the time
+    the pain level arrives; a pain level still streaming may change.
+    """
+    pain_level = partial.get("pain_level")
+    if partial.get("symptoms") is None or type(pain_level) is not int:
+        return None
+    return IntakeConversationInfo(
+        symptoms=partial["symptoms"],
+        pain_level=pain_level,
+        chief_complaint="",
+        additional_notes="",
+    )
+
+
+def triage_messages(
+    inputs: TriageInputs,
+    patient_details: Optional[Mapping[str, Any]],
+    red_flags: Optional[Sequence[RedFlag]],
+) -> list[BaseMessage]:
+    """Triage prompt for the given findings."""
+    findings: dict[str, Any] = {
+        "symptoms": list(inputs.symptoms),
+        "pain_level": inputs.pain_level,
+    }
+    if red_flags:
+        findings["red_flags"] = sorted({flag.flag for flag in red_flags})
+    for key in PATIENT_CONTEXT_KEYS:
+        if patient_details and patient_details.get(key):
+            findings[key] = patient_details[key]
+
+    human_prompt = f"""Triage this patient:
+            {json.dumps(findings, sort_keys=True)}
+            """
+    return [
+        SystemMessage(content=TRIAGE_SYSTEM_PROMPT),
+        HumanMessage(content=human_prompt),
+    ]
+
+
+class TriageAgent:
+    """Triage agent, assigns an ESI priority level from the intake findings."""
+
+    def __init__(self):
+        self._structured_model = None
+        self.speculation_stats = {
+            "started": 0,
+            "confirmed": 0,
+            "restarted": 0,
+            "missed": 0,
+        }
+
+    @property
+    def structured_model(self) -> Runnable:
+        """Model bound to the ``TriageDecision`` output schema."""
+        if self._structured_model is None:
+            self._structured_model = model_registry.get_structured_model(TriageDecision)
+        return self._structured_model
+
+    async def decide(
+        self,
+        info: IntakeConversationInfo,
+        patient_details: Optional[Mapping[str, Any]] = None,
+        red_flags: Optional[Sequence[RedFlag]] = None,
+    ) -> TriageDecision:
+        """Decide the patient's ESI level, ahead of routine calls if red-flagged."""
+        messages = triage_messages(
+            TriageInputs.from_info(info), patient_details, red_flags
+        )
+        prompt = "".join(str(message.content) for message in messages)
+        tokens = estimate_tokens(prompt, default_settings().max_tokens)
+        with priority_scope(PRIORITY_CRITICAL if red_flags else None):
+            return await get_executor("triage").call(
+                lambda: self.structured_model.ainvoke(messages),
+                slot=lambda: get_scheduler().slot(tokens),
+            )
+
+    def stats(self) -> dict[str, int]:
+        """Outcomes of speculative decisions."""
+        return dict(self.speculation_stats)
+
+
+class SpeculativeTriage:
+    """
+    Triage decision of one workflow run, started from partial intake results.
+
+    ``prepare`` sets the run's context, ``offer`` starts a decision as soon
+    as a partial extraction has the symptoms and pain level and restarts it
+    if they change. ``decide`` confirms the speculative decision when the
+    final findings match the ones it started from, otherwise cancels it and
+    decides again. Without a speculative decision it simply decides.
+    """
+
+    def __init__(self, agent: TriageAgent):
+        self.agent = agent
+        self._prepared = False
+        self._previous: Optional[IntakeConversationInfo] = None
+        self._patient_id: Optional[str] = None
+        self._red_flags: Optional[Sequence[RedFlag]] = None
+        self._inputs: Optional[TriageInputs] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def prepare(
+        self,
+        previous: Optional[IntakeConversationInfo],
+        patient_id: Optional[str],
+        red_flags: Optional[Sequence[RedFlag]],
+    ) -> None:
+        """
+        Set the context of the next extraction: the intake info it will be
+        merged into, the patient and the red flags.
+        """
+        self.cancel()
+        self._prepared = True
+        self._previous = previous
+        self._patient_id = patient_id
+        self._red_flags = red_flags
+
+    def offer(self, partial: Mapping[str, Any]) -> None:
+        """Start or restart the decision from a partial extraction."""
+        info = partial_intake_info(partial) if self._prepared else None
+        if info is None:
+            return
+        if self._previous is not None:
+            info = merge_extractions([self._previous, info])
+
+        inputs = TriageInputs.from_info(info)
+        if inputs == self._inputs:
+            return
+        if self._task is not None:
+            self.agent.speculation_stats["restarted"] += 1
+        self.cancel()
+        self._inputs = inputs
+        self._task = asyncio.ensure_future(self._speculate(info))
+        self.agent.speculation_stats["started"] += 1
+
+    async def _speculate(
+        self, info: IntakeConversationInfo
+    ) -> tuple[TriageDecision, Optional[dict[str, Any]]]:
+        patient_details = None
+        if self._patient_id:
+            patient_details = await get_patient_details.ainvoke(self._patient_id)
+        decision = await self.agent.decide(info, patient_details, self._red_flags)
+        return decision, patient_details
+
+    async def decide(
+        self,
+        info: IntakeConversationInfo,
+        patient_details: Optional[Mapping[str, Any]] = None,
+        red_flags: Optional[Sequence[RedFlag]] = None,
+    ) -> TriageDecision:
+        """Confirm the speculative decision, or decide from the final findings."""
+        task, self._task = self._task, None
+        inputs, self._inputs = self._inputs, None
+        if task is not None and inputs == TriageInputs.from_info(info):
+            # A failed speculation is decided again below
+            with suppress(Exception):
+                decision, speculated_details = await task
+                if speculated_details == patient_details:
+                    self.agent.speculation_stats["confirmed"] += 1
+                    return decision
+        elif task is not None:
+            task.cancel()
+        if task is not None:
+            self.agent.speculation_stats["missed"] += 1
+        return await self.agent.decide(info, patient_details, red_flags)
+
+    def cancel(self) -> None:
+        """Cancel the speculative decision, if any."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._inputs = None
+
+
+@lru_cache(maxsize=1)
+def get_triage_agent() -> TriageAgent:
+    """Get the shared triage agent."""
+    return TriageAgent()
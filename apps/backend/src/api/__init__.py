@@ -1,5 +1,6 @@
 """API endpoints for the triage system."""
 
 from .agents import router
+from .board import router as board_router
 
-__all__ = ["router"]
+__all__ = ["board_router", "router"]
@@ -2,13 +2,32 @@
 API endpoints for the multi-agent triage system.
 """
 
-from typing import Any
+import logging
+from collections.abc import AsyncIterator
+from typing import Any, Literal, Optional
 
-from fastapi import APIRouter, HTTPException
-from langchain_core.messages import HumanMessage
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 
-from src.graphs import triage_workflow
+from src.agents import get_intake_agent
+from src.agents.red_flags import get_red_flag_detector
+from src.api.serialization import FastJSONResponse, dumps, parse_fields, project_result
+from src.core import config
+from src.core.jobs import DuplicateJobError, QueueFullError, get_job_queue
+from src.core.resilience import CircuitOpenError, DeadlineExceededError, deadline_scope
+from src.core.scheduler import (
+    PRIORITY_CRITICAL,
+    PRIORITY_LEVELS,
+    PRIORITY_NORMAL,
+    AdmissionRejectedError,
+    get_scheduler,
+    priority_scope,
+)
+from src.graphs import conversation_update, get_triage_workflow, new_thread_id
+from src.repositories import get_patient_repository
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -16,49 +35,396 @@ router = APIRouter()
 class PatientIntakeRequest(BaseModel):
     """Request model for patient intake."""
 
+    # On an existing thread, the next segment of its conversation
     conversation: str
+    thread_id: Optional[str] = None
+    patient_id: Optional[str] = None
+    # Extract the thread's whole conversation again instead of the segment
+    reextract: bool = False
+    # Caller's acuity hint; red flags in the conversation always mean critical
+    priority: Optional[Literal["critical", "high", "normal"]] = None
+
+
+class BatchIntakeRequest(BaseModel):
+    """Request model for a batch of patient intakes."""
+
+    conversations: list[str] = Field(min_length=1)
+    # Aligned with conversations, None where the patient is not known
+    patient_ids: Optional[list[Optional[str]]] = None
+    max_concurrency: Optional[int] = Field(default=None, ge=1)
 
 
 class WorkflowResponse(BaseModel):
     """Response model for workflow execution."""
 
     status: str
+    thread_id: Optional[str] = None
+    # Projected onto the requested fields of the workflow state
     result: dict[str, Any]
 
 
-@router.post("/patient/intake", response_model=WorkflowResponse)
-async def start_workflow(request: PatientIntakeRequest) -> WorkflowResponse:
+class JobResponse(BaseModel):
+    """Response model for an accepted background job."""
+
+    status: str
+    thread_id: str
+    status_url: str
+
+
+class BatchItemResult(BaseModel):
+    """Result of a single workflow within a batch."""
+
+    index: int
+    thread_id: str
+    status: str
+    result: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+class BatchWorkflowResponse(BaseModel):
+    """Response model for batch workflow execution."""
+
+    status: str
+    results: list[BatchItemResult]
+
+
+def request_timeout(
+    x_request_timeout: Optional[float] = Header(default=None, gt=0),
+) -> Optional[float]:
+    """Seconds the caller is willing to wait, from ``X-Request-Timeout``."""
+    return x_request_timeout
+
+
+def result_fields(
+    fields: Optional[str] = Query(
+        default=None,
+        description="Comma-separated workflow state fields to return, or *",
+    ),
+) -> Optional[tuple[str, ...]]:
+    """Fields of the workflow state to return, None for all of them."""
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e)) from e
+
+
+def _request_priority(request: PatientIntakeRequest) -> int:
+    """Scheduling priority from the caller's hint and a red flag screen."""
+    if config.red_flags_enabled and get_red_flag_detector().detect(
+        request.conversation
+    ):
+        return PRIORITY_CRITICAL
+    return PRIORITY_LEVELS[request.priority or "normal"]
+
+
+def _upstream_error(e: Exception) -> Optional[HTTPException]:
+    """Map upstream call failures to the matching HTTP error."""
+    if isinstance(e, AdmissionRejectedError):
+        return HTTPException(
+            status_code=e.status_code,
+            detail=str(e),
+            headers={"Retry-After": str(max(1, round(e.retry_after)))},
+        )
+    if isinstance(e, CircuitOpenError):
+        return HTTPException(
+            status_code=503,
+            detail=f"Model provider unavailable: {str(e)}",
+            headers={"Retry-After": str(int(e.retry_after))},
+        )
+    if isinstance(e, DeadlineExceededError):
+        return HTTPException(status_code=504, detail=f"Workflow timed out: {str(e)}")
+    return None
+
+
+def _initial_state(request: PatientIntakeRequest) -> dict[str, Any]:
+    """Build the workflow input for an intake request."""
+    return conversation_update(
+        request.conversation, request.patient_id, request.reextract
+    )
+
+
+@router.post(
+    "/patient/intake",
+    response_model=WorkflowResponse,
+    response_class=FastJSONResponse,
+)
+async def start_workflow(
+    request: PatientIntakeRequest,
+    timeout: Optional[float] = Depends(request_timeout),
+    fields: Optional[tuple[str, ...]] = Depends(result_fields),
+) -> FastJSONResponse:
     """
     Start a new triage workflow for a patient.
     """
     try:
-        initial_state = {"messages": [HumanMessage(content=request.conversation)]}
+        initial_state = _initial_state(request)
+        thread_id = request.thread_id or new_thread_id()
+
+        timeout = timeout or config.timeout_seconds
+        priority = _request_priority(request)
+        get_scheduler().admit(priority, timeout)
 
-        result = await triage_workflow.run(initial_state)
+        with deadline_scope(timeout), priority_scope(priority):
+            result = await get_triage_workflow().run(initial_state, thread_id=thread_id)
 
-        return WorkflowResponse(status="completed", result=result)
+        return FastJSONResponse(
+            {
+                "status": "completed",
+                "thread_id": thread_id,
+                "result": project_result(result, fields),
+            }
+        )
 
     except Exception as e:
+        if (error := _upstream_error(e)) is not None:
+            raise error from e
         raise HTTPException(
             status_code=500, detail=f"Workflow execution failed: {str(e)}"
         )
 
 
-@router.get("/workflow/status/{thread_id}")
-async def get_workflow_status(thread_id: str) -> dict[str, Any]:
+@router.post("/patient/intake/jobs", status_code=202, response_model=JobResponse)
+async def submit_workflow_job(
+    request: PatientIntakeRequest,
+    http_request: Request,
+    response: Response,
+    timeout: Optional[float] = Depends(request_timeout),
+) -> JobResponse:
     """
-    Get the current status of a workflow by thread ID.
+    Queue a triage workflow to run in the background.
+    Poll the returned status URL, optionally with ``wait``, for its outcome.
+    """
+    initial_state = _initial_state(request)
+    thread_id = request.thread_id or new_thread_id()
+    timeout = timeout or config.timeout_seconds
+    priority = _request_priority(request)
+
+    async def run() -> dict[str, Any]:
+        with deadline_scope(timeout), priority_scope(priority):
+            return await get_triage_workflow().run(initial_state, thread_id=thread_id)
+
+    try:
+        job = get_job_queue().submit(thread_id, run, priority)
+    except DuplicateJobError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "1"}
+        ) from e
+
+    status_url = str(http_request.url_for("get_workflow_status", thread_id=thread_id))
+    response.headers["Location"] = status_url
+    return JobResponse(status=job.status, thread_id=thread_id, status_url=status_url)
+
+
+def _format_sse(event: str, data: Any) -> str:
+    """Format a server-sent event."""
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+
+@router.post("/patient/intake/stream")
+async def stream_workflow(
+    request: PatientIntakeRequest,
+    timeout: Optional[float] = Depends(request_timeout),
+    fields: Optional[tuple[str, ...]] = Depends(result_fields),
+) -> StreamingResponse:
     """
+    Start a new triage workflow and stream its progress as server-sent events.
+    """
+    initial_state = _initial_state(request)
+    thread_id = request.thread_id or new_thread_id()
+
+    timeout = timeout or config.timeout_seconds
+    priority = _request_priority(request)
     try:
-        # This would typically query the workflow state from the checkpointer
-        # For now, return a placeholder response
-        return {
+        get_scheduler().admit(priority, timeout)
+    except AdmissionRejectedError as e:
+        raise _upstream_error(e) from e
+
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            with deadline_scope(timeout), priority_scope(priority):
+                async for event in get_triage_workflow().stream(
+                    initial_state, thread_id
+                ):
+                    data = event["data"]
+                    if event["event"] == "result":
+                        data = project_result(data, fields)
+                    yield _format_sse(event["event"], data)
+        except Exception as e:
+            yield _format_sse(
+                "error", {"detail": f"Workflow execution failed: {str(e)}"}
+            )
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            "X-Thread-Id": thread_id,
+        },
+    )
+
+
+@router.post(
+    "/patient/intake/batch",
+    response_model=BatchWorkflowResponse,
+    response_class=FastJSONResponse,
+)
+async def start_workflow_batch(
+    request: BatchIntakeRequest,
+    timeout: Optional[float] = Depends(request_timeout),
+    fields: Optional[tuple[str, ...]] = Depends(result_fields),
+) -> FastJSONResponse:
+    """
+    Run a triage workflow for each conversation in the batch concurrently.
+    """
+    if len(request.conversations) > config.batch_max_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch size exceeds the limit of {config.batch_max_size}",
+        )
+
+    patient_ids = request.patient_ids or [None] * len(request.conversations)
+    if len(patient_ids) != len(request.conversations):
+        raise HTTPException(
+            status_code=422,
+            detail="patient_ids must have one entry per conversation",
+        )
+
+    max_concurrency = min(
+        request.max_concurrency or config.batch_max_concurrency,
+        config.batch_max_concurrency,
+    )
+    initial_states = [
+        conversation_update(conversation, patient_id)
+        for conversation, patient_id in zip(request.conversations, patient_ids)
+    ]
+    thread_ids = [new_thread_id() for _ in initial_states]
+
+    # Load every patient of the batch in one lookup to warm the patient cache,
+    # on failure each item's own history lookup reports the error
+    known_ids = [patient_id for patient_id in patient_ids if patient_id]
+    if known_ids:
+        try:
+            await get_patient_repository().get_many(known_ids)
+        except Exception:
+            logger.warning("Patient prewarm for a batch failed", exc_info=True)
+
+    timeout = timeout or config.timeout_seconds
+    try:
+        get_scheduler().admit(PRIORITY_NORMAL, timeout)
+    except AdmissionRejectedError as e:
+        raise _upstream_error(e) from e
+
+    with deadline_scope(timeout):
+        outcomes = await get_triage_workflow().run_batch(
+            initial_states, max_concurrency, thread_ids
+        )
+
+    results = [
+        {
+            "index": index,
+            "thread_id": thread_id,
+            "status": "failed",
+            "result": None,
+            "error": f"Workflow execution failed: {str(outcome)}",
+        }
+        if isinstance(outcome, BaseException)
+        else {
+            "index": index,
             "thread_id": thread_id,
-            "status": "running",
-            "current_step": "processing",
-            "message": "Workflow status retrieval not fully implemented yet",
+            "status": "completed",
+            "result": project_result(outcome, fields),
+            "error": None,
         }
+        for index, (thread_id, outcome) in enumerate(zip(thread_ids, outcomes))
+    ]
+
+    failed = sum(item["status"] == "failed" for item in results)
+    if failed == 0:
+        status = "completed"
+    elif failed == len(results):
+        status = "failed"
+    else:
+        status = "partial"
+
+    return FastJSONResponse({"status": status, "results": results})
+
+
+@router.get("/intake/cache/stats")
+async def get_intake_cache_stats() -> dict[str, Any]:
+    """
+    Get hit/miss statistics of the intake extraction cache.
+    """
+    cache = get_intake_agent().cache
+    if cache is None:
+        return {"enabled": False}
+
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/scheduler/stats")
+async def get_scheduler_stats() -> dict[str, Any]:
+    """
+    Get queue depth, in-flight calls and queue wait times of model calls.
+    """
+    return get_scheduler().stats()
+
+
+@router.get("/workflow/status/{thread_id}", response_class=FastJSONResponse)
+async def get_workflow_status(
+    thread_id: str,
+    wait: Optional[float] = Query(default=None, ge=0),
+    fields: Optional[tuple[str, ...]] = Depends(result_fields),
+) -> dict[str, Any]:
+    """
+    Get the current status of a workflow by thread ID.
+    For background jobs, ``wait`` holds the request for up to that many
+    seconds until the job finishes.
+    """
+    jobs = get_job_queue()
+    if (job := jobs.get(thread_id)) is not None:
+        if wait and not job.finished:
+            await jobs.wait(job, min(wait, config.job_max_wait_seconds))
+        status = job.to_dict()
+        return FastJSONResponse(
+            {**status, "result": project_result(status["result"], fields)}
+        )
+
+    if get_triage_workflow().memory is None:
+        raise HTTPException(status_code=501, detail="Workflow persistence is disabled")
+
+    try:
+        status = await get_triage_workflow().get_status(thread_id)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to get workflow status: {str(e)}"
         )
+
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Workflow {thread_id} not found")
+
+    return status
+
+
+@router.post("/workflow/cancel/{thread_id}", response_class=FastJSONResponse)
+async def cancel_workflow_job(thread_id: str) -> dict[str, Any]:
+    """
+    Cancel a queued or running background job.
+    """
+    job = get_job_queue().cancel(thread_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {thread_id} not found")
+
+    status = job.to_dict()
+    return FastJSONResponse({**status, "result": project_result(status["result"])})
+
+
+@router.get("/jobs/stats")
+async def get_job_stats() -> dict[str, Any]:
+    """
+    Get queue depth, running jobs and outcome counts of background jobs.
+    """
+    return get_job_queue().stats()
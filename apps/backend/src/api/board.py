@@ -0,0 +1,153 @@
+"""
+API endpoints for the live triage board.
+"""
+
+import asyncio
+from contextlib import suppress
+from typing import Any, Optional
+
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel, Field
+
+from src.board import Department, get_triage_board
+from src.graphs import new_thread_id
+
+router = APIRouter()
+
+
+class AdmitRequest(BaseModel):
+    """Request model for adding a patient to the board."""
+
+    # Defaults to a new id, typically the workflow's thread ID
+    entry_id: Optional[str] = None
+    esi_level: int = Field(ge=1, le=5)
+    patient_id: Optional[str] = None
+    name: Optional[str] = None
+    chief_complaint: Optional[str] = None
+
+
+class ReprioritizeRequest(BaseModel):
+    """Request model for changing a patient's ESI level."""
+
+    esi_level: int = Field(ge=1, le=5)
+
+
+def _department(name: str) -> Department:
+    """The named department, 404 if it isn't open."""
+    if (department := get_triage_board().department(name)) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown department {name}")
+    return department
+
+
+@router.get("/stats")
+async def get_board_stats() -> dict[str, Any]:
+    """
+    Get the number of waiting patients and subscribers per department.
+    """
+    return get_triage_board().stats()
+
+
+@router.get("/{department}")
+async def get_board(
+    department: str, limit: Optional[int] = Query(default=None, ge=1)
+) -> dict[str, Any]:
+    """
+    Get the department's waiting patients in the order they will be seen.
+    """
+    return _department(department).snapshot(limit)
+
+
+@router.post("/{department}/patients", status_code=201)
+async def admit_patient(department: str, request: AdmitRequest) -> dict[str, Any]:
+    """
+    Add a patient to the department's board.
+    """
+    entry_id = request.entry_id or new_thread_id()
+    try:
+        return (
+            get_triage_board()
+            .open(department)
+            .admit(
+                entry_id,
+                request.esi_level,
+                patient_id=request.patient_id,
+                name=request.name,
+                chief_complaint=request.chief_complaint,
+            )
+        )
+    except KeyError:
+        raise HTTPException(
+            status_code=409, detail=f"{entry_id} is already on the board"
+        ) from None
+
+
+@router.get("/{department}/patients/{entry_id}")
+async def get_board_patient(department: str, entry_id: str) -> dict[str, Any]:
+    """
+    Get a waiting patient's place in line and estimated wait.
+    """
+    board = _department(department)
+    if (entry := board.get(entry_id)) is None:
+        raise HTTPException(status_code=404, detail=f"{entry_id} is not waiting")
+    return board.describe(entry)
+
+
+@router.patch("/{department}/patients/{entry_id}")
+async def reprioritize_patient(
+    department: str, entry_id: str, request: ReprioritizeRequest
+) -> dict[str, Any]:
+    """
+    Change a waiting patient's ESI level.
+    """
+    board = _department(department)
+    if (entry := board.reprioritize(entry_id, request.esi_level)) is None:
+        raise HTTPException(status_code=404, detail=f"{entry_id} is not waiting")
+    return entry
+
+
+@router.delete("/{department}/patients/{entry_id}")
+async def discharge_patient(department: str, entry_id: str) -> dict[str, Any]:
+    """
+    Take a patient off the department's board.
+    """
+    board = _department(department)
+    if (entry := board.discharge(entry_id)) is None:
+        raise HTTPException(status_code=404, detail=f"{entry_id} is not waiting")
+    return entry
+
+
+@router.websocket("/{department}/ws")
+async def board_updates(websocket: WebSocket, department: str) -> None:
+    """
+    Push the department's board: a snapshot on connect, then only diffs.
+    """
+    triage_board = get_triage_board()
+    if (board := triage_board.department(department)) is None:
+        await websocket.close(code=1008, reason=f"Unknown department {department}")
+        return
+    await websocket.accept()
+    # Subscribing and snapshotting without a pause in between loses no diff
+    subscription = board.subscribe(triage_board.max_pending)
+    snapshot = board.snapshot()
+
+    async def forward() -> None:
+        await websocket.send_json(snapshot)
+        async for diff in subscription:
+            await websocket.send_json(diff)
+
+    async def until_disconnected() -> None:
+        with suppress(WebSocketDisconnect):
+            while True:
+                await websocket.receive_text()
+
+    tasks = [
+        asyncio.ensure_future(forward()),
+        asyncio.ensure_future(until_disconnected()),
+    ]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        # Not awaited: the handler may itself be cancelled on disconnect
+        for task in tasks:
+            task.cancel()
+        subscription.close()
@@ -0,0 +1,105 @@
+"""
+Compact projections of workflow results and a fast JSON response class.
+
+A workflow run returns its whole state: the conversation messages, the
+patient context and every agent's output. Clients rarely need more than the
+agents' outputs, so results are projected onto ``DEFAULT_RESULT_FIELDS``
+unless the caller asks for other fields. Responses are encoded with orjson
+when it is installed, with LangChain messages and Pydantic models encoded
+directly instead of through ``jsonable_encoder``.
+"""
+
+import json
+from collections.abc import Iterable, Mapping
+from datetime import date, datetime
+from typing import Any, Optional
+
+from fastapi.responses import JSONResponse
+from langchain_core.messages import BaseMessage
+from pydantic import BaseModel
+
+from src.state import WorkflowState
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+RESULT_FIELDS = frozenset(WorkflowState.__annotations__)
+
+# Agents' outputs, without the echoed conversation and context
+DEFAULT_RESULT_FIELDS = (
+    "intake_conversation_info",
+    "intake_tier",
+    "patient_info",
+    "patient_conditions",
+    "triage_decision",
+    "red_flags",
+    "emergency_protocol_activated",
+    "emergency_actions",
+    "last_node",
+    "errors",
+)
+
+# Selects every field of the state
+ALL_FIELDS = "*"
+
+
+def parse_fields(fields: Optional[str]) -> Optional[tuple[str, ...]]:
+    """
+    Parse a comma-separated field selection. Returns None for ``*``, the
+    whole state, and raises ValueError on fields the state does not have.
+    """
+    if fields is None:
+        return DEFAULT_RESULT_FIELDS
+
+    selected = tuple(
+        dict.fromkeys(field.strip() for field in fields.split(",") if field.strip())
+    )
+    if ALL_FIELDS in selected:
+        return None
+    unknown = [field for field in selected if field not in RESULT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown result fields: {', '.join(unknown)}")
+    return selected
+
+
+def project_result(
+    result: Optional[Mapping[str, Any]],
+    fields: Optional[Iterable[str]] = DEFAULT_RESULT_FIELDS,
+) -> Optional[dict[str, Any]]:
+    """Keep only ``fields`` of a workflow result, all of them if None."""
+    if result is None:
+        return None
+    if fields is None:
+        return dict(result)
+    return {field: result[field] for field in fields if field in result}
+
+
+def _encode(value: Any) -> Any:
+    """Encode the values the JSON encoders do not handle themselves."""
+    if isinstance(value, BaseMessage):
+        return {"type": value.type, "content": value.content}
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """Encode ``value`` as compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_encode, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        value, default=_encode, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with ``dumps``."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,40 @@
+"""
+Live triage board of the patients waiting in each department.
+"""
+
+from functools import lru_cache
+
+from src.core import config
+
+from .triage_board import (
+    ESI_LEVELS,
+    BoardEntry,
+    Department,
+    FenwickTree,
+    IndexedHeap,
+    Subscription,
+    TriageBoard,
+)
+
+
+@lru_cache(maxsize=1)
+def get_triage_board() -> TriageBoard:
+    """Get the process-wide triage board."""
+    return TriageBoard(
+        departments=config.board_departments,
+        service_minutes=config.board_service_minutes,
+        providers=config.board_providers,
+        max_pending=config.board_max_pending_diffs,
+    )
+
+
+__all__ = [
+    "BoardEntry",
+    "Department",
+    "ESI_LEVELS",
+    "FenwickTree",
+    "IndexedHeap",
+    "Subscription",
+    "TriageBoard",
+    "get_triage_board",
+]
@@ -0,0 +1,391 @@
+"""
+Live waiting room board ordered by ESI level, then arrival.
+
+Each department keeps its patients in an indexed binary heap, so admitting,
+reprioritizing and discharging a patient are O(log n). A patient's place in
+line, and from it the estimated wait, is counted with one Fenwick tree per
+ESI level instead of a scan. Subscribers get diffs rather than the full list.
+"""
+
+import asyncio
+import time
+from collections.abc import AsyncIterator, Iterable, Iterator
+from datetime import datetime, timezone
+from typing import Any, NamedTuple, Optional
+
+ESI_LEVELS = (1, 2, 3, 4, 5)
+
+
+class BoardEntry(NamedTuple):
+    """A patient waiting on the board."""
+
+    entry_id: str
+    esi_level: int
+    # Arrival order within the department, renumbered on compaction
+    sequence: int
+    arrived_at: float
+    patient_id: Optional[str] = None
+    name: Optional[str] = None
+    chief_complaint: Optional[str] = None
+
+    @property
+    def sort_key(self) -> tuple[int, int]:
+        return (self.esi_level, self.sequence)
+
+
+class FenwickTree:
+    """Counts over positions 0..size-1 with O(log n) updates and prefix sums."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._tree = [0] * (size + 1)
+
+    def add(self, position: int, delta: int) -> None:
+        i = position + 1
+        while i <= self.size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, end: int) -> int:
+        """Sum over positions before ``end``."""
+        total = 0
+        i = min(end, self.size)
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+
+class IndexedHeap:
+    """Binary min-heap of entries by sort key, with positions indexed by id."""
+
+    def __init__(self):
+        self._items: list[BoardEntry] = []
+        self._positions: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, entry_id: str) -> bool:
+        return entry_id in self._positions
+
+    def __iter__(self) -> Iterator[BoardEntry]:
+        return iter(self._items)
+
+    def get(self, entry_id: str) -> Optional[BoardEntry]:
+        position = self._positions.get(entry_id)
+        return None if position is None else self._items[position]
+
+    def peek(self) -> Optional[BoardEntry]:
+        return self._items[0] if self._items else None
+
+    def push(self, entry: BoardEntry) -> None:
+        self._items.append(entry)
+        self._positions[entry.entry_id] = len(self._items) - 1
+        self._sift_up(len(self._items) - 1)
+
+    def replace(self, entry: BoardEntry) -> BoardEntry:
+        """Replace the entry with the same id, restoring heap order."""
+        position = self._positions[entry.entry_id]
+        previous, self._items[position] = self._items[position], entry
+        self._sift_up(position)
+        self._sift_down(self._positions[entry.entry_id])
+        return previous
+
+    def remove(self, entry_id: str) -> BoardEntry:
+        position = self._positions.pop(entry_id)
+        removed = self._items[position]
+        last = self._items.pop()
+        if position < len(self._items):
+            self._items[position] = last
+            self._positions[last.entry_id] = position
+            self._sift_up(position)
+            self._sift_down(self._positions[last.entry_id])
+        return removed
+
+    def _swap(self, i: int, j: int) -> None:
+        items = self._items
+        items[i], items[j] = items[j], items[i]
+        self._positions[items[i].entry_id] = i
+        self._positions[items[j].entry_id] = j
+
+    def _sift_up(self, position: int) -> None:
+        items = self._items
+        while position > 0:
+            parent = (position - 1) // 2
+            if items[parent].sort_key <= items[position].sort_key:
+                break
+            self._swap(parent, position)
+            position = parent
+
+    def _sift_down(self, position: int) -> None:
+        items = self._items
+        while True:
+            smallest = position
+            for child in (2 * position + 1, 2 * position + 2):
+                if (
+                    child < len(items)
+                    and items[child].sort_key < items[smallest].sort_key
+                ):
+                    smallest = child
+            if smallest == position:
+                return
+            self._swap(smallest, position)
+            position = smallest
+
+
+class Subscription:
+    """
+    Stream of a department's diffs. A subscriber that falls more than
+    ``max_pending`` diffs behind gets a fresh snapshot instead.
+    """
+
+    def __init__(self, department: "Department", max_pending: int):
+        self.department = department
+        self._queue: asyncio.Queue = asyncio.Queue(max_pending)
+        self._stale = False
+
+    def publish(self, diff: dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(diff)
+        except asyncio.QueueFull:
+            # Drop the backlog, the next read resynchronizes
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._stale = True
+            self._queue.put_nowait(None)
+
+    def close(self) -> None:
+        self.department.subscribers.discard(self)
+
+    def __aiter__(self) -> AsyncIterator[dict[str, Any]]:
+        return self
+
+    async def __anext__(self) -> dict[str, Any]:
+        diff = await self._queue.get()
+        if self._stale:
+            self._stale = False
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            return self.department.snapshot()
+        return diff
+
+
+def _timestamp(seconds: float) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat()
+
+
+class Department:
+    """
+    Waiting patients of one department.
+
+    A patient's rank is the number of patients ahead of them: everyone at a
+    more urgent ESI level plus earlier arrivals at their own level. The
+    estimated wait is ``rank * service_minutes / providers``, ESI 1 never
+    waits.
+
+    Diffs carry the changed entry and its rank. Clients holding a snapshot
+    apply them by shifting ranks: ``insert`` at rank r moves entries at rank
+    r and below down one, ``remove`` at rank r moves those below it up one,
+    and ``move`` is a remove at ``from_rank`` followed by an insert.
+    """
+
+    def __init__(self, name: str, service_minutes: float, providers: int):
+        self.name = name
+        self.service_minutes = service_minutes
+        self.providers = providers
+        self.version = 0
+        self.subscribers: set[Subscription] = set()
+        self._heap = IndexedHeap()
+        self._level_counts = dict.fromkeys(ESI_LEVELS, 0)
+        self._arrivals = {level: FenwickTree(64) for level in ESI_LEVELS}
+        self._next_sequence = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def get(self, entry_id: str) -> Optional[BoardEntry]:
+        return self._heap.get(entry_id)
+
+    def next_patient(self) -> Optional[BoardEntry]:
+        """The patient to be seen next, in O(1)."""
+        return self._heap.peek()
+
+    def rank(self, entry: BoardEntry) -> int:
+        """Number of patients ahead of ``entry``, in O(log n)."""
+        ahead = sum(
+            count
+            for level, count in self._level_counts.items()
+            if level < entry.esi_level
+        )
+        return ahead + self._arrivals[entry.esi_level].prefix_sum(entry.sequence)
+
+    def estimated_wait_minutes(self, entry: BoardEntry, rank: int) -> int:
+        if entry.esi_level == 1:
+            return 0
+        return round(rank * self.service_minutes / max(self.providers, 1))
+
+    def describe(self, entry: BoardEntry, rank: Optional[int] = None) -> dict[str, Any]:
+        """Entry as served to clients, with its rank and estimated wait."""
+        rank = self.rank(entry) if rank is None else rank
+        return {
+            "entry_id": entry.entry_id,
+            "esi_level": entry.esi_level,
+            "patient_id": entry.patient_id,
+            "name": entry.name,
+            "chief_complaint": entry.chief_complaint,
+            "arrived_at": _timestamp(entry.arrived_at),
+            "rank": rank,
+            "estimated_wait_minutes": self.estimated_wait_minutes(entry, rank),
+        }
+
+    def snapshot(self, limit: Optional[int] = None) -> dict[str, Any]:
+        """The whole board, or its first ``limit`` patients, in order."""
+        entries = sorted(self._heap, key=lambda entry: entry.sort_key)[:limit]
+        return {
+            "op": "snapshot",
+            "department": self.name,
+            "version": self.version,
+            "total": len(self._heap),
+            "service_minutes": self.service_minutes,
+            "providers": self.providers,
+            "entries": [
+                self.describe(entry, rank) for rank, entry in enumerate(entries)
+            ],
+        }
+
+    def admit(
+        self,
+        entry_id: str,
+        esi_level: int,
+        patient_id: Optional[str] = None,
+        name: Optional[str] = None,
+        chief_complaint: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """Add a patient; raises KeyError if ``entry_id`` is on the board."""
+        if entry_id in self._heap:
+            raise KeyError(entry_id)
+        entry = BoardEntry(
+            entry_id=entry_id,
+            esi_level=esi_level,
+            sequence=self._take_sequence(),
+            arrived_at=time.time(),
+            patient_id=patient_id,
+            name=name,
+            chief_complaint=chief_complaint,
+        )
+        self._heap.push(entry)
+        self._count(entry, 1)
+        described = self.describe(entry)
+        self._publish({"op": "insert", "entry": described})
+        return described
+
+    def reprioritize(self, entry_id: str, esi_level: int) -> Optional[dict[str, Any]]:
+        """Move a patient to another ESI level, keeping their arrival order."""
+        entry = self._heap.get(entry_id)
+        if entry is None:
+            return None
+        from_rank = self.rank(entry)
+        if entry.esi_level == esi_level:
+            return self.describe(entry, from_rank)
+
+        self._count(entry, -1)
+        entry = entry._replace(esi_level=esi_level)
+        self._heap.replace(entry)
+        self._count(entry, 1)
+        described = self.describe(entry)
+        self._publish({"op": "move", "from_rank": from_rank, "entry": described})
+        return described
+
+    def discharge(self, entry_id: str) -> Optional[dict[str, Any]]:
+        """Take a patient off the board."""
+        entry = self._heap.get(entry_id)
+        if entry is None:
+            return None
+        described = self.describe(entry)
+        self._heap.remove(entry_id)
+        self._count(entry, -1)
+        self._publish({"op": "remove", "entry_id": entry_id, "rank": described["rank"]})
+        return described
+
+    def subscribe(self, max_pending: int) -> Subscription:
+        subscription = Subscription(self, max_pending)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def _count(self, entry: BoardEntry, delta: int) -> None:
+        self._level_counts[entry.esi_level] += delta
+        self._arrivals[entry.esi_level].add(entry.sequence, delta)
+
+    def _take_sequence(self) -> int:
+        """Next arrival number, growing or compacting the arrival trees."""
+        size = self._arrivals[ESI_LEVELS[0]].size
+        if self._next_sequence >= size:
+            self._renumber(max(64, 2 * (len(self._heap) + 1)))
+        sequence = self._next_sequence
+        self._next_sequence += 1
+        return sequence
+
+    def _renumber(self, size: int) -> None:
+        """
+        Number waiting patients 0..n-1 in arrival order and rebuild the trees,
+        dropping the numbers of discharged patients. O(n log n), amortized
+        over the at least n/2 admissions since the previous renumbering.
+        """
+        self._arrivals = {level: FenwickTree(size) for level in ESI_LEVELS}
+        for sequence, entry in enumerate(
+            sorted(self._heap, key=lambda entry: entry.sequence)
+        ):
+            entry = entry._replace(sequence=sequence)
+            self._heap.replace(entry)
+            self._arrivals[entry.esi_level].add(sequence, 1)
+        self._next_sequence = len(self._heap)
+
+    def _publish(self, diff: dict[str, Any]) -> None:
+        self.version += 1
+        diff = {**diff, "department": self.name, "version": self.version}
+        for subscription in list(self.subscribers):
+            subscription.publish(diff)
+
+
+class TriageBoard:
+    """
+    Departments' waiting rooms: the ones given up front, and any other
+    created when its first patient is admitted. Reads never create one, so
+    unknown names can't grow the board or its per-department metrics.
+    """
+
+    def __init__(
+        self,
+        service_minutes: float,
+        providers: int,
+        max_pending: int,
+        departments: Iterable[str] = (),
+    ):
+        self.service_minutes = service_minutes
+        self.providers = providers
+        self.max_pending = max_pending
+        self.departments: dict[str, Department] = {}
+        for name in departments:
+            self.open(name)
+
+    def department(self, name: str) -> Optional[Department]:
+        """The named department, or None if it isn't open."""
+        return self.departments.get(name)
+
+    def open(self, name: str) -> Department:
+        """The named department, created if it isn't open yet."""
+        if (department := self.departments.get(name)) is None:
+            department = self.departments[name] = Department(
+                name, self.service_minutes, self.providers
+            )
+        return department
+
+    def stats(self) -> dict[str, Any]:
+        """Get the number of waiting patients and subscribers per department."""
+        return {
+            "waiting": {name: len(d) for name, d in self.departments.items()},
+            "subscribers": {
+                name: len(d.subscribers) for name, d in self.departments.items()
+            },
+        }
@@ -0,0 +1,65 @@
+"""
+Checkpoint savers persisting workflow state between graph steps.
+"""
+
+from functools import lru_cache
+from typing import Optional
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+
+from src.core import config
+
+from .memory import BoundedMemorySaver
+from .sqlite import SQLiteSaver
+
+DURABILITY_STEP = "step"
+DURABILITY_NODE = "node"
+DURABILITY_EXIT = "exit"
+DURABILITY_MODES = (DURABILITY_STEP, DURABILITY_NODE, DURABILITY_EXIT)
+
+
+def checkpoint_durability() -> str:
+    """Get ``config.checkpoint_durability``, raising ValueError if unsupported."""
+    if config.checkpoint_durability not in DURABILITY_MODES:
+        raise ValueError(
+            f"Unsupported checkpoint durability: {config.checkpoint_durability}"
+        )
+    return config.checkpoint_durability
+
+
+@lru_cache(maxsize=1)
+def get_checkpointer() -> Optional[BaseCheckpointSaver]:
+    """
+    Get the process-wide checkpointer selected by ``config.memory_type``.
+    Returns None when memory is disabled.
+    """
+    if not config.enable_memory:
+        return None
+
+    if config.memory_type == "in_memory":
+        return BoundedMemorySaver(
+            ttl_seconds=config.memory_ttl_seconds,
+            max_threads=config.memory_max_threads,
+            max_bytes=config.memory_max_bytes,
+        )
+
+    if config.memory_type == "sqlite":
+        return SQLiteSaver(
+            config.sqlite_checkpoint_path,
+            batch_size=config.checkpoint_write_batch_size,
+            flush_interval_ms=config.checkpoint_flush_interval_ms,
+        )
+
+    raise ValueError(f"Unsupported memory type: {config.memory_type}")
+
+
+__all__ = [
+    "DURABILITY_EXIT",
+    "DURABILITY_MODES",
+    "DURABILITY_NODE",
+    "DURABILITY_STEP",
+    "BoundedMemorySaver",
+    "SQLiteSaver",
+    "checkpoint_durability",
+    "get_checkpointer",
+]
@@ -0,0 +1,219 @@
+"""
+In-memory checkpoint saver with a bounded footprint.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterator, Sequence
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+from src.core.metrics import CHECKPOINT_WRITE_BYTES
+
+
+class _ThreadUsage:
+    """Bookkeeping for the entries a thread holds in memory."""
+
+    __slots__ = ("last_access", "size", "blob_keys", "write_keys")
+
+    def __init__(self):
+        self.last_access = time.monotonic()
+        self.size = 0
+        self.blob_keys: set[tuple] = set()
+        self.write_keys: set[tuple] = set()
+
+
+class BoundedMemorySaver(InMemorySaver):
+    """
+    In-memory checkpoint saver that evicts whole threads.
+
+    Threads idle for longer than ``ttl_seconds`` expire, and the least recently
+    used threads are evicted once more than ``max_threads`` threads or
+    ``max_bytes`` of serialized state are resident. A limit of 0 disables it.
+    The thread being written is never evicted to make room for itself.
+    """
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: float = 3600,
+        max_threads: int = 10_000,
+        max_bytes: int = 256 * 1024 * 1024,
+        serde: Optional[SerializerProtocol] = None,
+    ):
+        super().__init__(serde=serde)
+        self.ttl_seconds = ttl_seconds
+        self.max_threads = max_threads
+        self.max_bytes = max_bytes
+        self.resident_bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._threads: OrderedDict[str, _ThreadUsage] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def stats(self) -> dict[str, int]:
+        """Get eviction counters and the resident size."""
+        with self._lock:
+            return {
+                "threads": len(self._threads),
+                "resident_bytes": self.resident_bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def _is_expired(self, usage: _ThreadUsage, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - usage.last_access > self.ttl_seconds
+
+    def _touch(self, thread_id: str) -> Optional[_ThreadUsage]:
+        """Mark a thread as recently used, dropping it if it has expired."""
+        usage = self._threads.get(thread_id)
+        if usage is None:
+            return None
+
+        now = time.monotonic()
+        if self._is_expired(usage, now):
+            self._drop(thread_id)
+            self.expirations += 1
+            return None
+
+        usage.last_access = now
+        self._threads.move_to_end(thread_id)
+        return usage
+
+    def _usage_for_write(self, thread_id: str) -> _ThreadUsage:
+        usage = self._touch(thread_id)
+        if usage is None:
+            usage = self._threads[thread_id] = _ThreadUsage()
+        return usage
+
+    def _drop(self, thread_id: str) -> None:
+        """Remove all entries of a thread without scanning other threads."""
+        usage = self._threads.pop(thread_id, None)
+        if usage is None:
+            return
+
+        self.storage.pop(thread_id, None)
+        for key in usage.write_keys:
+            self.writes.pop(key, None)
+        for key in usage.blob_keys:
+            self.blobs.pop(key, None)
+        self.resident_bytes -= usage.size
+
+    def _enforce_budget(self, protected: str) -> None:
+        """Expire idle threads, then evict LRU threads until within budget."""
+        now = time.monotonic()
+        while self._threads:
+            thread_id, usage = next(iter(self._threads.items()))
+            if thread_id == protected or not self._is_expired(usage, now):
+                break
+            self._drop(thread_id)
+            self.expirations += 1
+
+        while len(self._threads) > 1 and (
+            (self.max_threads > 0 and len(self._threads) > self.max_threads)
+            or (self.max_bytes > 0 and self.resident_bytes > self.max_bytes)
+        ):
+            thread_id = next(iter(self._threads))
+            if thread_id == protected:
+                self._threads.move_to_end(thread_id)
+                thread_id = next(iter(self._threads))
+            self._drop(thread_id)
+            self.evictions += 1
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Get a checkpoint tuple, refreshing the thread's recency."""
+        with self._lock:
+            if self._touch(config["configurable"]["thread_id"]) is None:
+                return None
+            return super().get_tuple(config)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints of live threads."""
+        with self._lock:
+            if config and self._touch(config["configurable"]["thread_id"]) is None:
+                return iter(())
+            items = super().list(config, filter=filter, before=before, limit=limit)
+            return iter(list(items))
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Save a checkpoint and account for its size."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+
+        with self._lock:
+            usage = self._usage_for_write(thread_id)
+            next_config = super().put(config, checkpoint, metadata, new_versions)
+
+            saved, saved_metadata, _ = self.storage[thread_id][checkpoint_ns][
+                checkpoint["id"]
+            ]
+            added = len(saved[1]) + len(saved_metadata[1])
+            usage.write_keys.add((thread_id, checkpoint_ns, checkpoint["id"]))
+            for channel, version in new_versions.items():
+                key = (thread_id, checkpoint_ns, channel, version)
+                if key not in usage.blob_keys:
+                    usage.blob_keys.add(key)
+                    added += len(self.blobs[key][1])
+
+            usage.size += added
+            self.resident_bytes += added
+            self._enforce_budget(protected=thread_id)
+
+        CHECKPOINT_WRITE_BYTES.observe(added, saver="memory", kind="checkpoint")
+        return next_config
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Save intermediate writes and account for their size."""
+        thread_id = config["configurable"]["thread_id"]
+        key = (
+            thread_id,
+            config["configurable"].get("checkpoint_ns", ""),
+            config["configurable"]["checkpoint_id"],
+        )
+
+        with self._lock:
+            usage = self._usage_for_write(thread_id)
+            before = sum(len(w[2][1]) for w in self.writes.get(key, {}).values())
+            super().put_writes(config, writes, task_id, task_path)
+            after = sum(len(w[2][1]) for w in self.writes.get(key, {}).values())
+
+            usage.write_keys.add(key)
+            usage.size += after - before
+            self.resident_bytes += after - before
+            self._enforce_budget(protected=thread_id)
+
+        CHECKPOINT_WRITE_BYTES.observe(after - before, saver="memory", kind="writes")
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints and writes of a thread."""
+        with self._lock:
+            self._drop(thread_id)
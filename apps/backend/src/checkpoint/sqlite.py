@@ -0,0 +1,556 @@
+"""
+SQLite-backed checkpoint saver for durable, cross-process workflow state.
+"""
+
+import asyncio
+import queue
+import random
+import sqlite3
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator, Sequence
+from concurrent.futures import Future
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.serde.types import TASKS, ChannelProtocol
+
+from src.core.metrics import CHECKPOINT_WRITE_BYTES, CHECKPOINT_WRITE_SECONDS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT,
+    blob BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+) WITHOUT ROWID;
+"""
+
+_SELECT_CHECKPOINT = """
+SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,
+       type, checkpoint, metadata_type, metadata
+FROM checkpoints
+"""
+
+
+class SQLiteSaver(BaseCheckpointSaver[str]):
+    """
+    Checkpoint saver storing checkpoints in a WAL-mode SQLite database.
+
+    Channel values are stored once per channel version in ``blobs``, so a
+    checkpoint only writes the channels that changed since the last one and
+    the conversation is not copied into every step's checkpoint.
+    Writes are handed to a single writer thread which commits everything queued
+    within ``flush_interval_ms`` (up to ``batch_size`` operations) in one
+    transaction, so concurrent workflows share commits instead of each paying
+    for its own fsync. Callers still wait for their commit, so reads always
+    observe completed writes. Reads use per-thread connections and resolve the
+    latest checkpoint of a thread through the primary key index.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        batch_size: int = 64,
+        flush_interval_ms: int = 5,
+        serde: Optional[SerializerProtocol] = None,
+    ):
+        super().__init__(serde=serde)
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval_ms / 1000
+        self._local = threading.local()
+        self._readers: list[sqlite3.Connection] = []
+        self._queue: queue.Queue = queue.Queue()
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.commit()
+        self._writer_conn = conn
+
+        self._writer = threading.Thread(
+            target=self._write_loop, name="sqlite-checkpoint-writer", daemon=True
+        )
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection configured for WAL-mode concurrent access."""
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    @property
+    def _reader(self) -> sqlite3.Connection:
+        """Connection owned by the calling thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            self._readers.append(conn)
+        return conn
+
+    def _write_loop(self) -> None:
+        """Drain the write queue, committing queued operations in batches."""
+        while True:
+            op = self._queue.get()
+            if op is None:
+                return
+
+            batch = [op]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    op = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    break
+                if op is None:
+                    stop = True
+                    break
+                batch.append(op)
+
+            try:
+                with self._writer_conn:
+                    for statements, _ in batch:
+                        for sql, params in statements:
+                            self._writer_conn.executemany(sql, params)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for _, future in batch:
+                    future.set_result(None)
+
+            if stop:
+                return
+
+    def _submit(self, *statements: tuple[str, Sequence[tuple]]) -> Future:
+        """Queue statements to be committed together in the next batch."""
+        future: Future = Future()
+        self._queue.put((statements, future))
+        return future
+
+    def close(self) -> None:
+        """Flush pending writes and stop the writer thread."""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        self._writer_conn.close()
+        for conn in self._readers:
+            conn.close()
+
+    def _load_tuple(self, row: tuple) -> CheckpointTuple:
+        """Build a checkpoint tuple from a ``checkpoints`` row."""
+        (
+            thread_id,
+            checkpoint_ns,
+            checkpoint_id,
+            parent_checkpoint_id,
+            type_,
+            checkpoint,
+            metadata_type,
+            metadata,
+        ) = row
+        conn = self._reader
+
+        writes = conn.execute(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+
+        sends = []
+        if parent_checkpoint_id:
+            sends = conn.execute(
+                "SELECT type, value FROM writes "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+                "AND channel = ? ORDER BY task_path, task_id, idx",
+                (thread_id, checkpoint_ns, parent_checkpoint_id, TASKS),
+            ).fetchall()
+
+        checkpoint = self.serde.loads_typed((type_, checkpoint))
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={
+                **checkpoint,
+                # Checkpoints written before blobs carry their own values
+                "channel_values": {
+                    **checkpoint.get("channel_values", {}),
+                    **self._load_blobs(
+                        thread_id, checkpoint_ns, checkpoint["channel_versions"]
+                    ),
+                },
+                "pending_sends": [self.serde.loads_typed(send) for send in sends],
+            },
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((value_type, value)))
+                for task_id, channel, value_type, value in writes
+            ],
+        )
+
+    def _load_blobs(
+        self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions
+    ) -> dict[str, Any]:
+        """Get the channel values at the given channel versions."""
+        if not versions:
+            return {}
+        keys = [(channel, str(version)) for channel, version in versions.items()]
+        rows = self._reader.execute(
+            "SELECT channel, type, blob FROM blobs "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND (channel, version) IN "
+            f"(VALUES {', '.join(['(?, ?)'] * len(keys))})",
+            (thread_id, checkpoint_ns, *(part for key in keys for part in key)),
+        ).fetchall()
+        return {
+            channel: self.serde.loads_typed((type_, blob))
+            for channel, type_, blob in rows
+            if type_ != "empty"
+        }
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Get the requested checkpoint, or the latest one for the thread."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+
+        if checkpoint_id := get_checkpoint_id(config):
+            row = self._reader.execute(
+                _SELECT_CHECKPOINT
+                + "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchone()
+        else:
+            row = self._reader.execute(
+                _SELECT_CHECKPOINT + "WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT 1",
+                (thread_id, checkpoint_ns),
+            ).fetchone()
+
+        return self._load_tuple(row) if row else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints, newest first, matching the given criteria."""
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (
+                checkpoint_ns := config["configurable"].get("checkpoint_ns")
+            ) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_checkpoint_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_checkpoint_id)
+
+        query = _SELECT_CHECKPOINT
+        if clauses:
+            query += "WHERE " + " AND ".join(clauses) + " "
+        query += "ORDER BY checkpoint_id DESC"
+
+        for row in self._reader.execute(query, params).fetchall():
+            if limit is not None and limit <= 0:
+                break
+
+            checkpoint_tuple = self._load_tuple(row)
+            if filter and not all(
+                value == checkpoint_tuple.metadata.get(key)
+                for key, value in filter.items()
+            ):
+                continue
+
+            if limit is not None:
+                limit -= 1
+            yield checkpoint_tuple
+
+    def _put_params(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> tuple[RunnableConfig, tuple, Sequence[tuple]]:
+        """
+        Serialize a checkpoint into a ``checkpoints`` row and the channels
+        changed since its parent into ``blobs`` rows.
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        c = checkpoint.copy()
+        c.pop("pending_sends", None)  # type: ignore[misc]
+        values: dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+        type_, serialized = self.serde.dumps_typed(c)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(
+            get_checkpoint_metadata(config, metadata)
+        )
+        blob_rows = [
+            (
+                thread_id,
+                checkpoint_ns,
+                channel,
+                str(version),
+                *(
+                    self.serde.dumps_typed(values[channel])
+                    if channel in values
+                    else ("empty", b"")
+                ),
+            )
+            for channel, version in new_versions.items()
+        ]
+        CHECKPOINT_WRITE_BYTES.observe(
+            len(serialized)
+            + len(serialized_metadata)
+            + sum(len(row[5]) for row in blob_rows),
+            saver="sqlite",
+            kind="checkpoint",
+        )
+
+        next_config = {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+        row = (
+            thread_id,
+            checkpoint_ns,
+            checkpoint["id"],
+            config["configurable"].get("checkpoint_id"),
+            type_,
+            serialized,
+            metadata_type,
+            serialized_metadata,
+        )
+        return next_config, row, blob_rows
+
+    _INSERT_CHECKPOINT = (
+        "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, "
+        "checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, "
+        "metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+    )
+    _INSERT_BLOBS = (
+        "INSERT OR IGNORE INTO blobs (thread_id, checkpoint_ns, channel, version, "
+        "type, blob) VALUES (?, ?, ?, ?, ?, ?)"
+    )
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Save a checkpoint, blocking until it is committed."""
+        start = time.perf_counter()
+        next_config, row, blob_rows = self._put_params(
+            config, checkpoint, metadata, new_versions
+        )
+        self._submit(
+            (self._INSERT_BLOBS, blob_rows), (self._INSERT_CHECKPOINT, [row])
+        ).result()
+        CHECKPOINT_WRITE_SECONDS.observe(
+            time.perf_counter() - start, saver="sqlite", kind="checkpoint"
+        )
+        return next_config
+
+    def _writes_params(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str,
+    ) -> tuple[str, Sequence[tuple]]:
+        """Serialize pending writes into ``writes`` rows."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        # Special writes (errors, interrupts) replace earlier ones; regular
+        # writes are idempotent per task and index
+        verb = (
+            "INSERT OR REPLACE"
+            if all(channel in WRITES_IDX_MAP for channel, _ in writes)
+            else "INSERT OR IGNORE"
+        )
+        sql = (
+            f"{verb} INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, "
+            "idx, channel, type, value, task_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+        )
+        rows = [
+            (
+                thread_id,
+                checkpoint_ns,
+                checkpoint_id,
+                task_id,
+                WRITES_IDX_MAP.get(channel, idx),
+                channel,
+                *self.serde.dumps_typed(value),
+                task_path,
+            )
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        CHECKPOINT_WRITE_BYTES.observe(
+            sum(len(row[7]) for row in rows), saver="sqlite", kind="writes"
+        )
+        return sql, rows
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Save intermediate writes, blocking until they are committed."""
+        start = time.perf_counter()
+        sql, rows = self._writes_params(config, writes, task_id, task_path)
+        self._submit((sql, rows)).result()
+        CHECKPOINT_WRITE_SECONDS.observe(
+            time.perf_counter() - start, saver="sqlite", kind="writes"
+        )
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints and writes of a thread."""
+        self._submit(
+            *(
+                (f"DELETE FROM {table} WHERE thread_id = ?", [(thread_id,)])
+                for table in ("checkpoints", "writes", "blobs")
+            )
+        ).result()
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Asynchronous version of get_tuple."""
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """Asynchronous version of list."""
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Asynchronous version of put, sharing a batch commit with other writers."""
+        start = time.perf_counter()
+        next_config, row, blob_rows = self._put_params(
+            config, checkpoint, metadata, new_versions
+        )
+        await asyncio.wrap_future(
+            self._submit(
+                (self._INSERT_BLOBS, blob_rows), (self._INSERT_CHECKPOINT, [row])
+            )
+        )
+        CHECKPOINT_WRITE_SECONDS.observe(
+            time.perf_counter() - start, saver="sqlite", kind="checkpoint"
+        )
+        return next_config
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Asynchronous version of put_writes."""
+        start = time.perf_counter()
+        sql, rows = self._writes_params(config, writes, task_id, task_path)
+        await asyncio.wrap_future(self._submit((sql, rows)))
+        CHECKPOINT_WRITE_SECONDS.observe(
+            time.perf_counter() - start, saver="sqlite", kind="writes"
+        )
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Asynchronous version of delete_thread."""
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: ChannelProtocol) -> str:
+        """Generate the next version id for a channel."""
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
@@ -0,0 +1,191 @@
+"""
+Two-tier result cache: an in-process LRU in front of an optional SQLite store.
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Least recently used cache with a per-entry time to live."""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a live entry, refreshing its recency."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return default
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Store an entry, evicting the least recently used beyond max size."""
+        ttl_seconds = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class SQLiteCache:
+    """
+    Persistent string cache in SQLite.
+    Entries are scoped to a namespace; opening the cache with a new namespace
+    drops entries written under any other one.
+    """
+
+    def __init__(self, path: str, namespace: str, ttl_seconds: float):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, namespace "
+                "TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "DELETE FROM cache WHERE namespace != ? OR expires_at < ?",
+                (namespace, time.time()),
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND namespace = ? "
+                "AND expires_at >= ?",
+                (key, self.namespace, time.time()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                (key, self.namespace, value, time.time() + self.ttl_seconds),
+            )
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache")
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class TieredCache(Generic[T]):
+    """
+    Cache checking an in-process LRU first and an optional disk tier second.
+    Concurrent misses for the same key share a single computation.
+    """
+
+    def __init__(
+        self,
+        memory: LRUCache,
+        disk: Optional[SQLiteCache] = None,
+        *,
+        dumps: Callable[[T], str] = str,
+        loads: Callable[[str], T] = str,
+    ):
+        self.memory = memory
+        self.disk = disk
+        self.dumps = dumps
+        self.loads = loads
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def stats(self) -> dict[str, Any]:
+        """Get hit/miss counters and the in-memory size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self.memory),
+        }
+
+    async def get(self, key: str) -> Optional[T]:
+        """Look up a key in both tiers, counting the hit or miss."""
+        value = self.memory.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        if self.disk is not None:
+            serialized = await asyncio.to_thread(self.disk.get, key)
+            if serialized is not None:
+                value = self.loads(serialized)
+                self.memory.set(key, value)
+                self.hits += 1
+                self.disk_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: T) -> None:
+        """Store a value in both tiers."""
+        self.memory.set(key, value)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, self.dumps(value))
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[T]]) -> T:
+        """Get a cached value, computing and storing it on a miss."""
+        if (inflight := self._inflight.get(key)) is not None:
+            self.hits += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self.get(key)
+            if value is None:
+                value = await compute()
+                await self.set(key, value)
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters retrieve the error themselves; don't warn if there are none
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+            if not future.done():
+                future.cancel()
+
+    def clear(self) -> None:
+        """Drop all entries from both tiers."""
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
@@ -3,7 +3,7 @@ Configuration management for the triage workflow system.
 """
 
 import os
-from typing import Any
+from typing import Any, Optional
 
 from pydantic_settings import BaseSettings
 
@@ -21,9 +21,113 @@ class WorkflowConfig(BaseSettings):
     temperature: float = 1.0
     max_tokens: int = 1000
 
+    # Model pricing in USD, for cost metrics
+    llm_input_cost_per_million_tokens: float = 0.15
+    llm_output_cost_per_million_tokens: float = 0.60
+
+    # Upstream call resilience, on top of max_retries and timeout_seconds
+    llm_retry_base_delay_ms: int = 200
+    llm_retry_max_delay_ms: int = 2000
+    # A single attempt; only this timeout, not the caller's, counts against
+    # the circuit
+    llm_attempt_timeout_seconds: float = 20
+    llm_hedge_enabled: bool = False
+    llm_hedge_percentile: float = 95
+    llm_hedge_min_samples: int = 20
+    circuit_breaker_failure_threshold: int = 5
+    circuit_breaker_recovery_seconds: int = 30
+
+    # Model call scheduling, a limit of 0 disables it
+    llm_max_concurrency: int = 16
+    llm_tokens_per_minute: int = 0
+    llm_max_queue_size: int = 1000
+
+    # Extraction cache configurations
+    extraction_cache_enabled: bool = True
+    extraction_cache_size: int = 1024
+    extraction_cache_ttl_seconds: int = 24 * 3600
+    extraction_cache_path: Optional[str] = None
+
+    # Transcripts longer than the threshold are extracted in chunks and merged,
+    # 0 always uses a single call
+    long_transcript_threshold_chars: int = 12_000
+    transcript_chunk_chars: int = 4_000
+
     # Workflow configurations
     enable_memory: bool = True
-    memory_type: str = "in_memory"
+    memory_type: str = "in_memory"  # "in_memory" or "sqlite"
+    memory_ttl_seconds: int = 3600
+    memory_max_threads: int = 10_000
+    memory_max_bytes: int = 256 * 1024 * 1024
+    sqlite_checkpoint_path: str = "triageflow_checkpoints.db"
+    checkpoint_write_batch_size: int = 64
+    checkpoint_flush_interval_ms: int = 5
+    # Run routing nodes in the step of the node before them, see graphs.optimizer
+    fold_routing_nodes: bool = True
+    # When state is checkpointed: "step" after every step of the workflow and
+    # the intake subgraph, "node" after every workflow node, "exit" once a
+    # run finishes
+    checkpoint_durability: str = "node"
+
+    # Patient store configurations
+    patient_store_type: str = "in_memory"  # "in_memory" or "sqlite"
+    patient_db_path: str = "triageflow_patients.db"
+    patient_cache_enabled: bool = True
+    patient_cache_size: int = 4096
+    patient_cache_ttl_seconds: int = 300
+    patient_cache_negative_ttl_seconds: int = 60
+
+    # Red flag configurations, None uses the built-in lexicon and cues
+    red_flags_enabled: bool = True
+    red_flag_lexicon: Optional[dict[str, list[str]]] = None
+    red_flag_negation_cues: Optional[list[str]] = None
+    red_flag_negation_window: int = 5
+
+    # Batch configurations
+    batch_max_size: int = 100
+    batch_max_concurrency: int = 8
+    intake_batch_window_ms: int = 10
+    intake_batch_max_size: int = 16
+
+    # Background job configurations
+    job_workers: int = 8
+    job_max_queue_size: int = 1000
+    job_result_ttl_seconds: int = 600
+    job_max_wait_seconds: int = 30
+
+    # Triage board configurations, the departments listed are open from the
+    # start, others open on their first admitted patient
+    board_departments: list[str] = ["ed"]
+    board_service_minutes: float = 15
+    board_providers: int = 4
+    board_max_pending_diffs: int = 256
+
+    # Degradation configurations: under latency or error pressure intake moves
+    # to the degraded model, then to rule-based extraction. An empty degraded
+    # model name skips straight to the rules.
+    degradation_enabled: bool = True
+    degraded_model_name: str = "gemini-2.0-flash-lite"
+    degradation_latency_slo_ms: int = 10_000
+    degradation_max_error_rate: float = 0.5
+    degradation_window: int = 50
+    degradation_min_samples: int = 10
+    degradation_recovery_seconds: int = 60
+
+    # Tracing configurations: spans of requests, graph nodes and model calls
+    # are appended to trace_path as OTLP JSON lines, empty disables tracing.
+    # Traced requests are profiled at profile_sample_rate, or when they send
+    # an "X-Profile: true" header.
+    trace_path: str = ""
+    trace_sample_rate: float = 1.0
+    profile_sample_rate: float = 0.0
+    profile_interval_ms: int = 5
+
+    # Triage agent configurations
+    triage_enabled: bool = True
+    # Start triage on the first streamed intake fields rather than after
+    # intake. Streamed extractions skip batching and hedging, so this trades
+    # throughput for the latency of one model call.
+    speculative_triage_enabled: bool = False
 
     # Agent-specific configurations
     intake_agent_config: dict[str, Any] = {
@@ -0,0 +1,209 @@
+"""
+Latency-driven degradation of model calls to cheaper tiers.
+
+Intake extraction runs on one of three tiers: the configured model, a faster
+and cheaper model, and a local rule-based extractor. The controller watches
+the rolling latency and error rate of each model tier's calls and moves
+traffic down a tier when the current one misses its objective, then back up
+once it has had time to recover.
+"""
+
+import logging
+import time
+from collections import deque
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Optional
+
+from .config import config
+from .models import ModelSettings, default_settings
+from .resilience import is_upstream_failure
+
+logger = logging.getLogger(__name__)
+
+TIER_PRIMARY = "primary"
+TIER_FAST = "fast"
+TIER_HEURISTIC = "heuristic"
+
+# Tier of the model calls made in the current context
+_tier: ContextVar[str] = ContextVar("tier", default=TIER_PRIMARY)
+
+
+@contextmanager
+def tier_scope(tier: str) -> Iterator[None]:
+    """Make the model calls in the enclosed code on ``tier``."""
+    token = _tier.set(tier)
+    try:
+        yield
+    finally:
+        _tier.reset(token)
+
+
+def current_tier() -> str:
+    return _tier.get()
+
+
+def tier_settings(tier: str) -> ModelSettings:
+    """Model settings of a model tier."""
+    if tier == TIER_FAST:
+        return default_settings(model_name=config.degraded_model_name)
+    return default_settings()
+
+
+class TierHealth:
+    """Rolling window of a tier's call latencies and outcomes."""
+
+    def __init__(self, window: int):
+        self._calls: deque[tuple[float, bool]] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def record(self, seconds: float, ok: bool) -> None:
+        self._calls.append((seconds, ok))
+
+    def clear(self) -> None:
+        self._calls.clear()
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Get the latency at the given percentile, or None without samples."""
+        if not self._calls:
+            return None
+        ordered = sorted(seconds for seconds, _ in self._calls)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+    def error_rate(self) -> float:
+        if not self._calls:
+            return 0.0
+        return sum(not ok for _, ok in self._calls) / len(self._calls)
+
+
+class DegradationController:
+    """
+    Picks the tier for the next extraction.
+
+    A model tier degrades to the next one when, over at least
+    ``min_samples`` of its last ``window`` calls, its p95 latency exceeds
+    ``latency_slo_seconds`` or its error rate exceeds ``max_error_rate``.
+    After ``recovery_seconds`` on a degraded tier the tier above is tried
+    again with a fresh window, like a half-open circuit, so traffic returns
+    to the configured model step by step once its latency recovers.
+    """
+
+    def __init__(
+        self,
+        tiers: Sequence[str],
+        *,
+        latency_slo_seconds: float,
+        max_error_rate: float,
+        window: int = 50,
+        min_samples: int = 10,
+        recovery_seconds: float = 60,
+    ):
+        self.tiers = tuple(tiers)
+        self.latency_slo_seconds = latency_slo_seconds
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.recovery_seconds = recovery_seconds
+        self.health = {tier: TierHealth(window) for tier in self.tiers}
+        self.level = 0
+        self.changed_at = time.monotonic()
+        self.degradations = 0
+        self.recoveries = 0
+
+    def tier(self) -> str:
+        """The tier to extract on now, trying the tier above when it is due."""
+        if (
+            self.level > 0
+            and time.monotonic() - self.changed_at >= self.recovery_seconds
+        ):
+            self.recoveries += 1
+            self._move(self.level - 1)
+        return self.tiers[self.level]
+
+    def record(self, tier: str, seconds: float, ok: bool) -> None:
+        """Record a model call, degrading if the current tier is unhealthy."""
+        health = self.health.get(tier)
+        if health is None:
+            return
+        health.record(seconds, ok)
+        if (
+            tier == self.tiers[self.level]
+            and self.level < len(self.tiers) - 1
+            and self._unhealthy(health)
+        ):
+            self.degradations += 1
+            self._move(self.level + 1)
+
+    @contextmanager
+    def observe(self, tier: str) -> Iterator[None]:
+        """
+        Record the latency and outcome of the enclosed model call. Calls that
+        fail without the upstream being at fault, e.g. on the caller's
+        deadline or an open circuit, are not recorded.
+        """
+        start = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            if is_upstream_failure(e):
+                self.record(tier, time.monotonic() - start, ok=False)
+            raise
+        self.record(tier, time.monotonic() - start, ok=True)
+
+    def _unhealthy(self, health: TierHealth) -> bool:
+        if len(health) < self.min_samples:
+            return False
+        return (
+            health.percentile(95) > self.latency_slo_seconds
+            or health.error_rate() > self.max_error_rate
+        )
+
+    def _move(self, level: int) -> None:
+        previous = self.tiers[self.level]
+        self.level = level
+        self.changed_at = time.monotonic()
+        # Judge the new tier on its calls from now on
+        self.health[self.tiers[level]].clear()
+        logger.warning(
+            "Intake moved from the %s to the %s tier", previous, self.tiers[level]
+        )
+
+    def stats(self) -> dict[str, Any]:
+        """Get the current tier and each tier's p95 latency and error rate."""
+        p95 = {tier: health.percentile(95) for tier, health in self.health.items()}
+        return {
+            "tier": self.tiers[self.level],
+            "level": self.level,
+            "degradations": self.degradations,
+            "recoveries": self.recoveries,
+            "p95_ms": {
+                tier: round(seconds * 1000, 1)
+                for tier, seconds in p95.items()
+                if seconds is not None
+            },
+            "error_rate": {
+                tier: health.error_rate() for tier, health in self.health.items()
+            },
+        }
+
+
+@lru_cache(maxsize=1)
+def get_degradation_controller() -> DegradationController:
+    """
+    Get the shared controller, skipping the fast tier when no degraded model
+    is configured.
+    """
+    tiers = [TIER_PRIMARY, TIER_FAST, TIER_HEURISTIC]
+    if not config.degraded_model_name:
+        tiers.remove(TIER_FAST)
+    return DegradationController(
+        tiers,
+        latency_slo_seconds=config.degradation_latency_slo_ms / 1000,
+        max_error_rate=config.degradation_max_error_rate,
+        window=config.degradation_window,
+        min_samples=config.degradation_min_samples,
+        recovery_seconds=config.degradation_recovery_seconds,
+    )
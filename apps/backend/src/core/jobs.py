@@ -0,0 +1,240 @@
+"""
+In-process job queue running workflows in the background.
+
+Requests submit a job and return at once; a fixed pool of workers runs jobs
+by priority, and callers poll, or long-poll, for the outcome.
+"""
+
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable
+from contextlib import suppress
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+from .config import config
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATUSES = (JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED)
+
+
+class QueueFullError(RuntimeError):
+    """The job queue is at capacity."""
+
+
+class DuplicateJobError(RuntimeError):
+    """A job with the same id is still queued or running."""
+
+
+def _timestamp(seconds: Optional[float]) -> Optional[str]:
+    if seconds is None:
+        return None
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat()
+
+
+class Job:
+    """A unit of background work and its outcome."""
+
+    def __init__(self, job_id: str, run: Callable[[], Awaitable[Any]], priority: int):
+        self.id = job_id
+        self.run = run
+        self.priority = priority
+        self.status = JOB_QUEUED
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.done = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "thread_id": self.id,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": _timestamp(self.created_at),
+            "started_at": _timestamp(self.started_at),
+            "finished_at": _timestamp(self.finished_at),
+        }
+
+
+class JobQueue:
+    """
+    Bounded priority queue of jobs served by ``workers`` concurrent workers.
+
+    At most ``max_size`` jobs wait at a time. Finished jobs are kept for
+    ``result_ttl_seconds`` so their outcome can be fetched, then forgotten.
+    Lower priorities are served first, like the model call scheduler.
+    """
+
+    def __init__(self, workers: int, max_size: int, result_ttl_seconds: float):
+        self.workers = workers
+        self.max_size = max_size
+        self.result_ttl_seconds = result_ttl_seconds
+        self.jobs: dict[str, Job] = {}
+        self.counts = dict.fromkeys(FINISHED_STATUSES, 0)
+        self.rejected = 0
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._queued = 0
+        self._running = 0
+        self._sequence = itertools.count()
+        self._workers: list[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Finished job ids in order of expiry
+        self._expiry: OrderedDict[str, float] = OrderedDict()
+
+    def start(self) -> None:
+        """Start the workers on the running event loop, if not already there."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._queue = asyncio.PriorityQueue()
+        # Jobs left waiting on a previous loop are carried over
+        for job in self.jobs.values():
+            if job.status == JOB_QUEUED:
+                self._queue.put_nowait((job.priority, next(self._sequence), job))
+        self._workers = [loop.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel the workers, and with them any running jobs."""
+        workers, self._workers, self._loop = self._workers, [], None
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    def submit(
+        self, job_id: str, run: Callable[[], Awaitable[Any]], priority: int
+    ) -> Job:
+        """
+        Queue ``run`` as job ``job_id``.
+        Raises QueueFullError at capacity and DuplicateJobError while a job
+        with the same id is unfinished.
+        """
+        self._expire()
+        self.start()
+        if (existing := self.jobs.get(job_id)) and not existing.finished:
+            raise DuplicateJobError(f"Job {job_id} is already {existing.status}")
+        if self._queued >= self.max_size:
+            self.rejected += 1
+            raise QueueFullError(f"Job queue is full ({self.max_size} jobs waiting)")
+
+        job = self.jobs[job_id] = Job(job_id, run, priority)
+        self._expiry.pop(job_id, None)
+        self._queued += 1
+        self._queue.put_nowait((priority, next(self._sequence), job))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job unless unknown or expired."""
+        self._expire()
+        return self.jobs.get(job_id)
+
+    async def wait(self, job: Job, timeout: float) -> Job:
+        """Wait up to ``timeout`` seconds for the job to finish."""
+        with suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(job.done.wait(), timeout)
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a queued or running job.
+        Finished jobs are returned unchanged, unknown ones as None.
+        """
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+
+        if job.status == JOB_QUEUED:
+            # Left in the heap, workers skip it when it comes up
+            self._queued -= 1
+            self._finish(job, JOB_CANCELLED)
+        elif job._task is not None:
+            job._task.cancel()
+        return job
+
+    def stats(self) -> dict[str, Any]:
+        """Get queue depth, running jobs and outcome counts."""
+        self._expire()
+        return {
+            "workers": self.workers,
+            "queue_depth": self._queued,
+            "running": self._running,
+            "retained": len(self.jobs),
+            "rejected": self.rejected,
+            **self.counts,
+        }
+
+    def _finish(
+        self, job: Job, status: str, result: Any = None, error: Optional[str] = None
+    ) -> None:
+        job.status, job.result, job.error = status, result, error
+        job.finished_at = time.time()
+        job.run = None
+        job._task = None
+        job.done.set()
+        self.counts[status] += 1
+        self._expiry[job.id] = time.monotonic() + self.result_ttl_seconds
+
+    def _expire(self) -> None:
+        """Forget finished jobs whose results have expired."""
+        now = time.monotonic()
+        while self._expiry:
+            job_id, expires_at = next(iter(self._expiry.items()))
+            if expires_at > now:
+                break
+            del self._expiry[job_id]
+            self.jobs.pop(job_id, None)
+
+    async def _work(self) -> None:
+        queue = self._queue
+        while True:
+            _, _, job = await queue.get()
+            if job.status != JOB_QUEUED:
+                continue
+
+            self._queued -= 1
+            self._running += 1
+            job.status = JOB_RUNNING
+            job.started_at = time.time()
+            task = job._task = asyncio.ensure_future(job.run())
+            try:
+                # Unlike awaiting the task, cancelling the worker leaves it be
+                await asyncio.wait({task})
+            except asyncio.CancelledError:
+                task.cancel()
+                self._finish(job, JOB_CANCELLED, error="Job queue stopped")
+                raise
+            finally:
+                self._running -= 1
+
+            if task.cancelled():
+                self._finish(job, JOB_CANCELLED)
+            elif (error := task.exception()) is not None:
+                self._finish(job, JOB_FAILED, error=str(error))
+            else:
+                self._finish(job, JOB_COMPLETED, result=task.result())
+
+
+@lru_cache(maxsize=1)
+def get_job_queue() -> JobQueue:
+    """Get the process-wide workflow job queue."""
+    return JobQueue(
+        workers=config.job_workers,
+        max_size=config.job_max_queue_size,
+        result_ttl_seconds=config.job_result_ttl_seconds,
+    )
@@ -0,0 +1,419 @@
+"""
+Process-wide metrics in the Prometheus text exposition format.
+"""
+
+import bisect
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterable, Sequence
+from typing import Any, Callable, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from .config import config
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = tuple(2**n for n in range(8, 25, 2))  # 256 B to 16 MiB
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384, 65536)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = (f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + ",".join(pairs) + "}"
+
+
+class _Metric(ABC):
+    type_ = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, Any]) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def collect(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.type_}"
+        yield from self._samples()
+
+    @abstractmethod
+    def _samples(self) -> Iterable[str]:
+        """Exposition lines of the metric's samples."""
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set."""
+
+    type_ = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """Current value per label set, usually refreshed at scrape time."""
+
+    type_ = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Distribution of observations in cumulative buckets per label set."""
+
+    type_ = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: bucket counts (last one is +Inf), sum
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def count(self, **labels: Any) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def sum(self, **labels: Any) -> float:
+        entry = self._values.get(self._key(labels))
+        return entry[1][0] if entry else 0.0
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            values = [
+                (key, list(counts), total[0])
+                for key, (counts, total) in self._values.items()
+            ]
+        names = (*self.labelnames, "le")
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                labels = _format_labels(names, (*key, _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """Metrics to expose, plus collectors refreshing gauges before a scrape."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """Call ``collector`` before every scrape, e.g. to set gauges."""
+        self._collectors.append(collector)
+
+    def add_stats(
+        self, component: str, stats: Callable[[], Optional[dict[str, Any]]]
+    ) -> None:
+        """
+        Expose a component's ``stats()`` dict as gauges at scrape time.
+        Numbers become ``triageflow_<component>_<key>``; nested dicts of
+        numbers become one gauge labelled by their keys.
+        """
+
+        def collect() -> None:
+            for key, value in (stats() or {}).items():
+                name = f"triageflow_{component}_{key}"
+                if isinstance(value, dict):
+                    gauge = self._stats_gauge(name, component, key, ["key"])
+                    for label, item in value.items():
+                        if isinstance(item, (int, float)):
+                            gauge.set(item, key=label)
+                elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                    self._stats_gauge(name, component, key).set(value)
+
+        self.add_collector(collect)
+
+    def _stats_gauge(
+        self, name: str, component: str, key: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        gauge = self._metrics.get(name)
+        if gauge is None:
+            gauge = self.gauge(name, f"{key} reported by the {component}.", labelnames)
+        return gauge
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text format."""
+        for collector in self._collectors:
+            collector()
+        lines = [line for metric in self._metrics.values() for line in metric.collect()]
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "triageflow_http_request_duration_seconds",
+    "HTTP request latency.",
+    ["method", "handler", "status"],
+)
+WORKFLOW_SECONDS = registry.histogram(
+    "triageflow_workflow_duration_seconds",
+    "End-to-end latency of a workflow run.",
+    ["graph"],
+)
+NODE_SECONDS = registry.histogram(
+    "triageflow_node_duration_seconds",
+    "Latency of a graph node; nodes of agent subgraphs carry the agent's name.",
+    ["graph", "node"],
+)
+LLM_SECONDS = registry.histogram(
+    "triageflow_llm_request_duration_seconds",
+    "Latency of a model call.",
+    ["model"],
+)
+LLM_TOKENS = registry.counter(
+    "triageflow_llm_tokens_total",
+    "Tokens consumed by model calls.",
+    ["model", "direction"],
+)
+LLM_REQUEST_TOKENS = registry.histogram(
+    "triageflow_llm_request_tokens",
+    "Tokens per model call.",
+    ["model", "direction"],
+    TOKEN_BUCKETS,
+)
+LLM_COST = registry.counter(
+    "triageflow_llm_cost_usd_total",
+    "Estimated model spend in US dollars.",
+    ["model"],
+)
+CHECKPOINT_WRITE_BYTES = registry.histogram(
+    "triageflow_checkpoint_write_bytes",
+    "Serialized size of checkpoint writes.",
+    ["saver", "kind"],
+    SIZE_BUCKETS,
+)
+CHECKPOINT_WRITE_SECONDS = registry.histogram(
+    "triageflow_checkpoint_write_duration_seconds",
+    "Latency of checkpoint writes.",
+    ["saver", "kind"],
+)
+ERRORS = registry.counter(
+    "triageflow_errors_total",
+    "Errors by the component raising them and their type.",
+    ["component", "type"],
+)
+
+
+def _graph_of(metadata: Optional[dict[str, Any]]) -> str:
+    """Name of the (sub)graph a node runs in, from its checkpoint namespace."""
+    namespace = (metadata or {}).get("langgraph_checkpoint_ns", "")
+    parts = [part.split(":")[0] for part in namespace.split("|")[:-1]]
+    return "/".join(parts) or "main"
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    Records graph node and model call metrics from LangChain callbacks.
+    Pass it in the run config of a graph; model calls made by its nodes
+    inherit it.
+    """
+
+    run_inline = True
+    raise_error = False
+
+    def __init__(self):
+        self._started: dict[UUID, tuple[float, str, str]] = {}
+
+    def on_chain_start(
+        self,
+        serialized: Optional[dict[str, Any]],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        name = kwargs.get("name")
+        if parent_run_id is None:
+            self._started[run_id] = (time.perf_counter(), "workflow", name or "")
+        elif metadata and name == metadata.get("langgraph_node"):
+            self._started[run_id] = (time.perf_counter(), _graph_of(metadata), name)
+
+    def _finish_chain(self, run_id: UUID) -> None:
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        start, graph, name = started
+        elapsed = time.perf_counter() - start
+        if graph == "workflow":
+            WORKFLOW_SECONDS.observe(elapsed, graph=name)
+        else:
+            NODE_SECONDS.observe(elapsed, graph=graph, node=name)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish_chain(run_id)
+
+    def on_chain_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        started = self._started.get(run_id)
+        self._finish_chain(run_id)
+        # Interrupts and commands travel as exceptions but aren't errors
+        if started and not type(error).__name__.startswith(("Graph", "Parent")):
+            ERRORS.inc(component=started[2], type=type(error).__name__)
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: Any,
+        *,
+        run_id: UUID,
+        metadata: Optional[dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        model = (metadata or {}).get("ls_model_name") or "unknown"
+        self._started[run_id] = (time.perf_counter(), "llm", model)
+
+    def on_llm_start(
+        self,
+        serialized: dict[str, Any],
+        prompts: list[str],
+        *,
+        run_id: UUID,
+        metadata: Optional[dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self.on_chat_model_start(
+            serialized, prompts, run_id=run_id, metadata=metadata, **kwargs
+        )
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        start, _, model = started
+        LLM_SECONDS.observe(time.perf_counter() - start, model=model)
+
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(
+                    getattr(generation, "message", None), "usage_metadata", None
+                )
+                if usage:
+                    input_tokens += usage.get("input_tokens", 0)
+                    output_tokens += usage.get("output_tokens", 0)
+        record_token_usage(model, input_tokens, output_tokens)
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            LLM_SECONDS.observe(time.perf_counter() - started[0], model=started[2])
+        ERRORS.inc(component="llm", type=type(error).__name__)
+
+
+def record_token_usage(model: str, input_tokens: int, output_tokens: int) -> None:
+    """Count the tokens of a model call and their estimated cost."""
+    if not input_tokens and not output_tokens:
+        return
+    LLM_TOKENS.inc(input_tokens, model=model, direction="input")
+    LLM_TOKENS.inc(output_tokens, model=model, direction="output")
+    LLM_REQUEST_TOKENS.observe(input_tokens, model=model, direction="input")
+    LLM_REQUEST_TOKENS.observe(output_tokens, model=model, direction="output")
+    LLM_COST.inc(
+        (
+            input_tokens * config.llm_input_cost_per_million_tokens
+            + output_tokens * config.llm_output_cost_per_million_tokens
+        )
+        / 1_000_000,
+        model=model,
+    )
+
+
+metrics_callback_handler = MetricsCallbackHandler()
@@ -0,0 +1,129 @@
+"""
+Shared chat model clients and compiled structured-output runnables.
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Callable, NamedTuple, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.output_parsers.openai_tools import JsonOutputKeyToolsParser
+from langchain_core.runnables import Runnable
+from pydantic import BaseModel
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+
+class ModelSettings(NamedTuple):
+    """Settings identifying a chat model client."""
+
+    model_name: str
+    temperature: float
+    max_tokens: int
+    max_retries: int
+    timeout_seconds: int
+
+
+def default_settings(**overrides: Any) -> ModelSettings:
+    """Model settings from the workflow config, with optional overrides."""
+    settings = ModelSettings(
+        model_name=config.model_name,
+        temperature=config.temperature,
+        max_tokens=config.max_tokens,
+        max_retries=1,
+        timeout_seconds=config.timeout_seconds,
+    )
+    return settings._replace(**overrides)
+
+
+def _create_chat_model(settings: ModelSettings) -> BaseChatModel:
+    """Construct a Gemini chat model client."""
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(
+        model=settings.model_name,
+        temperature=settings.temperature,
+        max_output_tokens=settings.max_tokens,
+        max_retries=settings.max_retries,
+        timeout=settings.timeout_seconds,
+        google_api_key=config.gemini_api_key or os.getenv("GEMINI_API_KEY"),
+    )
+
+
+class ModelRegistry:
+    """
+    Registry of chat model clients keyed by their settings.
+    Agents sharing settings share a client, and with it its HTTP connections.
+    Structured-output runnables are compiled once per client and schema.
+    Clients are built by ``factory`` when given, e.g. a fake in benchmarks.
+    """
+
+    def __init__(
+        self,
+        factory: Optional[Callable[[ModelSettings], BaseChatModel]] = None,
+    ):
+        self.factory = factory
+        self._models: dict[ModelSettings, BaseChatModel] = {}
+        self._structured: dict[tuple[ModelSettings, type, str], Runnable] = {}
+        self._lock = threading.Lock()
+
+    def get_model(self, settings: Optional[ModelSettings] = None) -> BaseChatModel:
+        """Get the client for the given settings, creating it on first use."""
+        settings = settings or default_settings()
+        if (model := self._models.get(settings)) is None:
+            with self._lock:
+                if (model := self._models.get(settings)) is None:
+                    factory = self.factory or _create_chat_model
+                    model = self._models[settings] = factory(settings)
+        return model
+
+    def get_structured_model(
+        self, schema: type[BaseModel], settings: Optional[ModelSettings] = None
+    ) -> Runnable:
+        """Get a runnable returning ``schema`` instances."""
+        settings = settings or default_settings()
+        key = (settings, schema, "structured")
+        if (runnable := self._structured.get(key)) is None:
+            runnable = self.get_model(settings).with_structured_output(schema)
+            self._structured[key] = runnable
+        return runnable
+
+    def get_partial_model(
+        self, schema: type[BaseModel], settings: Optional[ModelSettings] = None
+    ) -> Runnable:
+        """Get a runnable streaming partial ``schema`` fields as dicts."""
+        settings = settings or default_settings()
+        key = (settings, schema, "partial")
+        if (runnable := self._structured.get(key)) is None:
+            tool_name = schema.__name__
+            runnable = self.get_model(settings).bind_tools(
+                [schema], tool_choice=tool_name
+            ) | JsonOutputKeyToolsParser(key_name=tool_name, first_tool_only=True)
+            self._structured[key] = runnable
+        return runnable
+
+    def warmup(self, schemas: list[type[BaseModel]]) -> bool:
+        """
+        Construct the default client and compile runnables for ``schemas``.
+        Failures are logged rather than raised so the app can still start.
+        """
+        try:
+            for schema in schemas:
+                self.get_structured_model(schema)
+                self.get_partial_model(schema)
+        except Exception:
+            logger.warning("Model warmup failed", exc_info=True)
+            return False
+        return True
+
+    def clear(self) -> None:
+        """Drop all cached clients and runnables."""
+        with self._lock:
+            self._models.clear()
+            self._structured.clear()
+
+
+model_registry = ModelRegistry()
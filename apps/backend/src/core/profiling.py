@@ -0,0 +1,71 @@
+"""
+Sampling profiler for single requests.
+
+Samples the stack of the thread serving a request every few milliseconds and
+folds the samples into the collapsed stack format flame graph tools read, one
+``frame;frame;frame count`` line per distinct stack (flamegraph.pl,
+speedscope, inferno). Requests share the event loop's thread, so a profile
+also holds the work of requests running at the same time, and time spent
+waiting on the network shows up as the loop's selector.
+"""
+
+import sys
+import threading
+from collections import Counter
+from types import FrameType
+from typing import Optional
+
+# Deepest stack kept per sample, counted from the outermost frame
+MAX_DEPTH = 128
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _stack(frame: Optional[FrameType]) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels[-MAX_DEPTH:]))
+
+
+class SamplingProfiler:
+    """Samples one thread's stack from a background thread until stopped."""
+
+    def __init__(self, interval_seconds: float = 0.005):
+        self.interval = interval_seconds
+        self.samples: Counter[str] = Counter()
+        self._stopped = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self, thread_id: Optional[int] = None) -> None:
+        """Start sampling ``thread_id``, the calling thread by default."""
+        target = threading.get_ident() if thread_id is None else thread_id
+        self._sampler = threading.Thread(
+            target=self._sample, args=(target,), name="profiler", daemon=True
+        )
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+
+    def _sample(self, thread_id: int) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                return
+            self.samples[_stack(frame)] += 1
+            del frame
+
+    def collapsed(self) -> str:
+        """The samples in the collapsed stack format, heaviest stacks first."""
+        return "\n".join(
+            f"{stack} {count}" for stack, count in self.samples.most_common()
+        )
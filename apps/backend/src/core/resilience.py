@@ -0,0 +1,373 @@
+"""
+Deadlines, retries, hedging and circuit breaking for upstream model calls.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Iterator
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import cache
+from typing import Any, Callable, Optional, TypeVar
+
+from .config import config
+
+T = TypeVar("T")
+
+# Absolute time.monotonic() deadline of the request being served, if any
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceededError(TimeoutError):
+    """The request ran out of time before an upstream call completed."""
+
+
+class UpstreamTimeoutError(DeadlineExceededError):
+    """The upstream outlasted every attempt's timeout within the budget."""
+
+
+class CircuitOpenError(RuntimeError):
+    """Calls are being rejected because the upstream keeps failing."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit {name} is open, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+@contextmanager
+def deadline_scope(timeout_seconds: Optional[float]) -> Iterator[None]:
+    """
+    Run the enclosed code under a deadline ``timeout_seconds`` from now.
+    Nested scopes can only shorten the deadline, never extend it.
+    """
+    deadline = _deadline.get()
+    if timeout_seconds is not None:
+        new_deadline = time.monotonic() + timeout_seconds
+        deadline = new_deadline if deadline is None else min(deadline, new_deadline)
+
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@asynccontextmanager
+async def _no_slot() -> AsyncIterator[None]:
+    yield
+
+
+def remaining_seconds() -> Optional[float]:
+    """Seconds left until the current deadline, or None without one."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Whether an upstream error is worth retrying.
+    Invalid output and client errors fail the same way on every attempt.
+    """
+    if isinstance(error, (ValueError, TypeError, CircuitOpenError)):
+        return False
+
+    code = getattr(error, "code", None)
+    return not (isinstance(code, int) and 400 <= code < 500 and code not in (408, 429))
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """
+    Whether a failed call is the upstream's fault: a retryable error or its
+    own attempt timeout. Running out of the caller's deadline, an open
+    circuit and invalid requests are not.
+    """
+    if isinstance(error, UpstreamTimeoutError):
+        return True
+    if isinstance(error, DeadlineExceededError):
+        return False
+    return is_retryable(error)
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast after ``failure_threshold`` consecutive failures.
+
+    Once open, calls are rejected for ``recovery_seconds``; then a single
+    trial call is let through (half open) and its outcome closes or reopens
+    the circuit.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, recovery_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.recovery_seconds:
+            return "open"
+        return "half_open"
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go through now."""
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return
+
+        retry_after = self.recovery_seconds - (time.monotonic() - self.opened_at)
+        raise CircuitOpenError(self.name, max(retry_after, 1.0))
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def release(self) -> None:
+        """Give up a call that finished without an outcome, e.g. cancelled."""
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_in_flight or (
+            self.failure_threshold > 0 and self.failures >= self.failure_threshold
+        ):
+            self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+
+class LatencyTracker:
+    """Rolling window of call latencies for percentile estimates."""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Get the latency at the given percentile, or None without samples."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(len(ordered) * percent / 100))
+        return ordered[index]
+
+
+class ResilientExecutor:
+    """
+    Runs upstream calls within the current deadline.
+
+    Failed calls are retried with capped exponential backoff and full jitter,
+    as long as the backoff fits in the remaining budget. Each attempt is cut
+    off after ``attempt_timeout_seconds``, which counts as a failure of the
+    upstream; running out of the caller's deadline does not. With hedging on,
+    a call still pending after the ``hedge_percentile`` latency gets a second,
+    identical request and the first response wins. All attempts go through
+    one circuit breaker, and each holds its own ``slot``, if given, so the
+    backoff between them doesn't keep a scheduler slot.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_retries: int = 3,
+        default_timeout_seconds: Optional[float] = 30,
+        attempt_timeout_seconds: Optional[float] = None,
+        base_delay_seconds: float = 0.2,
+        max_delay_seconds: float = 2.0,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_samples: int = 20,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.name = name
+        self.max_retries = max_retries
+        self.default_timeout_seconds = default_timeout_seconds
+        self.attempt_timeout_seconds = attempt_timeout_seconds
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker(name, 0, 0)
+        self.latency = LatencyTracker()
+        self.retries = 0
+        self.hedges = 0
+
+    def stats(self) -> dict[str, int]:
+        """Get retry and hedge counters and the circuit breaker state."""
+        return {
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "consecutive_failures": self.breaker.failures,
+            "circuit_open": int(self.breaker.state == "open"),
+        }
+
+    def _attempt_timeout(self, own_deadline: bool) -> tuple[Optional[float], bool]:
+        """Timeout of the next attempt, and whether the caller's deadline sets it."""
+        timeout = remaining_seconds()
+        attempt_timeout = self.attempt_timeout_seconds
+        if attempt_timeout is not None and (
+            timeout is None or attempt_timeout < timeout
+        ):
+            return attempt_timeout, False
+        return timeout, timeout is not None and not own_deadline
+
+    def _backoff(self, attempt: int) -> Optional[float]:
+        """Delay before retrying, or None when the budget can't fit a retry."""
+        delay = random.uniform(
+            0, min(self.max_delay_seconds, self.base_delay_seconds * 2**attempt)
+        )
+        remaining = remaining_seconds()
+        if attempt >= self.max_retries or (
+            remaining is not None and delay >= remaining
+        ):
+            return None
+        return delay
+
+    def _hedge_delay(self) -> Optional[float]:
+        if self.hedge_percentile is None or len(self.latency) < self.hedge_min_samples:
+            return None
+        return self.latency.percentile(self.hedge_percentile)
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        *,
+        hedge: bool = True,
+        slot: Optional[Callable[[], AbstractAsyncContextManager[Any]]] = None,
+    ) -> T:
+        """
+        Call ``fn`` until it succeeds, the budget runs out or it can't retry.
+        Each attempt runs in a context entered with ``slot()``. Without a
+        request deadline the call gets ``default_timeout_seconds`` for all its
+        attempts, and running out of it counts against the upstream.
+        """
+        if remaining_seconds() is None and self.default_timeout_seconds is not None:
+            with deadline_scope(self.default_timeout_seconds):
+                return await self._call(fn, hedge, slot, own_deadline=True)
+        return await self._call(fn, hedge, slot, own_deadline=False)
+
+    async def _call(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        hedge: bool,
+        slot: Optional[Callable[[], AbstractAsyncContextManager[Any]]],
+        own_deadline: bool,
+    ) -> T:
+        attempt = 0
+        while True:
+            remaining = remaining_seconds()
+            if remaining is not None and remaining <= 0:
+                raise DeadlineExceededError(f"{self.name} call deadline exceeded")
+
+            timeout, caller_deadline = self._attempt_timeout(own_deadline)
+            self.breaker.before_call()
+            try:
+                async with (slot or _no_slot)():
+                    # Queueing for the slot doesn't count against the attempt
+                    result = await asyncio.wait_for(
+                        self._attempt(fn, self._hedge_delay() if hedge else None),
+                        timeout,
+                    )
+            except DeadlineExceededError:
+                # Ran out of time before reaching the upstream, e.g. queued for
+                # the slot, not its fault
+                self.breaker.release()
+                raise
+            except asyncio.TimeoutError as e:
+                if caller_deadline:
+                    # The caller's budget ran out, the upstream may be fine
+                    self.breaker.release()
+                    raise DeadlineExceededError(
+                        f"{self.name} call deadline exceeded"
+                    ) from e
+                self.breaker.record_failure()
+                delay = self._backoff(attempt)
+                if delay is None:
+                    raise UpstreamTimeoutError(
+                        f"{self.name} call timed out after {timeout:.1f}s"
+                    ) from e
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    # The upstream answered, the request itself is at fault
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                delay = self._backoff(attempt)
+                if delay is None:
+                    raise
+            else:
+                self.breaker.record_success()
+                return result
+
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    async def _attempt(
+        self, fn: Callable[[], Awaitable[T]], hedge_delay: Optional[float]
+    ) -> T:
+        """Make one attempt, hedged with a second request after ``hedge_delay``."""
+        start = time.monotonic()
+        tasks = [asyncio.ensure_future(fn())]
+        try:
+            if hedge_delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+                if not done:
+                    self.hedges += 1
+                    tasks.append(asyncio.ensure_future(fn()))
+
+            while True:
+                done, pending = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED
+                )
+                errors = [task.exception() for task in done]
+                for task, error in zip(done, errors):
+                    if error is None:
+                        self.latency.record(time.monotonic() - start)
+                        return task.result()
+
+                tasks = list(pending)
+                if not tasks:
+                    raise errors[0]
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+@cache
+def get_executor(name: str) -> ResilientExecutor:
+    """Get the shared executor for calls made by the named agent."""
+    return ResilientExecutor(
+        name,
+        max_retries=config.max_retries,
+        default_timeout_seconds=config.timeout_seconds,
+        attempt_timeout_seconds=config.llm_attempt_timeout_seconds,
+        base_delay_seconds=config.llm_retry_base_delay_ms / 1000,
+        max_delay_seconds=config.llm_retry_max_delay_ms / 1000,
+        hedge_percentile=config.llm_hedge_percentile
+        if config.llm_hedge_enabled
+        else None,
+        hedge_min_samples=config.llm_hedge_min_samples,
+        breaker=CircuitBreaker(
+            name,
+            failure_threshold=config.circuit_breaker_failure_threshold,
+            recovery_seconds=config.circuit_breaker_recovery_seconds,
+        ),
+    )
@@ -0,0 +1,248 @@
+"""
+Priority admission control for upstream model calls.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Optional
+
+from .config import config
+from .resilience import DeadlineExceededError, LatencyTracker, remaining_seconds
+
+# Lower levels are served first
+PRIORITY_LEVELS = {"critical": 0, "high": 1, "normal": 2}
+PRIORITY_CRITICAL = PRIORITY_LEVELS["critical"]
+PRIORITY_NORMAL = PRIORITY_LEVELS["normal"]
+
+_priority: ContextVar[int] = ContextVar("priority", default=PRIORITY_NORMAL)
+
+
+class AdmissionRejectedError(RuntimeError):
+    """A request was turned away because it would not be served in time."""
+
+    def __init__(self, status_code: int, retry_after: float, reason: str):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+@contextmanager
+def priority_scope(priority: Optional[int]) -> Iterator[None]:
+    """
+    Schedule model calls made in the enclosed code at ``priority``.
+    Nested scopes can only raise the priority, never lower it.
+    """
+    current = _priority.get()
+    token = _priority.set(current if priority is None else min(current, priority))
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+def estimate_tokens(text: str, max_output_tokens: int) -> int:
+    """Rough token cost of a call, about four characters per prompt token."""
+    return len(text) // 4 + max_output_tokens
+
+
+class LLMScheduler:
+    """
+    Grants model call slots by priority within a concurrency and token budget.
+
+    Waiters are served strictly by priority, then in arrival order, while
+    fewer than ``max_concurrency`` calls are in flight and the token bucket,
+    refilled at ``tokens_per_minute``, covers the call's estimated cost. A
+    budget of 0 disables that limit. Waiters give up when their deadline
+    passes, and new requests can be refused up front with ``admit`` when
+    their estimated wait would outlive their deadline.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        tokens_per_minute: int = 0,
+        max_queue_size: int = 0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.tokens_per_minute = tokens_per_minute
+        self.max_queue_size = max_queue_size
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.expired = 0
+        self.wait_times = LatencyTracker()
+        self.service_time: Optional[float] = None
+        self._queue: list[tuple[int, int, asyncio.Future, int]] = []
+        self._queued_by_priority = dict.fromkeys(PRIORITY_LEVELS.values(), 0)
+        self._sequence = itertools.count()
+        self._tokens = float(tokens_per_minute)
+        self._refilled_at = time.monotonic()
+        self._refill_timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(self._queued_by_priority.values())
+
+    def stats(self) -> dict[str, Any]:
+        """Get queue depth, in-flight calls and queue wait statistics."""
+        self._refill()
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "queue_depth_by_priority": {
+                name: self._queued_by_priority[level]
+                for name, level in PRIORITY_LEVELS.items()
+            },
+            "tokens_available": int(self._tokens) if self.tokens_per_minute else None,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "wait_seconds": {
+                "p50": self.wait_times.percentile(50) or 0.0,
+                "p95": self.wait_times.percentile(95) or 0.0,
+                "max": self.wait_times.percentile(100) or 0.0,
+            },
+        }
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.tokens_per_minute:
+            self._tokens = min(
+                float(self.tokens_per_minute),
+                self._tokens + (now - self._refilled_at) * self.tokens_per_minute / 60,
+            )
+        self._refilled_at = now
+
+    def _token_wait(self, tokens: int) -> float:
+        """Seconds until the bucket holds ``tokens``."""
+        if not self.tokens_per_minute:
+            return 0.0
+        tokens = min(tokens, self.tokens_per_minute)
+        return max(0.0, (tokens - self._tokens) * 60 / self.tokens_per_minute)
+
+    def estimate_wait(self, priority: int, tokens: int = 0) -> float:
+        """Estimate how long a new call at ``priority`` would queue."""
+        self._refill()
+        ahead = sum(
+            n for level, n in self._queued_by_priority.items() if level <= priority
+        )
+        if ahead == 0 and self.in_flight < self.max_concurrency:
+            return self._token_wait(tokens)
+
+        service_time = self.service_time or config.timeout_seconds
+        return max(
+            (ahead + 1) * service_time / self.max_concurrency, self._token_wait(tokens)
+        )
+
+    def admit(self, priority: int, timeout_seconds: Optional[float]) -> None:
+        """
+        Raise AdmissionRejectedError if a request should be turned away:
+        with 503 when the queue is full, with 429 when the estimated wait
+        exceeds ``timeout_seconds``.
+        """
+        wait = self.estimate_wait(priority)
+        if self.max_queue_size and self.queue_depth >= self.max_queue_size:
+            self.rejected += 1
+            raise AdmissionRejectedError(503, max(wait, 1.0), "Model call queue full")
+        if timeout_seconds is not None and wait > timeout_seconds:
+            self.rejected += 1
+            raise AdmissionRejectedError(
+                429, wait, f"Estimated queue wait of {wait:.1f}s exceeds the deadline"
+            )
+
+    def _waiting_for_tokens(self) -> bool:
+        """Whether a refill timer will dispatch the head of the queue."""
+        timer = self._refill_timer
+        return timer is not None and timer.when() > asyncio.get_running_loop().time()
+
+    def _dispatch(self) -> None:
+        """Grant slots to waiters, best priority first, while budget allows."""
+        self._refill_timer = None
+        while self._queue and self.in_flight < self.max_concurrency:
+            priority, _, future, tokens = self._queue[0]
+            if future.done():
+                # Gave up waiting; drop it lazily
+                heapq.heappop(self._queue)
+                continue
+
+            self._refill()
+            if (wait := self._token_wait(tokens)) > 0:
+                loop = asyncio.get_running_loop()
+                self._refill_timer = loop.call_later(wait, self._dispatch)
+                return
+
+            heapq.heappop(self._queue)
+            self._grant(priority, tokens)
+            future.set_result(None)
+
+    def _grant(self, priority: int, tokens: int) -> None:
+        self._queued_by_priority[priority] -= 1
+        self._tokens -= min(tokens, self.tokens_per_minute)
+        self.in_flight += 1
+        self.admitted += 1
+
+    async def acquire(self, priority: int, tokens: int) -> None:
+        """Wait for a call slot until granted or the deadline passes."""
+        start = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        self._queued_by_priority[priority] += 1
+        heapq.heappush(self._queue, (priority, next(self._sequence), future, tokens))
+        if not self._waiting_for_tokens():
+            self._dispatch()
+
+        try:
+            await asyncio.wait_for(future, remaining_seconds())
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Granted just as we gave up, hand the slot back
+                self.release()
+            else:
+                self._queued_by_priority[priority] -= 1
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self.expired += 1
+            raise DeadlineExceededError("Deadline passed while queued") from e
+        finally:
+            self.wait_times.record(time.monotonic() - start)
+
+    def release(self, service_time: Optional[float] = None) -> None:
+        """Free a call slot, folding its duration into the service estimate."""
+        self.in_flight -= 1
+        if service_time is not None:
+            self.service_time = (
+                service_time
+                if self.service_time is None
+                else 0.8 * self.service_time + 0.2 * service_time
+            )
+        if not self._waiting_for_tokens():
+            self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, tokens: int = 0) -> AsyncIterator[None]:
+        """Hold a call slot at the current priority for the enclosed call."""
+        await self.acquire(current_priority(), tokens)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+
+
+@lru_cache(maxsize=1)
+def get_scheduler() -> LLMScheduler:
+    """Get the process-wide model call scheduler."""
+    return LLMScheduler(
+        max_concurrency=config.llm_max_concurrency,
+        tokens_per_minute=config.llm_tokens_per_minute,
+        max_queue_size=config.llm_max_queue_size,
+    )
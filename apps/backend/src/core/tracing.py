@@ -0,0 +1,523 @@
+"""
+Request-scoped tracing of the API, graph nodes and model calls.
+
+A traced request gets a span for the HTTP request, one for each workflow run
+and graph node, agent subgraphs included, one for each model call, and the
+spans code opens with ``span()``. Once a trace's root span ends its spans are
+appended to a local file as OTLP JSON, one ``ExportTraceServiceRequest`` per
+line like the OpenTelemetry Collector's file exporter writes, so traces load
+into OTLP tooling without a collector running. The file is written by a
+writer thread, never on the event loop.
+"""
+
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables.config import var_child_runnable_config
+from langgraph.errors import GraphInterrupt, ParentCommand
+
+from .config import config
+from .metrics import _graph_of
+from .profiling import SamplingProfiler
+
+logger = logging.getLogger(__name__)
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+STATUS_UNSET = 0
+STATUS_ERROR = 2
+
+SERVICE_NAME = "triageflow"
+
+# Response header carrying the trace id, request header asking for a profile
+TRACE_HEADER = "X-Trace-Id"
+PROFILE_HEADER = "X-Profile"
+
+# Innermost open span of the current context
+_span: ContextVar[Optional["Span"]] = ContextVar("span", default=None)
+# False inside a request that was not sampled, so its runs stay untraced
+_sampled: ContextVar[Optional[bool]] = ContextVar("sampled", default=None)
+
+# One profile at a time, samples of concurrent ones would overlap anyway
+_profiling = threading.Lock()
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    return [
+        {"key": key, "value": _otlp_value(value)}
+        for key, value in attributes.items()
+        if value is not None
+    ]
+
+
+def _otlp_line(spans: list[dict[str, Any]]) -> str:
+    """Spans of a trace as an ``ExportTraceServiceRequest`` JSON line."""
+    request = {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": _otlp_attributes({"service.name": SERVICE_NAME})
+                },
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }
+        ]
+    }
+    return json.dumps(request, separators=(",", ":")) + "\n"
+
+
+def _is_error(error: BaseException) -> bool:
+    # Interrupts and commands travel as exceptions but aren't errors
+    return not isinstance(error, (GraphInterrupt, ParentCommand))
+
+
+class Trace:
+    """Spans of one trace, exported together once its root span ends."""
+
+    def __init__(self, tracer: "Tracer"):
+        self.tracer = tracer
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.finished: list[Span] = []
+        self.root_ended = False
+
+    def finish(self, span: "Span") -> None:
+        self.finished.append(span)
+        if span.parent is None:
+            self.root_ended = True
+        # Spans outliving the root, like background tasks, follow on their own
+        if self.root_ended:
+            spans, self.finished = self.finished, []
+            self.tracer.export(spans)
+
+
+class Span:
+    """A timed operation of a trace."""
+
+    __slots__ = (
+        "trace",
+        "parent",
+        "span_id",
+        "name",
+        "kind",
+        "attributes",
+        "start_ns",
+        "end_ns",
+        "error",
+    )
+
+    def __init__(
+        self,
+        trace: Trace,
+        name: str,
+        parent: Optional["Span"] = None,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[dict[str, Any]] = None,
+    ):
+        self.trace = trace
+        self.parent = parent
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.name = name
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def child(
+        self, name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any
+    ) -> "Span":
+        return Span(self.trace, name, self, kind, attributes)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def within(self, ancestor: "Span") -> bool:
+        """Whether this span is ``ancestor`` or one of its descendants."""
+        span: Optional[Span] = self
+        while span is not None:
+            if span is ancestor:
+                return True
+            span = span.parent
+        return False
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None and _is_error(error):
+            self.error = f"{type(error).__name__}: {error}"
+        self.trace.finish(self)
+
+    def to_otlp(self) -> dict[str, Any]:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": STATUS_UNSET},
+        }
+        if self.parent is not None:
+            span["parentSpanId"] = self.parent.span_id
+        if self.error is not None:
+            span["status"] = {"code": STATUS_ERROR, "message": self.error}
+        return span
+
+
+class Tracer:
+    """
+    Samples traces and appends finished spans to a JSON lines file.
+
+    Finished traces are handed to a single writer thread, which encodes and
+    appends everything queued in one write, so exporting never blocks the
+    event loop on the file.
+    """
+
+    def __init__(self, path: str, sample_rate: float = 1.0):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.traces = 0
+        self.spans = 0
+        self.profiles = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+
+    def start_trace(
+        self, name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any
+    ) -> Optional[Span]:
+        """Start the root span of a new trace, or None when not sampled."""
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return None
+        self.traces += 1
+        return Span(Trace(self), name, kind=kind, attributes=attributes)
+
+    def export(self, spans: Sequence[Span]) -> None:
+        """Queue a finished trace's spans to be appended to the file."""
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_loop, name="trace-writer", daemon=True
+                )
+                self._writer.start()
+        self._queue.put([span.to_otlp() for span in spans])
+
+    def _write_loop(self) -> None:
+        """Append queued traces, all of those queued so far in one write."""
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            traces = [trace for trace in batch if trace is not None]
+            try:
+                if traces:
+                    # Whole lines per write, so the file is complete when read
+                    with open(self.path, "a", encoding="utf-8") as file:
+                        file.write("".join(_otlp_line(trace) for trace in traces))
+                    self.spans += sum(len(trace) for trace in traces)
+            except OSError:
+                # Traces are dropped rather than failing or stopping the writer
+                logger.exception("Failed to write traces to %s", self.path)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if len(traces) < len(batch):
+                return
+
+    def flush(self) -> None:
+        """Wait until the traces exported so far are in the file."""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Flush queued traces and stop the writer thread."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None and writer.is_alive():
+            self._queue.put(None)
+            writer.join()
+
+    def stats(self) -> dict[str, Any]:
+        return {"traces": self.traces, "spans": self.spans, "profiles": self.profiles}
+
+
+@lru_cache(maxsize=1)
+def get_tracer() -> Optional[Tracer]:
+    """Get the shared tracer, or None when tracing is disabled."""
+    if not config.trace_path:
+        return None
+    return Tracer(config.trace_path, config.trace_sample_rate)
+
+
+def _current_run() -> Optional[UUID]:
+    """The LangChain run the calling code runs in, e.g. a graph node's."""
+    run_config = var_child_runnable_config.get()
+    callbacks = (run_config or {}).get("callbacks")
+    return getattr(callbacks, "parent_run_id", None)
+
+
+def _parent(run_span: Optional[Span]) -> Optional[Span]:
+    """
+    The innermost open span, from the context or the LangChain run. Spans
+    opened inside a run take precedence over the run's own span.
+    """
+    current = _span.get()
+    if run_span is None or (current is not None and current.within(run_span)):
+        return current
+    return run_span
+
+
+def _start(
+    parent: Optional[Span], name: str, kind: int, attributes: dict[str, Any]
+) -> Optional[Span]:
+    """A child of ``parent``, or the root of a new trace if one is due."""
+    if parent is not None:
+        return parent.child(name, kind, **attributes)
+    tracer = get_tracer()
+    if tracer is None or _sampled.get() is False:
+        return None
+    return tracer.start_trace(name, kind, **attributes)
+
+
+@contextmanager
+def span(
+    name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any
+) -> Iterator[Optional[Span]]:
+    """
+    Trace the enclosed code as a child of the innermost open span, starting a
+    trace without one. Yields the span, or None when not tracing.
+    """
+    run_id = _current_run()
+    if tracing_callback_handler.follows(run_id):
+        # Inside a run of an unsampled trace the span isn't recorded either
+        parent = _parent(tracing_callback_handler.span_of(run_id))
+        opened = parent.child(name, kind, **attributes) if parent else None
+    else:
+        opened = _start(_parent(None), name, kind, attributes)
+    if opened is None:
+        if get_tracer() is None or _sampled.get() is not None:
+            yield None
+            return
+        # Not sampled, nothing below starts a trace of its own either
+        token = _sampled.set(False)
+        try:
+            yield None
+        finally:
+            _sampled.reset(token)
+        return
+
+    token = _span.set(opened)
+    try:
+        yield opened
+    except BaseException as e:
+        opened.end(e)
+        raise
+    finally:
+        _span.reset(token)
+        opened.end()
+
+
+@contextmanager
+def profile(target: Optional[Span], requested: bool = False) -> Iterator[None]:
+    """
+    Profile the enclosed code when sampled or ``requested``, attaching the
+    collapsed stacks to ``target`` as its ``profile.collapsed`` attribute.
+    """
+    sampled = requested or random.random() < config.profile_sample_rate
+    if target is None or not sampled or not _profiling.acquire(blocking=False):
+        yield
+        return
+
+    profiler = SamplingProfiler(config.profile_interval_ms / 1000)
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        _profiling.release()
+        target.trace.tracer.profiles += 1
+        target.set_attribute("profile.format", "collapsed")
+        target.set_attribute("profile.samples", sum(profiler.samples.values()))
+        target.set_attribute("profile.collapsed", profiler.collapsed())
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    Opens spans for workflow runs, graph nodes and model calls from LangChain
+    callbacks, as children of the span the run started in. Pass it in the run
+    config of a graph; model calls made by its nodes inherit it.
+    """
+
+    run_inline = True
+    raise_error = False
+
+    def __init__(self):
+        # Run -> (span of the run, or of its nearest traced ancestor; own span)
+        self._runs: dict[UUID, tuple[Optional[Span], bool]] = {}
+
+    def follows(self, run_id: Optional[UUID]) -> bool:
+        """Whether ``run_id`` is a run this handler saw start."""
+        return run_id is not None and run_id in self._runs
+
+    def span_of(self, run_id: Optional[UUID]) -> Optional[Span]:
+        run = self._runs.get(run_id) if run_id is not None else None
+        return run[0] if run else None
+
+    def _open(
+        self,
+        run_id: UUID,
+        parent_run_id: Optional[UUID],
+        name: str,
+        kind: int,
+        attributes: dict[str, Any],
+    ) -> None:
+        parent = _parent(self.span_of(parent_run_id))
+        if parent is None and self.follows(parent_run_id):
+            # A run of an unsampled trace
+            opened = None
+        else:
+            opened = _start(parent, name, kind, attributes)
+        self._runs[run_id] = (opened, True) if opened else (parent, False)
+
+    def _close(
+        self, run_id: UUID, error: Optional[BaseException] = None, **attributes: Any
+    ) -> None:
+        opened, own = self._runs.pop(run_id, (None, False))
+        if own and opened is not None:
+            opened.attributes.update(attributes)
+            opened.end(error)
+
+    def on_chain_start(
+        self,
+        serialized: Optional[dict[str, Any]],
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        name = kwargs.get("name") or ""
+        metadata = metadata or {}
+        if parent_run_id is None:
+            self._open(
+                run_id,
+                None,
+                name,
+                SPAN_KIND_INTERNAL,
+                {"langgraph.thread_id": metadata.get("thread_id")},
+            )
+        elif name == metadata.get("langgraph_node"):
+            self._open(
+                run_id,
+                parent_run_id,
+                name,
+                SPAN_KIND_INTERNAL,
+                {
+                    "langgraph.graph": _graph_of(metadata),
+                    "langgraph.node": name,
+                    "langgraph.step": metadata.get("langgraph_step"),
+                },
+            )
+        elif self.follows(parent_run_id):
+            self._runs[run_id] = (self.span_of(parent_run_id), False)
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._close(run_id)
+
+    def on_chain_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._close(run_id, error)
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        model = (metadata or {}).get("ls_model_name") or "unknown"
+        self._open(
+            run_id,
+            parent_run_id,
+            f"llm {model}",
+            SPAN_KIND_CLIENT,
+            {"gen_ai.request.model": model},
+        )
+
+    def on_llm_start(
+        self,
+        serialized: dict[str, Any],
+        prompts: list[str],
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        metadata: Optional[dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> None:
+        self.on_chat_model_start(
+            serialized,
+            prompts,
+            run_id=run_id,
+            parent_run_id=parent_run_id,
+            metadata=metadata,
+            **kwargs,
+        )
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(
+                    getattr(generation, "message", None), "usage_metadata", None
+                )
+                if usage:
+                    input_tokens += usage.get("input_tokens", 0)
+                    output_tokens += usage.get("output_tokens", 0)
+        self._close(
+            run_id,
+            **{
+                "gen_ai.usage.input_tokens": input_tokens,
+                "gen_ai.usage.output_tokens": output_tokens,
+            },
+        )
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self._close(run_id, error)
+
+
+tracing_callback_handler = TracingCallbackHandler()
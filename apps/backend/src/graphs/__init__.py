@@ -3,6 +3,20 @@ Graphs package for orchestrating multi-agent workflows.
 """
 
 from ..state import IntakeConversationInfo, WorkflowState
-from .main_graph import triage_workflow
+from .main_graph import conversation_update, get_triage_workflow, new_thread_id
 
-__all__ = ["triage_workflow", "WorkflowState", "IntakeConversationInfo"]
+__all__ = [
+    "conversation_update",
+    "get_triage_workflow",
+    "triage_workflow",
+    "new_thread_id",
+    "WorkflowState",
+    "IntakeConversationInfo",
+]
+
+
+def __getattr__(name: str):
+    # The shared workflow is compiled on first access rather than at import time
+    if name == "triage_workflow":
+        return get_triage_workflow()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
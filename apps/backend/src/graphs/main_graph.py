@@ -2,17 +2,74 @@
 Main orchestration graph for the multi-agent triage workflow system.
 """
 
-from typing import Any
+import asyncio
+from collections.abc import AsyncIterator
+from functools import lru_cache
+from typing import Any, Optional, Union
+from uuid import uuid4
 
-from langgraph.checkpoint.memory import MemorySaver
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, StateGraph
 
-from src.agents import intake_agent
+from src.agents import get_intake_agent, get_triage_agent
+from src.agents.intake import (
+    INTAKE_OUTPUT_KEYS,
+    INTAKE_PARTIAL_EVENT,
+    SPECULATIVE_TRIAGE_KEY,
+    STREAM_INTAKE_KEY,
+    IntakeAgent,
+)
+from src.agents.red_flags import get_red_flag_detector
+from src.agents.triage import SpeculativeTriage
+from src.checkpoint import DURABILITY_EXIT, checkpoint_durability, get_checkpointer
+from src.core import config
+from src.core.metrics import ERRORS, metrics_callback_handler
+from src.core.resilience import CircuitOpenError, DeadlineExceededError
+from src.core.scheduler import AdmissionRejectedError
+from src.core.tracing import get_tracer, tracing_callback_handler
 from src.state import WorkflowState
 
+from .optimizer import ROUTING_NODE, compile_workflow, original_node
+
 INTAKE_NODE = "intake"
 TRIAGE_NODE = "triage"
 SUPERVISOR_NODE = "supervisor"
+EMERGENCY_PROTOCOL_NODE = "emergency_protocol"
+
+EMERGENCY_ACTIONS = [
+    "immediate_medical_attention",
+    "alert_emergency_team",
+    "prepare_emergency_room",
+]
+
+
+def new_thread_id() -> str:
+    """Generate a unique thread ID for a workflow run."""
+    return uuid4().hex
+
+
+def conversation_update(
+    conversation: str, patient_id: Optional[str] = None, reextract: bool = False
+) -> dict[str, Any]:
+    """
+    Input for a run with a new segment of the conversation. On a new thread
+    the segment is the whole conversation; on an existing thread it is
+    appended and only it is extracted, unless ``reextract`` asks for the
+    whole conversation to be extracted again.
+    """
+    update: dict[str, Any] = {
+        "messages": [HumanMessage(content=conversation)],
+        # Screen the conversation with the new segment and run intake again
+        "red_flags": None,
+        "last_node": None,
+    }
+    if reextract:
+        update["intake_conversation_info"] = None
+        update["intake_message_count"] = 0
+    if patient_id:
+        update["context"] = {"patient_id": patient_id}
+    return update
 
 
 class TriageWorkflow:
@@ -20,80 +77,250 @@ class TriageWorkflow:
 
     def __init__(self):
         self.graph = self._build_graph()
-        self.memory = MemorySaver()
-        self.app = self.graph.compile(checkpointer=self.memory)
+        self.memory = get_checkpointer()
+        self.app = compile_workflow(self.graph, checkpointer=self.memory)
 
     def _build_graph(self) -> StateGraph:
         """Build the main orchestration graph."""
 
         workflow = StateGraph(WorkflowState)
 
-        workflow.add_node(SUPERVISOR_NODE, self._supervisor_node)
+        workflow.add_node(
+            SUPERVISOR_NODE, self._supervisor_node, metadata={ROUTING_NODE: True}
+        )
         workflow.add_node(INTAKE_NODE, self._intake_node)
-        # workflow.add_node(TRIAGE_NODE, self._triage_node)
+        workflow.add_node(EMERGENCY_PROTOCOL_NODE, self._emergency_protocol_node)
+        workflow.add_node(TRIAGE_NODE, self._triage_node)
 
         workflow.set_entry_point(SUPERVISOR_NODE)
         workflow.add_conditional_edges(SUPERVISOR_NODE, self._route_next_step)
         workflow.add_edge(INTAKE_NODE, SUPERVISOR_NODE)
-        # workflow.add_edge(TRIAGE_NODE, SUPERVISOR_NODE)
+        workflow.add_edge(EMERGENCY_PROTOCOL_NODE, SUPERVISOR_NODE)
+        workflow.add_edge(TRIAGE_NODE, SUPERVISOR_NODE)
 
         return workflow
 
     async def _supervisor_node(self, state: WorkflowState) -> dict[str, Any]:
         """Coordinate the workflow and decide next steps."""
-        # The supervisor just returns the current state
+        # Screen the raw transcript for red flags once, before any model call
         # Routing decisions are handled by _route_next_step
-        return state
+        if state.get("red_flags") is None and config.red_flags_enabled:
+            transcript = "\n".join(
+                str(message.content) for message in state.get("messages", [])
+            )
+            return {"red_flags": get_red_flag_detector().detect(transcript)}
 
-    async def _intake_node(self, state: WorkflowState) -> dict[str, Any]:
+        return {}
+
+    async def _intake_node(
+        self, state: WorkflowState, config: RunnableConfig
+    ) -> dict[str, Any]:
         """Execute the intake agent."""
 
+        # Triage starts from the extraction's first fields while it streams
+        speculation = config.get("configurable", {}).get(SPECULATIVE_TRIAGE_KEY)
+        if speculation is not None:
+            speculation.prepare(
+                state.get("intake_conversation_info"),
+                IntakeAgent._get_patient_id(state),
+                state.get("red_flags"),
+            )
+
         # Run the intake subgraph
-        result = await intake_agent.run(state)
+        try:
+            result = await get_intake_agent().run(state, config)
+        except BaseException:
+            if speculation is not None:
+                speculation.cancel()
+            raise
 
-        # Update state with results
-        return {
+        # Only return what intake changed, other branches may run alongside it
+        update = {
             "last_node": INTAKE_NODE,
-            **result,  # This includes intake_completed and intake_data
+            **{key: result[key] for key in INTAKE_OUTPUT_KEYS if key in result},
+            "errors": result.get("errors", [])[len(state.get("errors", [])) :],
         }
+        # New intake info needs a new triage decision
+        extracted = result.get("intake_message_count", 0)
+        if extracted > state.get("intake_message_count", 0):
+            update["triage_decision"] = None
+        elif speculation is not None:
+            speculation.cancel()
+        return update
 
-    async def _triage_node(self, state: WorkflowState) -> dict[str, Any]:
-        """Execute the triage agent."""
-        state["last_node"] = TRIAGE_NODE
-
-        # Here you would call your individual triage agent graph
-        triage_result = await self._execute_triage_agent(state)
-
+    async def _emergency_protocol_node(self, state: WorkflowState) -> dict[str, Any]:
+        """Activate the emergency protocol for a patient with red flags."""
         return {
-            "triage_completed": True,
-            "triage_decision": triage_result,
+            "emergency_protocol_activated": True,
+            "emergency_actions": EMERGENCY_ACTIONS,
         }
 
-    def _route_next_step(self, state: WorkflowState) -> str:
-        """Route to the next step based on the current state."""
-        if state.get("intake_conversation_info"):
-            return END
+    async def _triage_node(
+        self, state: WorkflowState, config: RunnableConfig
+    ) -> dict[str, Any]:
+        """Execute the triage agent, confirming its speculative decision if any."""
+        speculation = config.get("configurable", {}).get(SPECULATIVE_TRIAGE_KEY)
+        agent = speculation or get_triage_agent()
+        try:
+            decision = await agent.decide(
+                state["intake_conversation_info"],
+                state.get("patient_details"),
+                state.get("red_flags"),
+            )
+        except (AdmissionRejectedError, CircuitOpenError, DeadlineExceededError):
+            # Surface these to the caller rather than as a partial result
+            raise
+        except Exception as e:
+            ERRORS.inc(component=TRIAGE_NODE, type=type(e).__name__)
+            return {
+                "last_node": TRIAGE_NODE,
+                "errors": [f"Error deciding triage: {str(e)}"],
+            }
+
+        return {"last_node": TRIAGE_NODE, "triage_decision": decision}
 
-        return INTAKE_NODE
+    async def _route_next_step(self, state: WorkflowState) -> Union[str, list[str]]:
+        """
+        Route to the next step based on the current state.
+        Red flags start the emergency protocol in parallel with intake, so its
+        activation never waits on extraction. A coroutine, as LangGraph runs
+        synchronous routes in a worker thread.
+        """
+        next_steps = []
+        if state.get("red_flags") and not state.get("emergency_protocol_activated"):
+            next_steps.append(EMERGENCY_PROTOCOL_NODE)
+        # Intake retries its model calls itself, a failed intake is final
+        # until the next segment of the conversation arrives
+        if (
+            len(state.get("messages", [])) > state.get("intake_message_count", 0)
+            and state.get("last_node") != INTAKE_NODE
+        ):
+            next_steps.append(INTAKE_NODE)
+        # Triage follows intake, once per new intake info
+        elif (
+            config.triage_enabled
+            and state.get("intake_conversation_info")
+            and state.get("triage_decision") is None
+            and state.get("last_node") != TRIAGE_NODE
+        ):
+            next_steps.append(TRIAGE_NODE)
 
-    # async def _execute_triage_agent(self, state: WorkflowState) -> dict[str, Any]:
-    #     """Execute the triage agent graph."""
-    #     # This is where you would integrate with your individual triage agent
-    #     # For now, return a placeholder result
-    #     return {
-    #         "priority_level": "urgent",
-    #         "reasoning": "Based on symptoms and medical history",
-    #         "recommended_actions": ["immediate_assessment", "order_tests"],
-    #         "estimated_wait_time": 15,
-    #     }
+        return next_steps or END
+
+    @staticmethod
+    def _checkpoint_during() -> bool:
+        """Whether a run saves its steps, or only its final state."""
+        return checkpoint_durability() != DURABILITY_EXIT
+
+    @staticmethod
+    def _run_config(thread_id: Optional[str], **configurable: Any) -> RunnableConfig:
+        """Config of one run, with a speculative triage decision of its own."""
+        if config.triage_enabled and config.speculative_triage_enabled:
+            configurable[SPECULATIVE_TRIAGE_KEY] = SpeculativeTriage(get_triage_agent())
+        callbacks = [metrics_callback_handler]
+        if get_tracer() is not None:
+            callbacks.append(tracing_callback_handler)
+        return {
+            "configurable": {"thread_id": thread_id or new_thread_id(), **configurable},
+            "callbacks": callbacks,
+        }
 
     async def run(
-        self, initial_state: dict[str, Any], thread_id: str = "default"
+        self, initial_state: dict[str, Any], thread_id: Optional[str] = None
     ) -> dict[str, Any]:
-        """Run the complete workflow."""
-        config = {"configurable": {"thread_id": thread_id}}
-        result = await self.app.ainvoke(initial_state, config=config)
+        """Run the complete workflow, on a new thread unless one is given."""
+        config = self._run_config(thread_id)
+        result = await self.app.ainvoke(
+            initial_state, config=config, checkpoint_during=self._checkpoint_during()
+        )
         return result
 
+    async def stream(
+        self, initial_state: dict[str, Any], thread_id: Optional[str] = None
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Run the complete workflow, yielding progress events as they happen.
+        Emits ``node_start``/``node_end`` for every graph node, ``intake_partial``
+        while the intake extraction streams in, and a final ``result``.
+        """
+        config = self._run_config(thread_id, **{STREAM_INTAKE_KEY: True})
+
+        async for event in self.app.astream_events(
+            initial_state,
+            config=config,
+            version="v2",
+            checkpoint_during=self._checkpoint_during(),
+        ):
+            kind = event["event"]
+            node = event.get("metadata", {}).get("langgraph_node")
+
+            if kind == "on_custom_event" and event["name"] == INTAKE_PARTIAL_EVENT:
+                yield {"event": INTAKE_PARTIAL_EVENT, "data": event["data"]}
+            elif kind == "on_chain_end" and not event["parent_ids"]:
+                yield {"event": "result", "data": event["data"]["output"]}
+            elif kind == "on_chain_start" and event["name"] == node:
+                yield {"event": "node_start", "data": {"node": original_node(node)}}
+            elif kind == "on_chain_end" and event["name"] == node:
+                yield {"event": "node_end", "data": {"node": original_node(node)}}
+
+    async def get_status(self, thread_id: str) -> Optional[dict[str, Any]]:
+        """
+        Get the status of a workflow from its latest checkpoint.
+        Returns None when the thread has no checkpoints.
+        """
+        config = {"configurable": {"thread_id": thread_id}}
+        snapshot = await self.app.aget_state(config)
+        if snapshot.created_at is None:
+            return None
+
+        errors = [task.error for task in snapshot.tasks if task.error]
+        if errors:
+            status = "failed"
+        elif snapshot.next:
+            status = "running"
+        else:
+            status = "completed"
+
+        return {
+            "thread_id": thread_id,
+            "status": status,
+            "current_step": snapshot.values.get("last_node"),
+            "next_steps": [original_node(node) for node in snapshot.next],
+            "checkpoint_id": snapshot.config["configurable"]["checkpoint_id"],
+            "updated_at": snapshot.created_at,
+            "errors": snapshot.values.get("errors", []) + [str(e) for e in errors],
+        }
+
+    async def run_batch(
+        self,
+        initial_states: list[dict[str, Any]],
+        max_concurrency: Optional[int] = None,
+        thread_ids: Optional[list[str]] = None,
+    ) -> list[Union[dict[str, Any], Exception]]:
+        """
+        Run several workflows concurrently, each on its own thread.
+        At most ``max_concurrency`` runs are in flight at once. Failures are
+        returned in place of the result so one item cannot sink the batch.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or config.batch_max_concurrency)
+        thread_ids = thread_ids or [new_thread_id() for _ in initial_states]
+
+        async def run_one(
+            initial_state: dict[str, Any], thread_id: str
+        ) -> dict[str, Any]:
+            async with semaphore:
+                return await self.run(initial_state, thread_id=thread_id)
+
+        return await asyncio.gather(
+            *(
+                run_one(state, thread_id)
+                for state, thread_id in zip(initial_states, thread_ids)
+            ),
+            return_exceptions=True,
+        )
+
 
-triage_workflow = TriageWorkflow()
+@lru_cache(maxsize=1)
+def get_triage_workflow() -> TriageWorkflow:
+    """Get the shared triage workflow, compiling its graph on first use."""
+    return TriageWorkflow()
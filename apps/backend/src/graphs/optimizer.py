@@ -0,0 +1,244 @@
+"""
+Compile-time optimization of workflow graphs.
+
+Supervisor-style graphs send every agent back to a routing node that only
+screens the state and picks the next agent. Each visit to it costs a whole
+super-step: scheduling, reducer application and a checkpoint. Folding the
+routing node into the nodes that lead to it runs its logic at the end of the
+same step instead, so a supervisor -> intake -> supervisor run takes two
+steps rather than three.
+"""
+
+from collections.abc import Hashable, Mapping, Sequence
+from typing import Any, Optional, Union
+
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.runnables.config import patch_config
+from langgraph.channels import BinaryOperatorAggregate
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.graph import START, StateGraph
+from langgraph.graph.branch import Branch
+from langgraph.graph.state import CompiledStateGraph, StateNodeSpec
+from langgraph.types import Send
+
+from src.core import config
+
+# Node metadata marking a node that only screens the state and routes
+ROUTING_NODE = "routing"
+
+# Suffix of the unfolded copy of a node, scheduled when it runs in parallel
+PARALLEL_SUFFIX = "_parallel"
+
+
+def original_node(name: str) -> str:
+    """Name of the declared node behind a compiled node name."""
+    return name[: -len(PARALLEL_SUFFIX)] if name.endswith(PARALLEL_SUFFIX) else name
+
+
+def _merge(
+    channels: Mapping[str, Any], state: Mapping[str, Any], update: Mapping[str, Any]
+) -> dict[str, Any]:
+    """Apply ``update`` to ``state`` with the reducers of the state's channels."""
+    merged = dict(state)
+    for key, value in update.items():
+        channel = channels.get(key)
+        if isinstance(channel, BinaryOperatorAggregate) and merged.get(key) is not None:
+            merged[key] = channel.operator(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _as_update(name: str, update: Any) -> Mapping[str, Any]:
+    if update is None:
+        return {}
+    if not isinstance(update, Mapping):
+        raise TypeError(
+            f"Node {name!r} is folded with a routing node and must return a dict "
+            f"of state updates, got {type(update).__name__}"
+        )
+    return update
+
+
+def _folded_node(
+    name: str,
+    node: Runnable,
+    routing_name: str,
+    routing: Runnable,
+    channels: Mapping[str, Any],
+):
+    """The node followed by the routing node, as a single node."""
+
+    async def folded(state: dict[str, Any], config: RunnableConfig) -> dict[str, Any]:
+        # Renamed so the node isn't reported twice, once inside itself
+        update = _as_update(
+            name,
+            await node.ainvoke(state, patch_config(config, run_name=f"{name}.node")),
+        )
+        routed = _as_update(
+            routing_name,
+            await routing.ainvoke(_merge(channels, state, update), config),
+        )
+        # Writes of both, as if the routing node had run in the next step
+        return _merge(channels, update, routed)
+
+    return folded
+
+
+def _folding_route(branch: Branch, folded: Sequence[str]):
+    """
+    The routing node's route, choosing between the folded and the unfolded
+    copies of its destinations. A folded node routes on its own writes, so
+    nodes scheduled together run unfolded and join at the routing node.
+    """
+
+    async def route(
+        state: dict[str, Any], config: RunnableConfig
+    ) -> Union[str, list[Union[str, Send]]]:
+        result = await branch.path.ainvoke(state, config)
+        destinations = result if isinstance(result, list) else [result]
+        destinations = [
+            destination
+            if isinstance(destination, Send) or not branch.ends
+            else branch.ends[destination]
+            for destination in destinations
+        ]
+        if len(destinations) == 1:
+            return destinations
+        return [
+            destination + PARALLEL_SUFFIX
+            if isinstance(destination, str) and destination in folded
+            else destination
+            for destination in destinations
+        ]
+
+    return route
+
+
+def _foldable_sources(graph: StateGraph, name: str) -> list[str]:
+    """Nodes whose only successor is the routing node ``name``."""
+    if any(source == name for source, _ in graph.edges):
+        return []
+    if len(graph.branches.get(name, {})) != 1:
+        return []
+
+    waiting = {source for sources, _ in graph.waiting_edges for source in sources}
+    successors: dict[str, int] = {}
+    for source, _ in graph.edges:
+        successors[source] = successors.get(source, 0) + 1
+    return [
+        source
+        for source, target in sorted(graph.edges)
+        if target == name
+        and source not in (START, name)
+        and successors[source] == 1
+        and source not in graph.branches
+        and source not in waiting
+        and not graph.nodes[source].defer
+        and not (graph.nodes[source].metadata or {}).get(ROUTING_NODE)
+    ]
+
+
+def _add_node(
+    graph: StateGraph,
+    name: str,
+    spec: StateNodeSpec,
+    action: Any,
+    input: Optional[type[Any]] = None,
+) -> None:
+    graph.add_node(
+        name,
+        action,
+        defer=spec.defer,
+        metadata=spec.metadata,
+        input=input or spec.input,
+        retry=spec.retry_policy,
+        cache_policy=spec.cache_policy,
+        destinations=spec.ends or None,
+    )
+
+
+def fold_routing_nodes(graph: StateGraph) -> StateGraph:
+    """
+    Fold the nodes marked with ``ROUTING_NODE`` metadata into the nodes that
+    lead to them.
+
+    A routing node is folded when its only way out is its conditional edges.
+    Every node whose only edge leads to it then runs it right after itself and
+    routes on the result, in the same step. The routing node stays in the
+    graph as the entry point, and as the join of nodes it sends off in
+    parallel, which run as unfolded ``<name>_parallel`` copies. Folded nodes
+    must return their state updates as a dict, and the state must be a dict
+    rather than a model for the routing node to read their updates.
+
+    Returns a new graph, or ``graph`` itself when there is nothing to fold.
+    """
+    if not issubclass(graph.schema, dict):
+        return graph
+
+    folds: dict[str, str] = {}
+    for name, spec in graph.nodes.items():
+        if (spec.metadata or {}).get(ROUTING_NODE):
+            for source in _foldable_sources(graph, name):
+                folds[source] = name
+    if not folds:
+        return graph
+
+    folded = StateGraph(
+        graph.schema,
+        graph.config_schema,
+        input=graph.input,
+        output=graph.output,
+    )
+    for name, spec in graph.nodes.items():
+        if name in folds:
+            routing = folds[name]
+            action = _folded_node(
+                name,
+                spec.runnable,
+                routing,
+                graph.nodes[routing].runnable,
+                graph.channels,
+            )
+            # Both nodes read the state, so the folded one reads all of it
+            _add_node(folded, name, spec, action, input=graph.schema)
+            _add_node(folded, name + PARALLEL_SUFFIX, spec, spec.runnable)
+        else:
+            _add_node(folded, name, spec, spec.runnable)
+
+    for source, target in graph.edges:
+        if source in folds:
+            folded.add_edge(source + PARALLEL_SUFFIX, target)
+        else:
+            folded.add_edge(source, target)
+    for sources, target in graph.waiting_edges:
+        folded.add_edge(list(sources), target)
+
+    for source, branches in graph.branches.items():
+        for branch in branches.values():
+            sources = [source]
+            path: Any = branch.path
+            path_map: Optional[Union[dict[Hashable, str], list[str]]] = branch.ends
+            folded_here = [name for name, routing in folds.items() if routing == source]
+            if folded_here:
+                # The route now returns node names, parallel copies included
+                sources += folded_here
+                path = _folding_route(branch, folded_here)
+                path_map = None
+                if branch.ends is not None:
+                    path_map = list(dict.fromkeys(branch.ends.values())) + [
+                        name + PARALLEL_SUFFIX for name in folded_here
+                    ]
+            for name in sources:
+                folded.add_conditional_edges(name, path, path_map, then=branch.then)
+
+    return folded
+
+
+def compile_workflow(
+    graph: StateGraph, checkpointer: Optional[BaseCheckpointSaver] = None
+) -> CompiledStateGraph:
+    """Compile a workflow graph, folding its routing nodes unless disabled."""
+    if config.fold_routing_nodes:
+        graph = fold_routing_nodes(graph)
+    return graph.compile(checkpointer=checkpointer)
@@ -2,34 +2,91 @@
 Patient-specific workflow that extends the main graph with additional logic.
 """
 
-from typing import Any
+import copy
+from collections.abc import AsyncIterator, Iterable
+from functools import lru_cache
+from typing import Any, Optional, Union
 
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, START, StateGraph
+from pydantic import BaseModel
 
 from ...state import WorkflowState
-from ..main_graph import TriageWorkflow
+from ..main_graph import EMERGENCY_ACTIONS, TriageWorkflow
+from ..optimizer import ROUTING_NODE
+
+
+class PatientWorkflowState(WorkflowState):
+    """Workflow state with the coordinator's progress."""
+
+    workflow_step: Optional[str] = None
+    next_agent: Optional[Union[str, list[str]]] = None
+    specialist_referral: Optional[dict[str, Any]] = None
+
+
+def _as_dict(value: Any) -> dict[str, Any]:
+    """A state value that may be a model, as a dict."""
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    return value or {}
+
+
+def normalize_conditions(conditions: Optional[Iterable[str]]) -> list[str]:
+    """Lowercase, snake_case, deduplicated and sorted patient conditions."""
+    return sorted(
+        {
+            "_".join(condition.lower().replace("-", " ").split())
+            for condition in conditions or []
+            if condition.strip()
+        }
+    )
 
 
 class PatientSpecificWorkflow(TriageWorkflow):
     """
     Extended workflow for patients with specific conditions or requirements.
+    Conditions are read from the ``patient_conditions`` state key, so one
+    compiled graph serves every patient. ``patient_conditions`` given here
+    are added to the initial state of each run that doesn't set its own.
     """
 
-    def __init__(self, patient_conditions: list[str] = None):
-        self.patient_conditions = patient_conditions or []
+    def __init__(self, patient_conditions: Optional[list[str]] = None):
+        self.patient_conditions = normalize_conditions(patient_conditions)
         super().__init__()
 
+    def _with_conditions(self, initial_state: dict[str, Any]) -> dict[str, Any]:
+        if not self.patient_conditions or "patient_conditions" in initial_state:
+            return initial_state
+        return {**initial_state, "patient_conditions": self.patient_conditions}
+
+    async def run(
+        self, initial_state: dict[str, Any], thread_id: Optional[str] = None
+    ) -> dict[str, Any]:
+        return await super().run(self._with_conditions(initial_state), thread_id)
+
+    async def stream(
+        self, initial_state: dict[str, Any], thread_id: Optional[str] = None
+    ) -> AsyncIterator[dict[str, Any]]:
+        async for event in super().stream(
+            self._with_conditions(initial_state), thread_id
+        ):
+            yield event
+
     def _build_graph(self) -> StateGraph:
         """Build an extended graph with patient-specific nodes."""
-        workflow = StateGraph(WorkflowState)
+        workflow = StateGraph(PatientWorkflowState)
 
         # Add all standard nodes
         workflow.add_node("intake", self._intake_node)
         workflow.add_node("triage", self._triage_node)
-        workflow.add_node("coordinator", self._enhanced_coordinator_node)
+        workflow.add_node(
+            "coordinator",
+            self._enhanced_coordinator_node,
+            metadata={ROUTING_NODE: True},
+        )
 
         # Add patient-specific nodes
-        workflow.add_node("specialist_referral", self._specialist_referral_node)
+        workflow.add_node("referral", self._specialist_referral_node)
         workflow.add_node("emergency_protocol", self._emergency_protocol_node)
 
         # Define enhanced workflow
@@ -40,7 +97,7 @@ class PatientSpecificWorkflow(TriageWorkflow):
             {
                 "intake": "intake",
                 "triage": "triage",
-                "specialist_referral": "specialist_referral",
+                "specialist_referral": "referral",
                 "emergency_protocol": "emergency_protocol",
                 "end": END,
             },
@@ -49,22 +106,51 @@ class PatientSpecificWorkflow(TriageWorkflow):
         # Connect all nodes back to coordinator for decision making
         workflow.add_edge("intake", "coordinator")
         workflow.add_edge("triage", "coordinator")
-        workflow.add_edge("specialist_referral", "coordinator")
+        workflow.add_edge("referral", "coordinator")
         workflow.add_edge("emergency_protocol", "coordinator")
 
         return workflow
 
-    async def _enhanced_coordinator_node(self, state: WorkflowState) -> dict[str, Any]:
+    async def _intake_node(
+        self, state: PatientWorkflowState, config: RunnableConfig
+    ) -> dict[str, Any]:
+        """Execute the intake agent and hand back to the coordinator."""
+        update = await super()._intake_node(state, config)
+        return {**update, "workflow_step": "intake_complete"}
+
+    async def _triage_node(
+        self, state: PatientWorkflowState, config: RunnableConfig
+    ) -> dict[str, Any]:
+        """Execute the triage agent and hand back to the coordinator."""
+        update = await super()._triage_node(state, config)
+        return {**update, "workflow_step": "triage_complete"}
+
+    async def _enhanced_coordinator_node(
+        self, state: PatientWorkflowState
+    ) -> dict[str, Any]:
         """Enhanced coordinator with patient-specific logic."""
         current_step = state.get("workflow_step", "init")
         patient_info = state.get("patient_info")
 
+        # Screen the raw transcript for red flags, like the supervisor
+        screen = await self._supervisor_node(state)
+        red_flags = screen.get("red_flags", state.get("red_flags"))
+
         # Standard workflow logic
         if current_step == "init":
-            return {"next_agent": "intake", "workflow_step": "intake_pending"}
+            # Red flags start the emergency protocol alongside intake
+            if red_flags and not state.get("emergency_protocol_activated"):
+                return {
+                    **screen,
+                    "next_agent": ["emergency_protocol", "intake"],
+                    "workflow_step": "intake_pending",
+                }
+            return {**screen, "next_agent": "intake", "workflow_step": "intake_pending"}
         elif current_step == "intake_complete":
             # Check for emergency conditions
-            if self._requires_emergency_protocol(state):
+            if not state.get(
+                "emergency_protocol_activated"
+            ) and self._requires_emergency_protocol(state):
                 return {
                     "next_agent": "emergency_protocol",
                     "workflow_step": "emergency_pending",
@@ -83,18 +169,24 @@ class PatientSpecificWorkflow(TriageWorkflow):
         else:
             return {"next_agent": "end", "workflow_step": "error"}
 
-    def _enhanced_route_next_step(self, state: WorkflowState) -> str:
-        """Enhanced routing with additional options."""
+    def _enhanced_route_next_step(
+        self, state: PatientWorkflowState
+    ) -> Union[str, list[str]]:
+        """Enhanced routing with additional options, possibly in parallel."""
         next_agent = state.get("next_agent", "end")
         return next_agent
 
-    async def _specialist_referral_node(self, state: WorkflowState) -> dict[str, Any]:
+    async def _specialist_referral_node(
+        self, state: PatientWorkflowState
+    ) -> dict[str, Any]:
         """Handle specialist referral logic."""
-        triage_decision = state.get("triage_decision", {})
+        triage_decision = _as_dict(state.get("triage_decision"))
         patient_info = state.get("patient_info", {})
 
         # Determine appropriate specialist based on conditions
-        specialist_type = self._determine_specialist_type(patient_info, triage_decision)
+        specialist_type = self._determine_specialist_type(
+            patient_info, triage_decision, state.get("patient_conditions") or []
+        )
 
         return {
             "specialist_referral": {
@@ -105,22 +197,27 @@ class PatientSpecificWorkflow(TriageWorkflow):
             "workflow_step": "referral_complete",
         }
 
-    async def _emergency_protocol_node(self, state: WorkflowState) -> dict[str, Any]:
+    async def _emergency_protocol_node(
+        self, state: PatientWorkflowState
+    ) -> dict[str, Any]:
         """Handle emergency protocol activation."""
         patient_info = state.get("patient_info", {})
 
-        return {
+        update = {
             "emergency_protocol_activated": True,
-            "emergency_actions": [
-                "immediate_medical_attention",
-                "alert_emergency_team",
-                "prepare_emergency_room",
-            ],
-            "workflow_step": "emergency_complete",
+            "emergency_actions": EMERGENCY_ACTIONS,
         }
+        # Alongside intake, intake reports the step back to the coordinator
+        if state.get("workflow_step") == "emergency_pending":
+            update["workflow_step"] = "emergency_complete"
+        return update
 
-    def _requires_emergency_protocol(self, state: WorkflowState) -> bool:
+    def _requires_emergency_protocol(self, state: PatientWorkflowState) -> bool:
         """Check if emergency protocol should be activated."""
+        # Red flags found in the raw transcript by the coordinator
+        if state.get("red_flags"):
+            return True
+
         intake_data = state.get("intake_data", {})
 
         # Example emergency indicators
@@ -129,10 +226,10 @@ class PatientSpecificWorkflow(TriageWorkflow):
 
         return any(symptom in emergency_symptoms for symptom in symptoms)
 
-    def _requires_specialist_referral(self, state: WorkflowState) -> bool:
+    def _requires_specialist_referral(self, state: PatientWorkflowState) -> bool:
         """Check if specialist referral is needed."""
-        triage_decision = state.get("triage_decision", {})
-        patient_conditions = self.patient_conditions
+        triage_decision = _as_dict(state.get("triage_decision"))
+        patient_conditions = state.get("patient_conditions") or []
 
         # Check for conditions requiring specialist care
         specialist_conditions = ["diabetes", "heart_disease", "cancer"]
@@ -142,11 +239,12 @@ class PatientSpecificWorkflow(TriageWorkflow):
         )
 
     def _determine_specialist_type(
-        self, patient_info: dict[str, Any], triage_decision: dict[str, Any]
+        self,
+        patient_info: dict[str, Any],
+        triage_decision: dict[str, Any],
+        conditions: list[str],
     ) -> str:
         """Determine the appropriate specialist type."""
-        conditions = self.patient_conditions
-
         if "heart_disease" in conditions or "chest_pain" in str(patient_info):
             return "cardiologist"
         elif "diabetes" in conditions:
@@ -157,9 +255,21 @@ class PatientSpecificWorkflow(TriageWorkflow):
             return "general_specialist"
 
 
+@lru_cache(maxsize=1)
+def get_patient_workflow() -> PatientSpecificWorkflow:
+    """Get the shared patient workflow, compiling its graph on first use."""
+    return PatientSpecificWorkflow()
+
+
 # Factory function for creating patient-specific workflows
 def create_patient_workflow(
-    patient_conditions: list[str] = None,
+    patient_conditions: Optional[list[str]] = None,
 ) -> PatientSpecificWorkflow:
-    """Create a patient-specific workflow instance."""
-    return PatientSpecificWorkflow(patient_conditions)
+    """
+    Create a patient-specific workflow instance.
+    Instances share the compiled graph and checkpointer of the shared
+    workflow and only differ in the conditions they add to the state.
+    """
+    workflow = copy.copy(get_patient_workflow())
+    workflow.patient_conditions = normalize_conditions(patient_conditions)
+    return workflow
@@ -1,9 +1,49 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from src.api import router
+from src.agents import get_intake_agent, get_triage_agent
+from src.api import board_router, router
+from src.board import get_triage_board
+from src.checkpoint import get_checkpointer
+from src.core.degradation import get_degradation_controller
+from src.core.jobs import get_job_queue
+from src.core.metrics import CONTENT_TYPE, HTTP_REQUEST_SECONDS, registry
+from src.core.resilience import get_executor
+from src.core.scheduler import get_scheduler
+from src.core.tracing import (
+    PROFILE_HEADER,
+    SPAN_KIND_SERVER,
+    TRACE_HEADER,
+    get_tracer,
+    profile,
+    span,
+)
+from src.graphs import get_triage_workflow
+from src.repositories import get_patient_repository
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up graphs and model clients before serving, release them on shutdown."""
+    get_triage_workflow()
+    get_intake_agent().warmup()
+    get_job_queue().start()
+    yield
+    await get_job_queue().stop()
+    checkpointer = get_checkpointer()
+    if hasattr(checkpointer, "close"):
+        checkpointer.close()
+    repository = get_patient_repository()
+    if hasattr(repository, "close"):
+        repository.close()
+    if (tracer := get_tracer()) is not None:
+        tracer.close()
+
 
-app = FastAPI(title="TriageFlow API", version="1.0.0")
+app = FastAPI(title="TriageFlow API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -14,3 +54,71 @@ app.add_middleware(
 )
 
 app.include_router(router, prefix="/api/agents", tags=["agents"])
+app.include_router(board_router, prefix="/api/board", tags=["board"])
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Record the latency of every request by handler and status."""
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method,
+            handler=route.name if route else "unmatched",
+            status=status,
+        )
+
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    """Trace the request, profiling it when sampled or asked to."""
+    with span(
+        f"{request.method} {request.url.path}",
+        SPAN_KIND_SERVER,
+        **{"http.method": request.method, "url.path": request.url.path},
+    ) as root:
+        if root is None:
+            return await call_next(request)
+
+        requested = request.headers.get(PROFILE_HEADER, "").lower() in ("1", "true")
+        with profile(root, requested):
+            response = await call_next(request)
+
+        # Streamed bodies outlive the span, their nodes are exported after it
+        route = request.scope.get("route")
+        root.set_attribute("http.handler", route.name if route else "unmatched")
+        root.set_attribute("http.status_code", response.status_code)
+        if response.status_code >= 500:
+            root.error = f"HTTP {response.status_code}"
+        response.headers[TRACE_HEADER] = root.trace.trace_id
+        return response
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Expose metrics in the Prometheus text format."""
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
+
+def _stats_of(component: object) -> object:
+    return component.stats() if hasattr(component, "stats") else None
+
+
+registry.add_stats("checkpoint", lambda: _stats_of(get_checkpointer()))
+registry.add_stats("extraction_cache", lambda: _stats_of(get_intake_agent().cache))
+registry.add_stats("patient_cache", lambda: _stats_of(get_patient_repository()))
+registry.add_stats("scheduler", lambda: get_scheduler().stats())
+registry.add_stats("intake_executor", lambda: get_executor("intake").stats())
+registry.add_stats("triage_executor", lambda: get_executor("triage").stats())
+registry.add_stats("degradation", lambda: get_degradation_controller().stats())
+registry.add_stats("speculative_triage", lambda: get_triage_agent().stats())
+registry.add_stats("jobs", lambda: get_job_queue().stats())
+registry.add_stats("board", lambda: get_triage_board().stats())
+registry.add_stats("tracing", lambda: _stats_of(get_tracer()))
@@ -0,0 +1,54 @@
+"""
+Data access for records stored outside the workflow state.
+"""
+
+from functools import lru_cache
+
+from src.core import config
+
+from .patients import (
+    MOCK_PATIENTS,
+    UNKNOWN_PATIENT,
+    CachedPatientRepository,
+    InMemoryPatientRepository,
+    PatientRecord,
+    PatientRepository,
+    SQLitePatientRepository,
+)
+
+
+@lru_cache(maxsize=1)
+def get_patient_repository() -> PatientRepository:
+    """
+    Get the process-wide patient repository selected by
+    ``config.patient_store_type``, seeded with the mock patients.
+    """
+    if config.patient_store_type == "in_memory":
+        repository = InMemoryPatientRepository(MOCK_PATIENTS)
+    elif config.patient_store_type == "sqlite":
+        repository = SQLitePatientRepository(config.patient_db_path)
+        repository.seed(MOCK_PATIENTS)
+    else:
+        raise ValueError(f"Unsupported patient store type: {config.patient_store_type}")
+
+    if not config.patient_cache_enabled:
+        return repository
+
+    return CachedPatientRepository(
+        repository,
+        max_size=config.patient_cache_size,
+        ttl_seconds=config.patient_cache_ttl_seconds,
+        negative_ttl_seconds=config.patient_cache_negative_ttl_seconds,
+    )
+
+
+__all__ = [
+    "CachedPatientRepository",
+    "InMemoryPatientRepository",
+    "MOCK_PATIENTS",
+    "PatientRecord",
+    "PatientRepository",
+    "SQLitePatientRepository",
+    "UNKNOWN_PATIENT",
+    "get_patient_repository",
+]
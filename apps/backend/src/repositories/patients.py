@@ -0,0 +1,242 @@
+"""
+Patient record stores behind a common async interface.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Iterable, Mapping, Sequence
+from typing import Any, Optional
+
+from src.core.cache import LRUCache
+
+PatientRecord = dict[str, Any]
+
+# Seed data for local development until the EHR integration lands
+MOCK_PATIENTS: dict[str, PatientRecord] = {
+    "P001": {
+        "name": "John Doe",
+        "age": 45,
+        "gender": "Male",
+        "medical_history": ["Hypertension", "Type 2 Diabetes"],
+        "allergies": ["Penicillin", "Nuts"],
+        "current_medications": ["Metformin", "Lisinopril"],
+        "emergency_contact": "Jane Doe - 555-0123",
+    },
+    "P002": {
+        "name": "Sarah Smith",
+        "age": 32,
+        "gender": "Female",
+        "medical_history": ["Asthma"],
+        "allergies": ["Latex"],
+        "current_medications": ["Albuterol inhaler"],
+        "emergency_contact": "Mike Smith - 555-0456",
+    },
+    "P003": {
+        "name": "Robert Johnson",
+        "age": 67,
+        "gender": "Male",
+        "medical_history": ["Heart Disease", "Arthritis"],
+        "allergies": ["Aspirin"],
+        "current_medications": ["Metoprolol", "Ibuprofen"],
+        "emergency_contact": "Mary Johnson - 555-0789",
+    },
+}
+
+UNKNOWN_PATIENT: PatientRecord = {
+    "name": "Unknown Patient",
+    "age": None,
+    "gender": "Unknown",
+    "medical_history": [],
+    "allergies": [],
+    "current_medications": [],
+    "emergency_contact": "Not provided",
+}
+
+
+class PatientRepository(ABC):
+    """Read access to patient records by patient ID."""
+
+    async def get(self, patient_id: str) -> Optional[PatientRecord]:
+        """Get a patient record, or None if the patient is unknown."""
+        return (await self.get_many([patient_id])).get(patient_id)
+
+    @abstractmethod
+    async def get_many(self, patient_ids: Iterable[str]) -> dict[str, PatientRecord]:
+        """Get the records of many patients at once, omitting unknown IDs."""
+
+
+class InMemoryPatientRepository(PatientRepository):
+    """Patient records held in a dict."""
+
+    def __init__(self, records: Optional[Mapping[str, PatientRecord]] = None):
+        self.records = dict(records or {})
+
+    async def get_many(self, patient_ids: Iterable[str]) -> dict[str, PatientRecord]:
+        return {
+            patient_id: self.records[patient_id]
+            for patient_id in patient_ids
+            if patient_id in self.records
+        }
+
+
+class SQLitePatientRepository(PatientRepository):
+    """
+    Patient records in SQLite, keyed and indexed by patient ID.
+    Stands in for the EHR during local development. Queries run in a worker
+    thread, and batch lookups are a single indexed ``IN`` query per chunk.
+    """
+
+    # Stay well below SQLite's limit on bound parameters
+    max_batch_size = 500
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS patients (patient_id TEXT PRIMARY KEY, "
+                "record TEXT NOT NULL) WITHOUT ROWID"
+            )
+
+    def seed(self, records: Mapping[str, PatientRecord]) -> None:
+        """Insert records for patients not stored yet."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO patients VALUES (?, ?)",
+                [(patient_id, json.dumps(r)) for patient_id, r in records.items()],
+            )
+
+    def _select(self, patient_ids: Sequence[str]) -> dict[str, PatientRecord]:
+        records = {}
+        with self._lock:
+            for i in range(0, len(patient_ids), self.max_batch_size):
+                chunk = patient_ids[i : i + self.max_batch_size]
+                rows = self._conn.execute(
+                    "SELECT patient_id, record FROM patients WHERE patient_id IN "
+                    f"({', '.join('?' * len(chunk))})",
+                    chunk,
+                )
+                records.update((pid, json.loads(record)) for pid, record in rows)
+        return records
+
+    async def get_many(self, patient_ids: Iterable[str]) -> dict[str, PatientRecord]:
+        patient_ids = list(dict.fromkeys(patient_ids))
+        if not patient_ids:
+            return {}
+        return await asyncio.to_thread(self._select, patient_ids)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+_UNKNOWN = object()
+
+
+class CachedPatientRepository(PatientRepository):
+    """
+    Read-through cache in front of another repository.
+
+    Known patients are cached for ``ttl_seconds`` and unknown IDs for
+    ``negative_ttl_seconds``. Lookups made in the same event loop iteration,
+    such as the concurrent runs of a batch, are coalesced into one
+    ``get_many`` call on the underlying repository, and an ID already being
+    fetched is not fetched again.
+    """
+
+    def __init__(
+        self,
+        repository: PatientRepository,
+        *,
+        max_size: int = 4096,
+        ttl_seconds: float = 300,
+        negative_ttl_seconds: float = 60,
+    ):
+        self.repository = repository
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self._cache = LRUCache(max_size, ttl_seconds)
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._pending: dict[str, asyncio.Future] = {}
+
+    def stats(self) -> dict[str, Any]:
+        """Get hit/miss counters and the number of underlying fetches."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "fetches": self.fetches,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._cache),
+        }
+
+    async def get_many(self, patient_ids: Iterable[str]) -> dict[str, PatientRecord]:
+        loop = asyncio.get_running_loop()
+        waiting: dict[str, asyncio.Future] = {}
+        records = {}
+
+        for patient_id in dict.fromkeys(patient_ids):
+            record = self._cache.get(patient_id)
+            if record is not None:
+                self.hits += 1
+                if record is not _UNKNOWN:
+                    records[patient_id] = record
+                continue
+
+            future = self._inflight.get(patient_id)
+            if future is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                if not self._pending:
+                    loop.call_soon(self._flush)
+                future = self._inflight[patient_id] = loop.create_future()
+                self._pending[patient_id] = future
+            waiting[patient_id] = future
+
+        for patient_id, future in waiting.items():
+            record = await asyncio.shield(future)
+            if record is not _UNKNOWN:
+                records[patient_id] = record
+
+        return records
+
+    def _flush(self) -> None:
+        """Fetch every ID requested since the last flush in one call."""
+        batch, self._pending = self._pending, {}
+        if batch:
+            asyncio.ensure_future(self._fetch(batch))
+
+    async def _fetch(self, batch: dict[str, asyncio.Future]) -> None:
+        self.fetches += 1
+        try:
+            found = await self.repository.get_many(batch)
+        except Exception as e:
+            for patient_id, future in batch.items():
+                self._inflight.pop(patient_id, None)
+                future.set_exception(e)
+                # Waiters retrieve the error themselves; don't warn if there are none
+                future.exception()
+            return
+
+        for patient_id, future in batch.items():
+            record = found.get(patient_id)
+            if record is None:
+                self._cache.set(patient_id, _UNKNOWN, self.negative_ttl_seconds)
+            else:
+                self._cache.set(patient_id, record)
+            self._inflight.pop(patient_id, None)
+            future.set_result(_UNKNOWN if record is None else record)
+
+    def clear(self) -> None:
+        """Drop all cached records."""
+        self._cache.clear()
+
+    def close(self) -> None:
+        if hasattr(self.repository, "close"):
+            self.repository.close()
@@ -20,6 +20,13 @@ class IntakeConversationInfo(BaseModel):
     additional_notes: str = Field(description="any other relevant information")
 
 
+class RedFlag(BaseModel):
+    """Emergency indicator found in the raw transcript."""
+
+    flag: str = Field(description="canonical red flag, e.g. chest_pain")
+    term: str = Field(description="phrase in the transcript that matched")
+
+
 class PatientInfo(BaseModel):
     """Patient information model."""
 
@@ -51,6 +58,21 @@ class WorkflowState(MessagesState):
 
     # Agent outputs
     intake_conversation_info: Optional[IntakeConversationInfo] = None
+    # Messages already extracted into intake_conversation_info
+    intake_message_count: int = 0
+    # Degradation tier the latest extraction ran on, e.g. "primary"
+    intake_tier: Optional[str] = None
+    patient_details: Optional[dict[str, Any]] = None
+    # Known conditions, normalized, e.g. ["diabetes", "heart_disease"]
+    patient_conditions: Optional[list[str]] = None
+
+    # Triage decision on the latest intake info
+    triage_decision: Optional[TriageDecision] = None
+
+    # Emergency detection
+    red_flags: Optional[list[RedFlag]] = None
+    emergency_protocol_activated: bool = False
+    emergency_actions: list[str] = []
 
     # Workflow control
     last_node: Optional[str] = None
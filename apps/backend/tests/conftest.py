@@ -1 +1,20 @@
 """Unit tests configuration module."""
+
+import pytest
+
+from src.core import config
+from src.core.degradation import get_degradation_controller
+
+
+@pytest.fixture(autouse=True)
+def without_triage(monkeypatch):
+    """Workflows stop after intake unless a test enables the triage agent."""
+    monkeypatch.setattr(config, "triage_enabled", False)
+
+
+@pytest.fixture(autouse=True)
+def fresh_degradation_controller():
+    """Every test starts on the primary tier."""
+    get_degradation_controller.cache_clear()
+    yield
+    get_degradation_controller.cache_clear()
@@ -0,0 +1,139 @@
+"""Batch intake unit test module."""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+from langchain_core.messages import HumanMessage
+
+from src.agents import intake_agent
+from src.agents.intake import ExtractionBatcher
+from src.core import config, resilience
+from src.main import app
+from src.repositories import get_patient_repository
+from src.state import IntakeConversationInfo
+
+
+class FakeStructuredModel:
+    """Structured model stand-in that records how it was called."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    async def ainvoke(self, messages):
+        self.batch_sizes.append(1)
+        return messages[-1].content
+
+    async def abatch(self, inputs, return_exceptions=False):
+        self.batch_sizes.append(len(inputs))
+        return [
+            ValueError("boom")
+            if "fail" in messages[-1].content
+            else messages[-1].content
+            for messages in inputs
+        ]
+
+
+def test_batcher_coalesces_concurrent_calls():
+    """Concurrent submissions are sent to the model as a single batch."""
+    model = FakeStructuredModel()
+    batcher = ExtractionBatcher(window_ms=5, max_size=16)
+
+    async def run():
+        return await asyncio.gather(
+            *(batcher.submit(model, [HumanMessage(content=f"c{i}")]) for i in range(5)),
+            batcher.submit(model, [HumanMessage(content="fail")]),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(run())
+
+    assert model.batch_sizes == [6]
+    assert results[:5] == ["c0", "c1", "c2", "c3", "c4"]
+    assert isinstance(results[5], ValueError)
+
+
+def test_batch_endpoint_reports_per_item_errors(monkeypatch):
+    """A failing conversation does not sink the rest of the batch."""
+
+    async def fake_parse(conversation):
+        if conversation == "fail":
+            raise RuntimeError("model unavailable")
+        return IntakeConversationInfo(
+            symptoms=["cough"],
+            pain_level=2,
+            chief_complaint=conversation,
+            additional_notes="",
+        )
+
+    async def fake_run(state, config=None):
+        result = await fake_parse(state["messages"][-1].content)
+        return {**state, "intake_conversation_info": result}
+
+    monkeypatch.setattr(intake_agent, "run", fake_run)
+
+    client = TestClient(app)
+    response = client.post(
+        "/api/agents/patient/intake/batch",
+        json={"conversations": ["first", "fail", "third"], "max_concurrency": 2},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "partial"
+    assert [item["status"] for item in body["results"]] == [
+        "completed",
+        "failed",
+        "completed",
+    ]
+    assert "model unavailable" in body["results"][1]["error"]
+
+
+def test_batch_endpoint_runs_under_the_default_timeout(monkeypatch):
+    """Without a timeout header, the batch runs under the configured one."""
+    remaining = []
+
+    async def fake_run(state, config=None):
+        remaining.append(resilience.remaining_seconds())
+        return state
+
+    monkeypatch.setattr(intake_agent, "run", fake_run)
+
+    response = TestClient(app).post(
+        "/api/agents/patient/intake/batch", json={"conversations": ["first"]}
+    )
+
+    assert response.status_code == 200
+    assert remaining and 0 < remaining[0] <= config.timeout_seconds
+
+
+def test_batch_endpoint_survives_a_failed_patient_prewarm(monkeypatch):
+    """A failed prewarm leaves each item's history lookup to report it."""
+
+    async def fake_parse(conversation, config=None):
+        return IntakeConversationInfo(
+            symptoms=["cough"],
+            pain_level=2,
+            chief_complaint=conversation,
+            additional_notes="",
+        )
+
+    async def failing_get_many(patient_ids):
+        raise ConnectionError("EHR unavailable")
+
+    monkeypatch.setattr(intake_agent, "_llm_parse_conversation", fake_parse)
+    repository = get_patient_repository()
+    monkeypatch.setattr(repository.repository, "get_many", failing_get_many)
+    repository.clear()
+
+    response = TestClient(app).post(
+        "/api/agents/patient/intake/batch",
+        json={"conversations": ["cough"], "patient_ids": ["P003"]},
+    )
+
+    assert response.status_code == 200
+    [item] = response.json()["results"]
+    assert item["status"] == "completed"
+    assert item["result"]["intake_conversation_info"]["pain_level"] == 2
+    assert item["result"]["errors"] == [
+        "Error retrieving patient history: EHR unavailable"
+    ]
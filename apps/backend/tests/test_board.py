@@ -0,0 +1,157 @@
+"""Triage board unit test module."""
+
+import random
+
+import pytest
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+from src.agents import intake_agent
+from src.board import Department, FenwickTree, get_triage_board
+from src.main import app
+
+
+def apply_diff(entries, diff):
+    """Apply a diff the way a client does: list positions are ranks."""
+    if diff["op"] == "snapshot":
+        return [entry["entry_id"] for entry in diff["entries"]]
+    if diff["op"] in ("remove", "move"):
+        rank = diff["rank"] if diff["op"] == "remove" else diff["from_rank"]
+        del entries[rank]
+    if diff["op"] in ("insert", "move"):
+        entries.insert(diff["entry"]["rank"], diff["entry"]["entry_id"])
+    return entries
+
+
+def test_fenwick_tree_prefix_sums():
+    """Prefix sums reflect every update."""
+    tree = FenwickTree(10)
+    for position in (0, 3, 3, 9):
+        tree.add(position, 1)
+    tree.add(3, -1)
+    assert [tree.prefix_sum(end) for end in (0, 1, 4, 10, 99)] == [0, 1, 2, 3, 3]
+
+
+def test_board_order_ranks_and_diffs_match_a_full_sort():
+    """Random admissions, moves and discharges stay consistent."""
+    board = Department("ed", service_minutes=10, providers=2)
+    subscription = board.subscribe(max_pending=100_000)
+    client_view = apply_diff([], board.snapshot())
+    rng = random.Random(7)
+    arrivals = []
+
+    for i in range(600):
+        waiting = [entry.entry_id for entry in board._heap]
+        action = rng.random()
+        if not waiting or action < 0.5:
+            board.admit(f"p{i}", rng.randint(1, 5))
+            arrivals.append(f"p{i}")
+        elif action < 0.75:
+            board.reprioritize(rng.choice(waiting), rng.randint(1, 5))
+        else:
+            board.discharge(rng.choice(waiting))
+
+    while not subscription._queue.empty():
+        client_view = apply_diff(client_view, subscription._queue.get_nowait())
+
+    # Most urgent first, then by arrival
+    order = sorted(
+        board._heap,
+        key=lambda entry: (entry.esi_level, arrivals.index(entry.entry_id)),
+    )
+    expected = [entry.entry_id for entry in order]
+    assert [entry["entry_id"] for entry in board.snapshot()["entries"]] == expected
+    assert client_view == expected
+    assert [board.rank(entry) for entry in order] == list(range(len(order)))
+    assert board.next_patient().entry_id == expected[0]
+
+    entry = board.describe(order[-1])
+    assert entry["estimated_wait_minutes"] == round((len(order) - 1) * 10 / 2)
+    assert board.describe(order[0])["estimated_wait_minutes"] == 0
+
+
+def test_slow_subscribers_resynchronize_from_a_snapshot():
+    """A subscriber too far behind gets a snapshot instead of the backlog."""
+    board = Department("ed", service_minutes=10, providers=1)
+    subscription = board.subscribe(max_pending=2)
+    for i in range(5):
+        board.admit(f"p{i}", 3)
+
+    diff = subscription._queue.get_nowait()
+    assert diff is None and subscription._stale
+    subscription.close()
+    assert not board.subscribers
+
+
+def test_board_api_and_websocket_push_diffs(monkeypatch):
+    """REST changes reach WebSocket subscribers as diffs."""
+    monkeypatch.setattr(intake_agent, "warmup", lambda: True)
+    get_triage_board.cache_clear()
+
+    client = TestClient(app)
+    with client, client.websocket_connect("/api/board/ed/ws") as websocket:
+        snapshot = websocket.receive_json()
+        assert (snapshot["op"], snapshot["entries"]) == ("snapshot", [])
+
+        response = client.post(
+            "/api/board/ed/patients", json={"entry_id": "a", "esi_level": 4}
+        )
+        assert response.status_code == 201
+        client.post("/api/board/ed/patients", json={"entry_id": "b", "esi_level": 2})
+        assert websocket.receive_json()["entry"]["rank"] == 0
+        diff = websocket.receive_json()
+        assert (diff["op"], diff["entry"]["entry_id"], diff["entry"]["rank"]) == (
+            "insert",
+            "b",
+            0,
+        )
+
+        response = client.patch("/api/board/ed/patients/a", json={"esi_level": 1})
+        assert response.json()["rank"] == 0
+        diff = websocket.receive_json()
+        assert (diff["op"], diff["from_rank"], diff["version"]) == ("move", 1, 3)
+
+        assert client.delete("/api/board/ed/patients/b").status_code == 200
+        assert websocket.receive_json() == {
+            "op": "remove",
+            "entry_id": "b",
+            "rank": 1,
+            "department": "ed",
+            "version": 4,
+        }
+
+        assert client.get("/api/board/ed/patients/b").status_code == 404
+        response = client.post(
+            "/api/board/ed/patients", json={"entry_id": "a", "esi_level": 3}
+        )
+        assert response.status_code == 409
+        board = client.get("/api/board/ed").json()
+        assert [entry["entry_id"] for entry in board["entries"]] == ["a"]
+        assert client.get("/api/board/stats").json()["subscribers"]["ed"] == 1
+
+    get_triage_board.cache_clear()
+
+
+def test_reads_of_unknown_departments_create_nothing(monkeypatch):
+    """Only the configured departments and admits open a department."""
+    monkeypatch.setattr(intake_agent, "warmup", lambda: True)
+    get_triage_board.cache_clear()
+
+    client = TestClient(app)
+    with client:
+        assert client.get("/api/board/nowhere").status_code == 404
+        assert client.get("/api/board/nowhere/patients/a").status_code == 404
+        assert client.delete("/api/board/nowhere/patients/a").status_code == 404
+        url = "/api/board/nowhere/ws"
+        with pytest.raises(WebSocketDisconnect) as e, client.websocket_connect(url):
+            pass
+        assert e.value.code == 1008
+        assert client.get("/api/board/stats").json()["waiting"] == {"ed": 0}
+
+        response = client.post(
+            "/api/board/icu/patients", json={"entry_id": "a", "esi_level": 2}
+        )
+        assert response.status_code == 201
+        assert client.get("/api/board/icu").json()["total"] == 1
+
+    get_triage_board.cache_clear()
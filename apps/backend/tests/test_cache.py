@@ -0,0 +1,88 @@
+"""Extraction cache unit test module."""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from src.agents import intake_agent
+from src.agents.intake import extraction_cache_key
+from src.core.cache import LRUCache, SQLiteCache, TieredCache
+from src.main import app
+from src.state import IntakeConversationInfo
+
+EXTRACTED = IntakeConversationInfo(
+    symptoms=["fever"],
+    pain_level=3,
+    chief_complaint="Fever for two days",
+    additional_notes="",
+)
+
+
+class CountingModel:
+    """Structured model stand-in counting how often it is called."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return EXTRACTED
+
+
+def test_cache_key_normalizes_whitespace():
+    """Resubmitted transcripts differing only in whitespace share a key."""
+    assert extraction_cache_key("Patient:  fever\n for two days ") == (
+        extraction_cache_key("Patient: fever for two days")
+    )
+    assert extraction_cache_key("fever") != extraction_cache_key("cough")
+
+
+def test_repeated_extraction_is_served_from_cache(monkeypatch):
+    """Retries and concurrent duplicates cost a single model call."""
+    model = CountingModel()
+    monkeypatch.setattr(intake_agent, "_structured_model", model)
+    monkeypatch.setattr(intake_agent._batcher, "window", 0)
+    intake_agent.cache.clear()
+
+    async def run():
+        return await asyncio.gather(
+            *(
+                intake_agent._llm_parse_conversation("Patient: fever, two days")
+                for _ in range(3)
+            )
+        )
+
+    assert asyncio.run(run()) == [EXTRACTED] * 3
+    asyncio.run(intake_agent._llm_parse_conversation("Patient:  fever, two days"))
+    assert model.calls == 1
+
+    stats = TestClient(app).get("/api/agents/intake/cache/stats").json()
+    assert stats["enabled"] is True
+    assert stats["hits"] >= 3
+
+
+def test_disk_tier_survives_restart_and_schema_changes(tmp_path):
+    """Entries persist on disk but are dropped when the namespace changes."""
+    path = str(tmp_path / "cache.db")
+
+    def make_cache(namespace):
+        return TieredCache(
+            LRUCache(max_size=8, ttl_seconds=60),
+            SQLiteCache(path, namespace=namespace, ttl_seconds=60),
+            dumps=IntakeConversationInfo.model_dump_json,
+            loads=IntakeConversationInfo.model_validate_json,
+        )
+
+    cache = make_cache("schema-v1")
+    asyncio.run(cache.set("key", EXTRACTED))
+    cache.disk.close()
+
+    cache = make_cache("schema-v1")
+    assert asyncio.run(cache.get("key")) == EXTRACTED
+    assert cache.stats()["disk_hits"] == 1
+    cache.disk.close()
+
+    cache = make_cache("schema-v2")
+    assert asyncio.run(cache.get("key")) is None
+    cache.disk.close()
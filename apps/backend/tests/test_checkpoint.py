@@ -0,0 +1,205 @@
+"""Checkpointer unit test module."""
+
+import asyncio
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.messages import HumanMessage
+
+from src.agents import intake_agent
+from src.checkpoint import BoundedMemorySaver, SQLiteSaver
+from src.checkpoint import memory as bounded_memory
+from src.core import config
+from src.graphs import triage_workflow
+from src.graphs.main_graph import TriageWorkflow
+from src.main import app
+from src.state import IntakeConversationInfo
+
+
+async def fake_parse(conversation, config=None):
+    return IntakeConversationInfo(
+        symptoms=["headache"],
+        pain_level=4,
+        chief_complaint=conversation,
+        additional_notes="",
+    )
+
+
+def test_sqlite_saver_persists_across_instances(tmp_path, monkeypatch):
+    """Checkpoints written by one saver are readable by a fresh one."""
+    monkeypatch.setattr(intake_agent, "_llm_parse_conversation", fake_parse)
+    path = str(tmp_path / "checkpoints.db")
+
+    workflow = TriageWorkflow()
+    workflow.memory = SQLiteSaver(path, flush_interval_ms=1)
+    workflow.app = workflow.graph.compile(checkpointer=workflow.memory)
+
+    async def run_many():
+        await asyncio.gather(
+            *(
+                workflow.run(
+                    {"messages": [HumanMessage(content=f"visit {i}")]},
+                    thread_id=f"thread-{i}",
+                )
+                for i in range(10)
+            )
+        )
+
+    asyncio.run(run_many())
+    workflow.memory.close()
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    conn.close()
+
+    reader = SQLiteSaver(path)
+    saved = reader.get_tuple({"configurable": {"thread_id": "thread-3"}})
+    assert saved.checkpoint["channel_values"]["intake_conversation_info"] == (
+        IntakeConversationInfo(
+            symptoms=["headache"],
+            pain_level=4,
+            chief_complaint="visit 3",
+            additional_notes="",
+        )
+    )
+    history = list(
+        reader.list({"configurable": {"thread_id": "thread-3", "checkpoint_ns": ""}})
+    )
+    assert history[0].config == saved.config
+    assert [h.metadata["step"] for h in history] == [3, 2, 1, 0, -1]
+    reader.close()
+
+
+def test_workflow_status_reads_latest_checkpoint(monkeypatch):
+    """The status endpoint reports completed threads and 404s unknown ones."""
+    monkeypatch.setattr(intake_agent, "_llm_parse_conversation", fake_parse)
+
+    asyncio.run(
+        triage_workflow.run(
+            {"messages": [HumanMessage(content="headache")]},
+            thread_id="status-thread",
+        )
+    )
+
+    client = TestClient(app)
+    response = client.get("/api/agents/workflow/status/status-thread")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "completed"
+    assert body["current_step"] == "intake"
+    assert body["next_steps"] == []
+
+    response = client.get("/api/agents/workflow/status/unknown-thread")
+    assert response.status_code == 404
+
+
+def run_threads(memory, thread_ids):
+    """Run the triage workflow once per thread ID against the given saver."""
+    workflow = TriageWorkflow()
+    workflow.memory = memory
+    workflow.app = workflow.graph.compile(checkpointer=memory)
+
+    async def run_all():
+        for thread_id in thread_ids:
+            await workflow.run(
+                {"messages": [HumanMessage(content=thread_id)]}, thread_id=thread_id
+            )
+
+    asyncio.run(run_all())
+
+
+def test_bounded_memory_evicts_least_recently_used_threads(monkeypatch):
+    """Threads beyond the budget are evicted oldest-first without leaking."""
+    monkeypatch.setattr(intake_agent, "_llm_parse_conversation", fake_parse)
+    memory = BoundedMemorySaver(max_threads=2, ttl_seconds=0, max_bytes=0)
+
+    run_threads(memory, ["a", "b"])
+    assert memory.get_tuple({"configurable": {"thread_id": "a"}}) is not None
+
+    run_threads(memory, ["c"])
+
+    assert memory.get_tuple({"configurable": {"thread_id": "b"}}) is None
+    assert memory.get_tuple({"configurable": {"thread_id": "a"}}) is not None
+    assert set(memory.storage) == {"a", "c"}
+    assert {key[0] for key in memory.blobs} == {"a", "c"}
+    assert {key[0] for key in memory.writes} <= {"a", "c"}
+
+    stats = memory.stats()
+    assert stats["threads"] == 2
+    assert stats["evictions"] == 1
+    assert stats["resident_bytes"] > 0
+
+
+def test_bounded_memory_respects_byte_budget_and_ttl(monkeypatch):
+    """Idle threads expire and the byte budget bounds the resident size."""
+    monkeypatch.setattr(intake_agent, "_llm_parse_conversation", fake_parse)
+    memory = BoundedMemorySaver(max_threads=0, ttl_seconds=60, max_bytes=0)
+    run_threads(memory, ["only"])
+    single_thread_bytes = memory.resident_bytes
+
+    memory = BoundedMemorySaver(
+        max_threads=0, ttl_seconds=60, max_bytes=3 * single_thread_bytes
+    )
+    run_threads(memory, [f"t{i}" for i in range(10)])
+    assert memory.resident_bytes <= 3 * single_thread_bytes
+    assert memory.stats()["evictions"] == 7
+
+    now = bounded_memory.time.monotonic()
+    monkeypatch.setattr(bounded_memory.time, "monotonic", lambda: now + 61)
+    assert memory.get_tuple({"configurable": {"thread_id": "t9"}}) is None
+    assert memory.stats()["expirations"] == 1
+
+
+def test_run_generates_a_thread_per_request(monkeypatch):
+    """Requests without a thread ID no longer share a default thread."""
+    monkeypatch.setattr(intake_agent, "_llm_parse_conversation", fake_parse)
+
+    client = TestClient(app)
+    first = client.post("/api/agents/patient/intake", json={"conversation": "one"})
+    second = client.post("/api/agents/patient/intake", json={"conversation": "two"})
+    assert first.json()["thread_id"] != second.json()["thread_id"]
+
+    supplied = client.post(
+        "/api/agents/patient/intake",
+        json={"conversation": "three", "thread_id": "caller-thread"},
+    )
+    assert supplied.json()["thread_id"] == "caller-thread"
+
+
+def test_sqlite_saver_stores_each_channel_version_once(tmp_path, monkeypatch):
+    """The conversation is written once, not into every step's checkpoint."""
+    monkeypatch.setattr(intake_agent, "_llm_parse_conversation", fake_parse)
+    memory = SQLiteSaver(str(tmp_path / "checkpoints.db"), flush_interval_ms=1)
+    run_threads(memory, ["blobs"])
+
+    conn = memory._reader
+    messages = conn.execute(
+        "SELECT COUNT(*) FROM blobs WHERE thread_id = 'blobs' AND channel = 'messages'"
+    ).fetchone()[0]
+    assert messages == 1
+    for saved in memory.list({"configurable": {"thread_id": "blobs"}}):
+        if saved.metadata["step"] >= 0:
+            assert saved.checkpoint["channel_values"]["messages"][0].content == "blobs"
+
+    memory.delete_thread("blobs")
+    assert conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 0
+    memory.close()
+
+
+@pytest.mark.parametrize(
+    ("durability", "namespaces", "checkpoints"),
+    [("step", {"", "intake"}, 9), ("node", {""}, 5), ("exit", {""}, 1)],
+)
+def test_checkpoint_durability(monkeypatch, durability, namespaces, checkpoints):
+    """Coarser durability saves fewer checkpoints of the same final state."""
+    monkeypatch.setattr(intake_agent, "_llm_parse_conversation", fake_parse)
+    monkeypatch.setattr(config, "checkpoint_durability", durability)
+    memory = BoundedMemorySaver()
+    run_threads(memory, ["durable"])
+
+    saved = memory.storage["durable"]
+    assert {ns.split(":")[0] for ns in saved} == namespaces
+    assert sum(len(ids) for ids in saved.values()) == checkpoints
+    latest = memory.get_tuple({"configurable": {"thread_id": "durable"}})
+    assert latest.checkpoint["channel_values"]["last_node"] == "intake"
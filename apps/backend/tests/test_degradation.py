@@ -0,0 +1,188 @@
+"""Tier degradation and heuristic extraction unit test module."""
+
+import asyncio
+
+import pytest
+
+from src.agents import intake_agent
+from src.agents.heuristics import HeuristicExtractor, pain_level
+from src.core import config, degradation
+from src.core.degradation import (
+    TIER_FAST,
+    TIER_HEURISTIC,
+    TIER_PRIMARY,
+    DegradationController,
+    get_degradation_controller,
+)
+from src.core.resilience import (
+    CircuitOpenError,
+    DeadlineExceededError,
+    UpstreamTimeoutError,
+    deadline_scope,
+)
+from src.graphs.main_graph import TriageWorkflow, conversation_update
+from src.state import IntakeConversationInfo
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(degradation.time, "monotonic", clock)
+    return clock
+
+
+def controller():
+    return DegradationController(
+        [TIER_PRIMARY, TIER_FAST, TIER_HEURISTIC],
+        latency_slo_seconds=1.0,
+        max_error_rate=0.5,
+        window=10,
+        min_samples=3,
+        recovery_seconds=60,
+    )
+
+
+def test_slow_tiers_degrade_and_recover_step_by_step(clock):
+    """Missing the SLO moves down a tier, recovery retries the tier above."""
+    tiers = controller()
+    tiers.record(TIER_PRIMARY, 5.0, ok=True)
+    tiers.record(TIER_PRIMARY, 5.0, ok=True)
+    assert tiers.tier() == TIER_PRIMARY
+
+    tiers.record(TIER_PRIMARY, 5.0, ok=True)
+    assert tiers.tier() == TIER_FAST
+    for _ in range(3):
+        tiers.record(TIER_FAST, 0.1, ok=False)
+    assert tiers.tier() == TIER_HEURISTIC
+
+    clock.now += 60
+    assert tiers.tier() == TIER_FAST
+    clock.now += 60
+    assert tiers.tier() == TIER_PRIMARY
+    stats = tiers.stats()
+    assert stats["degradations"] == 2 and stats["recoveries"] == 2
+    assert stats["error_rate"][TIER_FAST] == 0.0
+
+
+def test_observe_records_failures_and_reraises(clock):
+    """Failed calls count against the tier's error rate."""
+    tiers = controller()
+    for _ in range(3):
+        with pytest.raises(RuntimeError), tiers.observe(TIER_PRIMARY):
+            raise RuntimeError("upstream down")
+    assert tiers.tier() == TIER_FAST
+
+    with tiers.observe(TIER_FAST):
+        clock.now += 0.2
+    assert tiers.stats()["p95_ms"][TIER_FAST] == 200.0
+
+
+def test_only_upstream_failures_degrade_the_tier(clock):
+    """Caller deadlines, open circuits and bad requests aren't held against it."""
+    tiers = controller()
+    for error in [
+        DeadlineExceededError("intake call deadline exceeded"),
+        CircuitOpenError("intake", 30),
+        ValueError("invalid output"),
+    ] * 3:
+        with pytest.raises(type(error)), tiers.observe(TIER_PRIMARY):
+            raise error
+    assert (tiers.tier(), tiers.stats()["error_rate"][TIER_PRIMARY]) == (
+        TIER_PRIMARY,
+        0.0,
+    )
+
+    for _ in range(3):
+        with pytest.raises(UpstreamTimeoutError), tiers.observe(TIER_PRIMARY):
+            raise UpstreamTimeoutError("intake call timed out after 20.0s")
+    assert tiers.tier() == TIER_FAST
+
+
+def test_caller_deadline_does_not_degrade_intake(monkeypatch):
+    """Requests with a tiny timeout fail alone, intake stays on its model."""
+    monkeypatch.setattr(config, "degradation_min_samples", 2)
+    monkeypatch.setattr(intake_agent, "cache", None)
+    monkeypatch.setattr(intake_agent._batcher, "window", 0)
+
+    class SlowModel:
+        async def ainvoke(self, messages):
+            await asyncio.sleep(1)
+
+    monkeypatch.setattr(intake_agent, "_structured_model", SlowModel())
+
+    async def run():
+        with deadline_scope(0.01):
+            return await TriageWorkflow().run(conversation_update("Patient: cough"))
+
+    for _ in range(3):
+        with pytest.raises(DeadlineExceededError):
+            asyncio.run(run())
+    assert get_degradation_controller().tier() == TIER_PRIMARY
+
+
+def test_heuristic_extractor_reads_the_patients_turns():
+    """Symptoms and pain come from the patient, not the nurse's questions."""
+    conversation = (
+        "Nurse: Any chest pain or fever?\n"
+        "Patient: No chest pain. I've had a bad cough and I feel dizzy.\n"
+        "Nurse: How bad is the pain, out of 10?\n"
+        "Patient: It hurts about a 6, for 3 days now."
+    )
+    info = HeuristicExtractor().extract(conversation)
+
+    assert info.symptoms == ["cough", "dizziness"]
+    assert info.pain_level == 6
+    assert info.chief_complaint == "I've had a bad cough and I feel dizzy."
+    assert pain_level("Is it 7/10?") == 0
+    assert pain_level("It hurts, about a 6, is that bad?") == 6
+    assert pain_level("Is the pain a 7, or worse?") == 0
+    assert pain_level("I had pain since 10 am, I rate it a 4.") == 4
+    assert pain_level("It hurts on 2 sides.") == 0
+    assert pain_level("The pain started at 3 p.m. today.") == 0
+    assert pain_level("It hurts since 6 o'clock, I'd rate it a 5.") == 5
+    assert pain_level("Pain level 7 since 10:30") == 7
+
+
+def test_slow_model_moves_intake_to_the_heuristic_tier(monkeypatch):
+    """Once the model misses its SLO, extraction runs without it."""
+    monkeypatch.setattr(config, "degraded_model_name", "")
+    monkeypatch.setattr(config, "degradation_latency_slo_ms", 1)
+    monkeypatch.setattr(config, "degradation_min_samples", 2)
+    monkeypatch.setattr(intake_agent, "cache", None)
+
+    class SlowModel:
+        calls = 0
+
+        async def ainvoke(self, messages):
+            self.calls += 1
+            await asyncio.sleep(0.01)
+            return IntakeConversationInfo(
+                symptoms=["cough"],
+                pain_level=2,
+                chief_complaint="cough",
+                additional_notes="",
+            )
+
+    model = SlowModel()
+    monkeypatch.setattr(intake_agent, "_structured_model", model)
+    monkeypatch.setattr(intake_agent._batcher, "window", 0)
+
+    def run(conversation):
+        return asyncio.run(TriageWorkflow().run(conversation_update(conversation)))
+
+    assert run("Patient: I have a cough")["intake_tier"] == TIER_PRIMARY
+    assert run("Patient: I have a cough")["intake_tier"] == TIER_PRIMARY
+
+    result = run("Patient: My head hurts, the pain is an 8 out of 10.")
+    assert model.calls == 2
+    assert result["intake_tier"] == TIER_HEURISTIC
+    assert result["intake_conversation_info"].symptoms == ["headache"]
+    assert result["intake_conversation_info"].pain_level == 8
@@ -0,0 +1,48 @@
+"""Benchmark fake model unit test module."""
+
+import asyncio
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from benchmarks.fake_llm import FakeChatModel, install_fake_model
+from benchmarks.throughput import percentile
+from src.core.models import ModelRegistry, model_registry
+from src.state import IntakeConversationInfo
+
+
+def test_fake_model_answers_structured_and_streamed_calls():
+    """Structured output parses, and partial output streams in pieces."""
+    registry = ModelRegistry(factory=lambda settings: FakeChatModel(latency_ms=1))
+    messages = [HumanMessage(content="I sprained my wrist")]
+
+    structured = registry.get_structured_model(IntakeConversationInfo)
+    info = asyncio.run(structured.ainvoke(messages))
+    assert isinstance(info, IntakeConversationInfo)
+    assert info.pain_level == 5
+
+    async def stream():
+        partial_model = registry.get_partial_model(IntakeConversationInfo)
+        return [chunk async for chunk in partial_model.astream(messages)]
+
+    chunks = asyncio.run(stream())
+    assert len(chunks) > 1
+    assert IntakeConversationInfo.model_validate(chunks[-1]) == info
+
+
+def test_fake_model_injects_failures_and_installs():
+    """Injected failures are retryable connection errors."""
+    model = FakeChatModel(latency_ms=0, error_rate=1)
+    with pytest.raises(ConnectionError):
+        asyncio.run(model.ainvoke("hello"))
+
+    factory = model_registry.factory
+    try:
+        install_fake_model(latency_ms=0, seed=3)
+        assert isinstance(model_registry.get_model(), FakeChatModel)
+    finally:
+        model_registry.clear()
+        model_registry.factory = factory
+
+    assert percentile([0.3, 0.1, 0.2, 0.4], 50) == 0.2
+    assert percentile([0.3, 0.1, 0.2, 0.4], 99) == 0.4
@@ -0,0 +1,167 @@
+"""Intake subgraph unit test module."""
+
+import asyncio
+import time
+
+from langchain_core.messages import HumanMessage
+
+from src.agents import intake_agent
+from src.graphs.main_graph import TriageWorkflow, conversation_update
+from src.repositories import (
+    MOCK_PATIENTS,
+    InMemoryPatientRepository,
+    get_patient_repository,
+)
+from src.state import IntakeConversationInfo
+
+DELAY = 0.2
+
+
+class SlowRepository(InMemoryPatientRepository):
+    """Patient repository taking a while to answer, like a remote EHR."""
+
+    async def get_many(self, patient_ids):
+        await asyncio.sleep(DELAY)
+        return await super().get_many(patient_ids)
+
+
+async def slow_parse(conversation, config=None):
+    await asyncio.sleep(DELAY)
+    return IntakeConversationInfo(
+        symptoms=["cough"],
+        pain_level=3,
+        chief_complaint=conversation,
+        additional_notes="",
+    )
+
+
+def test_extraction_and_history_run_in_parallel(monkeypatch):
+    """Intake takes as long as its slowest branch, not their sum."""
+    monkeypatch.setattr(intake_agent, "_llm_parse_conversation", slow_parse)
+    repository = get_patient_repository()
+    monkeypatch.setattr(repository, "repository", SlowRepository(MOCK_PATIENTS))
+    repository.clear()
+
+    start = time.perf_counter()
+    result = asyncio.run(
+        TriageWorkflow().run(
+            {
+                "messages": [HumanMessage(content="cough for a week")],
+                "context": {"patient_id": "P002"},
+            }
+        )
+    )
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 1.75 * DELAY
+    assert result["patient_details"] == MOCK_PATIENTS["P002"]
+    assert result["patient_info"].name == "Sarah Smith"
+    assert result["patient_info"].current_symptoms == ["cough"]
+    assert result["intake_conversation_info"].pain_level == 3
+    assert result["errors"] == []
+
+
+def test_branch_errors_are_merged_once(monkeypatch):
+    """Errors from either branch reach the workflow state exactly once."""
+
+    async def failing_parse(conversation, config=None):
+        raise ValueError("model unavailable")
+
+    async def failing_get_many(patient_ids):
+        raise ConnectionError("EHR unavailable")
+
+    monkeypatch.setattr(intake_agent, "_llm_parse_conversation", failing_parse)
+    repository = get_patient_repository()
+    monkeypatch.setattr(repository.repository, "get_many", failing_get_many)
+    repository.clear()
+
+    result = asyncio.run(
+        intake_agent.run(
+            {
+                "messages": [HumanMessage(content="cough")],
+                "context": {"patient_id": "P003"},
+                "errors": ["earlier error"],
+            }
+        )
+    )
+
+    assert sorted(result["errors"]) == [
+        "Error extracting conversation info: model unavailable",
+        "Error retrieving patient history: EHR unavailable",
+        "earlier error",
+    ]
+    assert "patient_info" not in result
+
+
+def test_walk_in_patients_skip_history_lookup(monkeypatch):
+    """Without a patient ID only the transcript is extracted."""
+    monkeypatch.setattr(intake_agent, "_llm_parse_conversation", slow_parse)
+
+    result = asyncio.run(intake_agent.run({"messages": [HumanMessage(content="x")]}))
+
+    assert result["intake_conversation_info"].symptoms == ["cough"]
+    assert result.get("patient_details") is None
+    assert result.get("errors", []) == []
+
+
+def test_follow_up_segments_extract_only_the_delta(monkeypatch):
+    """Segments on a thread are extracted alone and merged into its state."""
+    extracted = []
+
+    async def recording_parse(conversation, config=None):
+        extracted.append(conversation)
+        if conversation == "garbled segment":
+            raise ValueError("model unavailable")
+        return IntakeConversationInfo(
+            symptoms=[conversation.split()[0]],
+            pain_level=len(extracted),
+            chief_complaint=conversation,
+            additional_notes="",
+        )
+
+    monkeypatch.setattr(intake_agent, "_llm_parse_conversation", recording_parse)
+    workflow = TriageWorkflow()
+
+    def send(conversation, reextract=False):
+        update = conversation_update(conversation, reextract=reextract)
+        return asyncio.run(workflow.run(update, thread_id="segments"))
+
+    send("cough for a week")
+    send("fever since monday")
+    result = send("garbled segment")
+    assert "model unavailable" in result["errors"][-1]
+    result = send("nausea after meals")
+
+    assert extracted == [
+        "cough for a week",
+        "fever since monday",
+        "garbled segment",
+        "garbled segment\nnausea after meals",
+    ]
+    info = result["intake_conversation_info"]
+    assert info.symptoms == ["cough", "fever", "garbled"]
+    assert (info.pain_level, info.chief_complaint) == (4, "cough for a week")
+    assert result["intake_message_count"] == 4
+
+    extracted.clear()
+    monkeypatch.setattr(intake_agent, "_llm_parse_conversation", slow_parse)
+    result = send("chest pain", reextract=True)
+    assert result["intake_conversation_info"].chief_complaint.startswith("cough")
+    assert result["intake_message_count"] == 5
+    assert result["red_flags"]
+
+
+def test_follow_up_for_another_patient_looks_up_their_history(monkeypatch):
+    """A segment with a new patient ID doesn't keep the previous patient."""
+    monkeypatch.setattr(intake_agent, "_llm_parse_conversation", slow_parse)
+    workflow = TriageWorkflow()
+
+    def send(patient_id):
+        update = conversation_update("cough", patient_id)
+        return asyncio.run(workflow.run(update, thread_id="switched"))
+
+    assert send("P002")["patient_info"].name == "Sarah Smith"
+    result = send("P003")
+    assert result["patient_details"] == MOCK_PATIENTS["P003"]
+    assert result["patient_info"].patient_id == "P003"
+    assert result["patient_info"].name == MOCK_PATIENTS["P003"]["name"]
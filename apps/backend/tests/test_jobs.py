@@ -0,0 +1,118 @@
+"""Background job queue unit test module."""
+
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.agents import intake_agent
+from src.core import jobs
+from src.core.jobs import DuplicateJobError, JobQueue, QueueFullError
+from src.main import app
+from src.state import IntakeConversationInfo
+
+
+def sleeper(seconds, result=None, log=None, name=None):
+    async def run():
+        if log is not None:
+            log.append(name)
+        await asyncio.sleep(seconds)
+        return result
+
+    return run
+
+
+def test_jobs_run_by_priority_within_a_bounded_queue():
+    """Workers serve the best priority first; a full queue rejects."""
+    queue = JobQueue(workers=1, max_size=3, result_ttl_seconds=60)
+    started = []
+
+    async def run():
+        queue.submit("blocker", sleeper(0.05), priority=2)
+        await asyncio.sleep(0)
+        queue.submit("routine", sleeper(0, log=started, name="routine"), priority=2)
+        queue.submit("critical", sleeper(0, log=started, name="critical"), priority=0)
+        queue.submit("failing", sleeper("not a number"), priority=2)
+        with pytest.raises(QueueFullError):
+            queue.submit("overflow", sleeper(0), priority=0)
+        with pytest.raises(DuplicateJobError):
+            queue.submit("routine", sleeper(0), priority=2)
+
+        await queue.wait(queue.get("failing"), timeout=1)
+        await queue.stop()
+
+    asyncio.run(run())
+
+    assert started == ["critical", "routine"]
+    assert queue.get("critical").status == "completed"
+    assert queue.get("failing").status == "failed"
+    stats = queue.stats()
+    assert (stats["completed"], stats["failed"], stats["rejected"]) == (3, 1, 1)
+
+
+def test_jobs_can_be_cancelled_and_results_expire(monkeypatch):
+    """Queued and running jobs cancel; finished results are forgotten."""
+    queue = JobQueue(workers=1, max_size=10, result_ttl_seconds=60)
+
+    async def run():
+        running = queue.submit("running", sleeper(5), priority=2)
+        queued = queue.submit("queued", sleeper(5), priority=2)
+        await asyncio.sleep(0.01)
+        assert (running.status, queued.status) == ("running", "queued")
+
+        start = time.perf_counter()
+        queue.cancel("queued")
+        queue.cancel("running")
+        await queue.wait(running, timeout=1)
+        assert time.perf_counter() - start < 1
+        await queue.stop()
+
+    asyncio.run(run())
+    assert queue.get("running").status == "cancelled"
+    assert queue.get("queued").status == "cancelled"
+    assert queue.stats()["queue_depth"] == 0
+
+    now = time.monotonic()
+    monkeypatch.setattr(jobs.time, "monotonic", lambda: now + 61)
+    assert queue.get("running") is None
+    assert queue.stats()["retained"] == 0
+
+
+def test_job_api_accepts_then_long_polls_to_completion(monkeypatch):
+    """Submitting returns 202 at once; a long poll returns the result."""
+
+    class SlowModel:
+        async def ainvoke(self, messages):
+            await asyncio.sleep(0.2)
+            return IntakeConversationInfo(
+                symptoms=["cough"],
+                pain_level=2,
+                chief_complaint="cough",
+                additional_notes="",
+            )
+
+    monkeypatch.setattr(intake_agent, "warmup", lambda: True)
+    monkeypatch.setattr(intake_agent, "_structured_model", SlowModel())
+    monkeypatch.setattr(intake_agent, "cache", None)
+
+    with TestClient(app) as client:
+        start = time.perf_counter()
+        response = client.post(
+            "/api/agents/patient/intake/jobs", json={"conversation": "a cough"}
+        )
+        assert time.perf_counter() - start < 0.2
+        assert response.status_code == 202
+        job = response.json()
+        assert job["status"] == "queued"
+        assert response.headers["Location"] == job["status_url"]
+
+        status = client.get(job["status_url"], params={"wait": 5}).json()
+        assert status["status"] == "completed"
+        assert status["result"]["intake_conversation_info"]["symptoms"] == ["cough"]
+
+        response = client.post(f"/api/agents/workflow/cancel/{job['thread_id']}")
+        assert response.json()["status"] == "completed"
+        response = client.post("/api/agents/workflow/cancel/unknown")
+        assert response.status_code == 404
+        assert client.get("/api/agents/jobs/stats").json()["completed"] >= 1
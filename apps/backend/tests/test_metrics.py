@@ -0,0 +1,101 @@
+"""Metrics unit test module."""
+
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from src.agents import intake_agent
+from src.core import metrics
+from src.core.metrics import MetricsRegistry
+from src.main import app
+from src.state import IntakeConversationInfo
+
+
+def test_registry_renders_prometheus_text():
+    """Counters, gauges and histograms render in the exposition format."""
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ["path"])
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1))
+    registry.add_stats("queue", lambda: {"depth": 3, "by": {"a": 1}, "name": "x"})
+
+    requests.inc(path='/a"b')
+    requests.inc(2, path='/a"b')
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{path="/a\\"b"} 3' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "latency_seconds_sum 5.55" in text
+    assert "latency_seconds_count 3" in text
+    assert "triageflow_queue_depth 3" in text
+    assert 'triageflow_queue_by{key="a"} 1' in text
+    assert "triageflow_queue_name" not in text
+
+
+def test_workflow_runs_record_node_model_and_checkpoint_metrics(monkeypatch):
+    """A workflow run is visible per node, per model call and per write."""
+    model = FakeMessagesListChatModel(
+        responses=[
+            AIMessage(
+                content="",
+                usage_metadata={
+                    "input_tokens": 120,
+                    "output_tokens": 30,
+                    "total_tokens": 150,
+                },
+            )
+        ]
+    )
+    extraction = IntakeConversationInfo(
+        symptoms=["rash"], pain_level=2, chief_complaint="rash", additional_notes=""
+    )
+    structured = model | RunnableLambda(lambda _: extraction)
+    monkeypatch.setattr(intake_agent, "_structured_model", structured)
+    monkeypatch.setattr(intake_agent, "cache", None)
+
+    node = {"graph": "intake", "node": "extract_conversation_info"}
+    before = {
+        "nodes": metrics.NODE_SECONDS.count(**node),
+        "supervisor": metrics.NODE_SECONDS.count(graph="main", node="supervisor"),
+        "input": metrics.LLM_TOKENS.value(model="unknown", direction="input"),
+        "cost": metrics.LLM_COST.value(model="unknown"),
+        "writes": metrics.CHECKPOINT_WRITE_BYTES.count(saver="memory", kind="writes"),
+    }
+
+    client = TestClient(app)
+    response = client.post("/api/agents/patient/intake", json={"conversation": "rash"})
+    assert response.status_code == 200
+
+    assert metrics.NODE_SECONDS.count(**node) == before["nodes"] + 1
+    # The supervisor runs as the entry node, later visits are folded into intake
+    assert (
+        metrics.NODE_SECONDS.count(graph="main", node="supervisor")
+        == before["supervisor"] + 1
+    )
+    assert (
+        metrics.LLM_TOKENS.value(model="unknown", direction="input")
+        == before["input"] + 120
+    )
+    assert metrics.LLM_COST.value(model="unknown") > before["cost"]
+    assert (
+        metrics.CHECKPOINT_WRITE_BYTES.count(saver="memory", kind="writes")
+        > before["writes"]
+    )
+
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert 'triageflow_workflow_duration_seconds_count{graph="LangGraph"}' in text
+    assert (
+        'triageflow_http_request_duration_seconds_count{method="POST",'
+        'handler="start_workflow",status="200"}'
+    ) in text
+    assert "triageflow_scheduler_queue_depth 0" in text
+    assert "triageflow_checkpoint_resident_bytes" in text
+    assert "triageflow_intake_executor_circuit_open 0" in text
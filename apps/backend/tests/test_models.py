@@ -0,0 +1,66 @@
+"""Model registry unit test module."""
+
+from fastapi.testclient import TestClient
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from src.core import models
+from src.core.models import ModelRegistry, default_settings
+from src.main import app
+from src.state import IntakeConversationInfo
+
+
+class ToolCallingFakeModel(FakeListChatModel):
+    """Fake chat model that accepts tool bindings."""
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=tools, **kwargs)
+
+
+def fake_factory(created):
+    def create(settings):
+        created.append(settings)
+        return ToolCallingFakeModel(responses=["{}"])
+
+    return create
+
+
+def test_registry_shares_clients_and_compiled_runnables(monkeypatch):
+    """Clients and structured runnables are built once per settings and schema."""
+    created = []
+    monkeypatch.setattr(models, "_create_chat_model", fake_factory(created))
+    registry = ModelRegistry()
+
+    assert registry.get_model() is registry.get_model()
+    assert registry.get_structured_model(IntakeConversationInfo) is (
+        registry.get_structured_model(IntakeConversationInfo)
+    )
+    assert registry.get_partial_model(IntakeConversationInfo) is (
+        registry.get_partial_model(IntakeConversationInfo)
+    )
+    assert len(created) == 1
+
+    cold = default_settings(temperature=0.0)
+    assert registry.get_model(cold) is not registry.get_model()
+    assert created == [default_settings(), cold]
+
+
+def test_settings_follow_workflow_config(monkeypatch):
+    """Model settings come from the workflow config instead of constants."""
+    monkeypatch.setattr(models.config, "model_name", "gemini-test")
+    monkeypatch.setattr(models.config, "max_tokens", 256)
+
+    settings = default_settings()
+    assert settings.model_name == "gemini-test"
+    assert settings.max_tokens == 256
+
+
+def test_lifespan_warms_up_the_registry(monkeypatch):
+    """Starting the app builds the client before the first request."""
+    created = []
+    monkeypatch.setattr(models, "_create_chat_model", fake_factory(created))
+    models.model_registry.clear()
+
+    with TestClient(app):
+        assert len(created) == 1
+
+    models.model_registry.clear()
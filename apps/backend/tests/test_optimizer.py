@@ -0,0 +1,128 @@
+"""Routing node folding unit test module."""
+
+import asyncio
+
+import pytest
+from langgraph.graph import END, START, StateGraph
+
+from src.agents import get_triage_agent, intake_agent
+from src.core import config
+from src.graphs.main_graph import TriageWorkflow, conversation_update, new_thread_id
+from src.graphs.optimizer import fold_routing_nodes
+from src.graphs.workflows.patient_workflow import PatientSpecificWorkflow
+from src.state import IntakeConversationInfo, TriageDecision, WorkflowState
+
+
+async def fake_parse(conversation, config=None):
+    return IntakeConversationInfo(
+        symptoms=["chest pain"],
+        pain_level=7,
+        chief_complaint="Chest pain since this morning",
+        additional_notes="",
+    )
+
+
+class FakeTriageModel:
+    async def ainvoke(self, messages):
+        return TriageDecision(
+            priority_level=2,
+            reasoning="Chest pain needs an ECG",
+            recommended_actions=["ecg"],
+        )
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    monkeypatch.setattr(config, "triage_enabled", True)
+    monkeypatch.setattr(intake_agent, "_llm_parse_conversation", fake_parse)
+    get_triage_agent.cache_clear()
+    monkeypatch.setattr(get_triage_agent(), "_structured_model", FakeTriageModel())
+    yield
+    get_triage_agent.cache_clear()
+
+
+def run(workflow, conversation):
+    thread_id = new_thread_id()
+
+    async def run_and_count():
+        result = await workflow.run(conversation_update(conversation), thread_id)
+        snapshot = await workflow.app.aget_state(
+            {"configurable": {"thread_id": thread_id}}
+        )
+        return result, snapshot.metadata["step"]
+
+    return asyncio.run(run_and_count())
+
+
+@pytest.mark.parametrize(
+    "conversation, steps, folded_steps",
+    [
+        # supervisor, intake, supervisor, triage, supervisor
+        ("Patient: I feel unwell.", 5, 3),
+        # supervisor, intake + emergency protocol, supervisor, triage, supervisor
+        ("Patient: I have crushing chest pain.", 5, 4),
+    ],
+)
+def test_folding_saves_supervisor_steps(
+    monkeypatch, fake_models, conversation, steps, folded_steps
+):
+    """Folded runs skip the supervisor's own steps and end the same way."""
+    results = {}
+    for fold, expected in ((False, steps), (True, folded_steps)):
+        monkeypatch.setattr(config, "fold_routing_nodes", fold)
+        result, taken = run(TriageWorkflow(), conversation)
+        assert taken == expected
+        results[fold] = {
+            key: value
+            for key, value in result.items()
+            if key not in ("messages", "timestamps")
+        }
+
+    assert results[True] == results[False]
+    assert results[True]["triage_decision"].priority_level == 2
+
+
+def test_parallel_nodes_run_unfolded_and_stream_declared_names(fake_models):
+    """Nodes sent off together join at the supervisor under their own names."""
+    workflow = TriageWorkflow()
+    assert "intake_parallel" in workflow.app.nodes
+
+    async def node_events():
+        return [
+            (event["event"], event["data"]["node"])
+            async for event in workflow.stream(
+                conversation_update("Patient: I have crushing chest pain.")
+            )
+            if event["event"] in ("node_start", "node_end")
+        ]
+
+    events = asyncio.run(node_events())
+    started = [node for event, node in events if event == "node_start"]
+    assert not any(node.endswith("_parallel") for node in started)
+    assert {"emergency_protocol", "intake", "supervisor", "triage"} <= set(started)
+    assert started.count("intake") == 1
+
+
+def test_patient_workflow_refers_in_fewer_steps(monkeypatch, fake_models):
+    """The coordinator folds into the agents and still makes the referral."""
+    for fold, expected in ((False, 7), (True, 4)):
+        monkeypatch.setattr(config, "fold_routing_nodes", fold)
+        result, taken = run(
+            PatientSpecificWorkflow(["diabetes"]), "Patient: I feel unwell."
+        )
+        assert taken == expected
+        assert result["workflow_step"] == "complete"
+        assert result["specialist_referral"]["specialist_type"] == "endocrinologist"
+
+
+def test_graphs_without_routing_nodes_are_left_alone():
+    async def screen(state):
+        return {}
+
+    graph = StateGraph(WorkflowState)
+    graph.add_node("screen", screen)
+    graph.add_node("act", screen)
+    graph.add_edge(START, "screen")
+    graph.add_conditional_edges("screen", lambda state: "act", ["act"])
+    graph.add_edge("act", END)
+    assert fold_routing_nodes(graph) is graph
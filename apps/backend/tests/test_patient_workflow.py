@@ -0,0 +1,114 @@
+"""Patient-specific workflow unit test module."""
+
+import asyncio
+
+from langchain_core.messages import HumanMessage
+
+from src.agents import intake_agent
+from src.graphs.main_graph import EMERGENCY_ACTIONS
+from src.graphs.workflows import patient_workflow
+from src.graphs.workflows.patient_workflow import (
+    create_patient_workflow,
+    get_patient_workflow,
+    normalize_conditions,
+)
+from src.state import IntakeConversationInfo
+
+
+def test_patient_workflows_share_one_compiled_graph(monkeypatch):
+    """Creating a workflow per patient compiles the graph only once."""
+    compiled = []
+    build_graph = patient_workflow.PatientSpecificWorkflow._build_graph
+
+    def counting_build_graph(self):
+        compiled.append(self)
+        return build_graph(self)
+
+    monkeypatch.setattr(
+        patient_workflow.PatientSpecificWorkflow, "_build_graph", counting_build_graph
+    )
+    get_patient_workflow.cache_clear()
+
+    diabetic = create_patient_workflow(["Diabetes"])
+    cardiac = create_patient_workflow(["heart disease", "Heart-Disease"])
+
+    assert len(compiled) == 1
+    assert diabetic.app is cardiac.app is get_patient_workflow().app
+    assert diabetic.memory is cardiac.memory
+    assert diabetic.patient_conditions == ["diabetes"]
+    assert cardiac.patient_conditions == ["heart_disease"]
+    assert get_patient_workflow().patient_conditions == []
+
+    state = {"messages": []}
+    assert cardiac._with_conditions(state)["patient_conditions"] == ["heart_disease"]
+    assert cardiac._with_conditions({"patient_conditions": []}) == {
+        "patient_conditions": []
+    }
+    get_patient_workflow.cache_clear()
+
+
+def test_referrals_follow_the_conditions_in_state():
+    """Specialist referrals read conditions from the run's state."""
+    workflow = create_patient_workflow()
+
+    async def referral(conditions):
+        state = {"patient_conditions": conditions, "triage_decision": {}}
+        result = await workflow._specialist_referral_node(state)
+        return result["specialist_referral"]["specialist_type"]
+
+    assert asyncio.run(referral(["diabetes"])) == "endocrinologist"
+    assert asyncio.run(referral(["cancer"])) == "oncologist"
+    assert asyncio.run(referral([])) == "general_specialist"
+    assert workflow._requires_specialist_referral({"patient_conditions": ["cancer"]})
+    assert not workflow._requires_specialist_referral({"patient_conditions": []})
+    assert normalize_conditions([" Heart  Disease ", "", "cancer"]) == [
+        "cancer",
+        "heart_disease",
+    ]
+
+
+def test_red_flags_start_the_emergency_protocol_alongside_intake(monkeypatch):
+    """The coordinator screens the transcript before extraction ends."""
+    extraction_started = asyncio.Event()
+    release_extraction = asyncio.Event()
+    workflow = create_patient_workflow([])
+
+    async def slow_parse(conversation, config=None):
+        extraction_started.set()
+        await release_extraction.wait()
+        return IntakeConversationInfo(
+            symptoms=["chest pain"],
+            pain_level=9,
+            chief_complaint=conversation,
+            additional_notes="",
+        )
+
+    monkeypatch.setattr(intake_agent, "_llm_parse_conversation", slow_parse)
+    text = "Patient: I have crushing chest pain and I can't breathe."
+
+    async def run():
+        task = asyncio.create_task(
+            workflow.run(
+                {"messages": [HumanMessage(content=text)]},
+                thread_id="patient-red-flag-thread",
+            )
+        )
+        await extraction_started.wait()
+        await asyncio.sleep(0.05)
+        writes = workflow.memory.get_tuple(
+            {"configurable": {"thread_id": "patient-red-flag-thread"}}
+        ).pending_writes
+        release_extraction.set()
+        return writes, await task
+
+    writes, result = asyncio.run(run())
+
+    assert ("emergency_protocol_activated", True) in [w[1:] for w in writes]
+    assert [f.flag for f in result["red_flags"]] == [
+        "chest_pain",
+        "difficulty_breathing",
+    ]
+    assert result["emergency_protocol_activated"] is True
+    assert result["emergency_actions"] == EMERGENCY_ACTIONS
+    assert result["intake_conversation_info"].pain_level == 9
+    assert result["workflow_step"] == "complete"
@@ -0,0 +1,131 @@
+"""Patient repository unit test module."""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from src.agents import intake_agent
+from src.agents.intake import get_patient_details
+from src.core import cache
+from src.main import app
+from src.repositories import (
+    MOCK_PATIENTS,
+    UNKNOWN_PATIENT,
+    CachedPatientRepository,
+    InMemoryPatientRepository,
+    SQLitePatientRepository,
+    get_patient_repository,
+)
+from src.state import IntakeConversationInfo
+
+
+class CountingRepository(InMemoryPatientRepository):
+    """In-memory repository recording each batch it is asked for."""
+
+    def __init__(self, records):
+        super().__init__(records)
+        self.calls = []
+
+    async def get_many(self, patient_ids):
+        patient_ids = list(patient_ids)
+        self.calls.append(sorted(patient_ids))
+        return await super().get_many(patient_ids)
+
+
+def test_sqlite_repository_batches_lookups(tmp_path):
+    """Batch lookups return known patients, across query chunks."""
+    path = str(tmp_path / "patients.db")
+    repository = SQLitePatientRepository(path)
+    records = {f"P{i:04d}": {"name": f"Patient {i}"} for i in range(1200)}
+    repository.seed(records)
+    repository.seed({"P0001": {"name": "Not overwritten"}})
+
+    async def lookup():
+        return (
+            await repository.get_many(["P0001", "P0001", "P0999", "P1199", "X"]),
+            await repository.get_many(list(records)),
+            await repository.get("missing"),
+        )
+
+    some, everyone, missing = asyncio.run(lookup())
+    repository.close()
+
+    assert some == {
+        "P0001": {"name": "Patient 1"},
+        "P0999": {"name": "Patient 999"},
+        "P1199": {"name": "Patient 1199"},
+    }
+    assert everyone == records
+    assert missing is None
+
+
+def test_cached_repository_coalesces_and_negative_caches(monkeypatch):
+    """Concurrent lookups share one fetch, and unknown IDs are cached too."""
+    inner = CountingRepository(MOCK_PATIENTS)
+    repository = CachedPatientRepository(inner, ttl_seconds=60, negative_ttl_seconds=5)
+
+    async def concurrent():
+        return await asyncio.gather(
+            repository.get("P001"),
+            repository.get("P002"),
+            repository.get("P001"),
+            repository.get("nobody"),
+        )
+
+    results = asyncio.run(concurrent())
+    assert [r and r["name"] for r in results] == [
+        "John Doe",
+        "Sarah Smith",
+        "John Doe",
+        None,
+    ]
+    assert inner.calls == [["P001", "P002", "nobody"]]
+
+    asyncio.run(repository.get_many(["P001", "nobody"]))
+    assert len(inner.calls) == 1
+
+    now = cache.time.monotonic()
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now + 10)
+    asyncio.run(repository.get_many(["P001", "nobody"]))
+    assert inner.calls[1:] == [["nobody"]]
+    assert repository.stats()["fetches"] == 2
+
+
+def test_get_patient_details_uses_repository():
+    """Known patients come from the repository, unknown ones get a placeholder."""
+    assert asyncio.run(get_patient_details.ainvoke("P003"))["name"] == (
+        "Robert Johnson"
+    )
+    assert asyncio.run(get_patient_details.ainvoke("P999")) == UNKNOWN_PATIENT
+
+
+def test_batch_intake_prefetches_patients_once(monkeypatch):
+    """A batch loads all of its patients with a single repository call."""
+
+    async def fake_parse(conversation, config=None):
+        return IntakeConversationInfo(
+            symptoms=[], pain_level=1, chief_complaint="", additional_notes=""
+        )
+
+    monkeypatch.setattr(intake_agent, "_llm_parse_conversation", fake_parse)
+    repository = get_patient_repository()
+    inner = CountingRepository(MOCK_PATIENTS)
+    monkeypatch.setattr(repository, "repository", inner)
+    repository.clear()
+
+    client = TestClient(app)
+    response = client.post(
+        "/api/agents/patient/intake/batch",
+        json={
+            "conversations": ["a", "b", "c", "d"],
+            "patient_ids": ["P001", "P002", None, "P001"],
+        },
+    )
+    assert response.status_code == 200
+    assert inner.calls == [["P001", "P002"]]
+
+    response = client.post(
+        "/api/agents/patient/intake/batch",
+        json={"conversations": ["a", "b"], "patient_ids": ["P001"]},
+    )
+    assert response.status_code == 422
@@ -0,0 +1,153 @@
+"""Red flag detector unit test module."""
+
+import asyncio
+import time
+
+from langchain_core.messages import HumanMessage
+
+from src.agents import intake_agent
+from src.agents.red_flags import RedFlagDetector
+from src.graphs.main_graph import EMERGENCY_ACTIONS, TriageWorkflow
+from src.state import IntakeConversationInfo
+
+
+def flags(text, **kwargs):
+    return [match.flag for match in RedFlagDetector(**kwargs).detect(text)]
+
+
+def test_detects_synonyms_once_per_flag():
+    """Synonyms map to their canonical flag, reported once in order."""
+    text = (
+        "Patient: I've had CHEST PRESSURE since this morning.\n"
+        "Patient: Now I'm short of breath, and the chest pain is worse."
+    )
+    assert flags(text) == ["chest_pain", "difficulty_breathing"]
+
+
+def test_negated_and_questioned_flags_are_ignored():
+    """Negation cues and nurse questions do not raise a flag."""
+    assert flags("Patient denies chest pain or shortness of breath.") == []
+    assert flags("No fever, cough, or chest pain.") == []
+    assert flags("Nurse: Any chest pain?\nPatient: No, just a sore ankle.") == []
+    assert flags("Negative for seizures. Has not passed out.") == []
+
+
+def test_patient_questions_after_a_report_keep_the_flag():
+    """Only the question's own clause, or a clinician's question, is dropped."""
+    text = "I have chest pain and I cannot breathe, what is happening?"
+    assert flags(text) == ["chest_pain", "difficulty_breathing"]
+    assert flags("Patient: I have chest pain, is it my heart?") == ["chest_pain"]
+    assert flags("Patient: Could it be a seizure?") == []
+    assert flags("Nurse: Any chest pain, fever, or fainting?\nPatient: No.") == []
+
+
+def test_negation_scope_is_bounded():
+    """Negation ends at the clause, a terminator or the word window."""
+    assert flags("No fever. I have chest pain.") == ["chest_pain"]
+    assert flags("No fever but crushing pain in my chest") == ["chest_pain"]
+    assert flags("Not sure why but I fainted") == ["loss_of_consciousness"]
+    text = "I don't know what happened at work today I fainted"
+    assert flags(text, negation_window=3) == ["loss_of_consciousness"]
+    text = "I have no idea why, chest pain started an hour ago"
+    assert flags(text) == ["chest_pain"]
+    assert flags("No, I have chest pain") == ["chest_pain"]
+
+
+def test_negation_only_carries_over_a_comma_into_a_list():
+    """A short clause after an unrelated negated clause keeps its flag."""
+    assert flags("Patient: no, chest pain") == ["chest_pain"]
+    assert flags("Patient: I don't know, chest pain") == ["chest_pain"]
+    assert flags("Patient: Not sure why, chest pain.") == ["chest_pain"]
+    assert flags("No fever, chills, or chest pain.") == []
+    assert flags("I have no fever, chills, chest pain, or cough.") == []
+
+
+def test_curly_apostrophes_match_like_straight_ones():
+    """Phrases and cues typed with curly apostrophes still match."""
+    assert flags("Patient: I can\u2019t breathe") == ["difficulty_breathing"]
+    assert flags("Patient: I don\u2019t have chest pain") == []
+    assert flags("Patient: I can\u2018t breathe") == ["difficulty_breathing"]
+
+
+def test_matches_on_word_boundaries_with_custom_lexicon():
+    """Phrases only match whole words, and the lexicon is configurable."""
+    detector = RedFlagDetector(lexicon={"overdose": ["od", "overdose"]})
+    assert detector.detect("My body feels odd") == []
+    assert [m.term for m in detector.detect("I think I took an OD")] == ["od"]
+
+
+def test_detection_is_sub_millisecond():
+    """Typical transcripts are screened in well under a millisecond."""
+    detector = RedFlagDetector()
+    text = (
+        "Nurse: What brings you in today? "
+        "Patient: I twisted my ankle playing football, it hurts a lot. "
+        "Nurse: On a scale of 1 to 10? Patient: About a 6. "
+    ) * 4
+
+    start = time.perf_counter()
+    for _ in range(100):
+        detector.detect(text)
+    assert (time.perf_counter() - start) / 100 < 1e-3
+
+
+def test_red_flags_route_to_emergency_protocol_alongside_intake(monkeypatch):
+    """A red flag activates the emergency protocol before extraction ends."""
+    extraction_started = asyncio.Event()
+    release_extraction = asyncio.Event()
+    workflow = TriageWorkflow()
+
+    async def slow_parse(conversation, config=None):
+        extraction_started.set()
+        await release_extraction.wait()
+        return IntakeConversationInfo(
+            symptoms=["chest pain"],
+            pain_level=8,
+            chief_complaint=conversation,
+            additional_notes="",
+        )
+
+    monkeypatch.setattr(intake_agent, "_llm_parse_conversation", slow_parse)
+
+    async def run():
+        task = asyncio.create_task(
+            workflow.run(
+                {"messages": [HumanMessage(content="I have crushing chest pain")]},
+                thread_id="red-flag-thread",
+            )
+        )
+        await extraction_started.wait()
+        # The emergency branch runs in the same step as the stalled extraction
+        await asyncio.sleep(0.05)
+        writes = workflow.memory.get_tuple(
+            {"configurable": {"thread_id": "red-flag-thread"}}
+        ).pending_writes
+        release_extraction.set()
+        return writes, await task
+
+    writes, result = asyncio.run(run())
+
+    assert ("emergency_protocol_activated", True) in [w[1:] for w in writes]
+    assert [f.flag for f in result["red_flags"]] == ["chest_pain"]
+    assert result["emergency_protocol_activated"] is True
+    assert result["emergency_actions"] == EMERGENCY_ACTIONS
+    assert result["intake_conversation_info"].pain_level == 8
+
+
+def test_no_red_flags_skips_emergency_protocol(monkeypatch):
+    """Negated red flags leave the workflow on the intake-only path."""
+
+    async def fake_parse(conversation, config=None):
+        return IntakeConversationInfo(
+            symptoms=[], pain_level=2, chief_complaint="", additional_notes=""
+        )
+
+    monkeypatch.setattr(intake_agent, "_llm_parse_conversation", fake_parse)
+
+    result = asyncio.run(
+        TriageWorkflow().run(
+            {"messages": [HumanMessage(content="Denies chest pain, mild cough.")]}
+        )
+    )
+    assert result["red_flags"] == []
+    assert not result.get("emergency_protocol_activated")
@@ -0,0 +1,197 @@
+"""Upstream call resilience unit test module."""
+
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.agents import intake_agent
+from src.core import resilience
+from src.core.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceededError,
+    ResilientExecutor,
+    UpstreamTimeoutError,
+    deadline_scope,
+    get_executor,
+)
+from src.main import app
+
+
+class Upstream:
+    """Scripted upstream: each call sleeps, then returns or raises."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def __call__(self):
+        delay, outcome = self.outcomes[min(self.calls, len(self.outcomes) - 1)]
+        self.calls += 1
+        await asyncio.sleep(delay)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+def executor(**kwargs):
+    kwargs.setdefault("base_delay_seconds", 0.001)
+    kwargs.setdefault("max_delay_seconds", 0.01)
+    return ResilientExecutor("test", **kwargs)
+
+
+def test_retries_transient_errors_but_not_bad_requests():
+    """Transient errors are retried, invalid requests fail at once."""
+    upstream = Upstream((0, ConnectionError("reset")), (0, ConnectionError()), (0, 7))
+    runner = executor(max_retries=3)
+    assert asyncio.run(runner.call(upstream)) == 7
+    assert (upstream.calls, runner.retries) == (3, 2)
+
+    upstream = Upstream((0, ValueError("invalid output")))
+    with pytest.raises(ValueError):
+        asyncio.run(executor(max_retries=3).call(upstream))
+    assert upstream.calls == 1
+
+    upstream = Upstream((0, ConnectionError("down")))
+    with pytest.raises(ConnectionError):
+        asyncio.run(executor(max_retries=2).call(upstream))
+    assert upstream.calls == 3
+
+
+def test_deadline_bounds_calls_and_backoff():
+    """Calls stop at the deadline, and backoff never sleeps past it."""
+
+    async def run(upstream, runner, timeout):
+        with deadline_scope(timeout):
+            return await runner.call(upstream)
+
+    start = time.perf_counter()
+    with pytest.raises(DeadlineExceededError):
+        asyncio.run(run(Upstream((5, "late")), executor(), 0.05))
+    assert time.perf_counter() - start < 0.5
+
+    upstream = Upstream((0, ConnectionError("reset")))
+    slow_backoff = executor(base_delay_seconds=10, max_delay_seconds=10)
+    start = time.perf_counter()
+    with pytest.raises(ConnectionError):
+        asyncio.run(run(upstream, slow_backoff, 0.001))
+    assert time.perf_counter() - start < 0.5
+
+    async def nested():
+        with deadline_scope(10), deadline_scope(0.05):
+            inner = resilience.remaining_seconds()
+        with deadline_scope(0.05), deadline_scope(10):
+            outer = resilience.remaining_seconds()
+        return inner, outer, resilience.remaining_seconds()
+
+    inner, outer, after = asyncio.run(nested())
+    assert inner <= 0.05 and outer <= 0.05 and after is None
+
+
+def test_default_timeout_bounds_all_attempts_of_a_call():
+    """Without a request deadline, the default timeout covers every retry."""
+    runner = executor(
+        max_retries=50, default_timeout_seconds=0.2, attempt_timeout_seconds=0.05
+    )
+    upstream = Upstream((5, "hung"))
+
+    start = time.perf_counter()
+    with pytest.raises(UpstreamTimeoutError):
+        asyncio.run(runner.call(upstream))
+    assert time.perf_counter() - start < 0.5
+    assert 2 <= upstream.calls <= 5
+    assert resilience.remaining_seconds() is None
+
+
+def test_hedges_calls_slower_than_the_percentile():
+    """A slow call gets a second request, and the faster one wins."""
+    runner = executor(hedge_percentile=90, hedge_min_samples=20)
+    for _ in range(20):
+        runner.latency.record(0.01)
+    upstream = Upstream((2, "slow"), (0, "hedged"))
+
+    start = time.perf_counter()
+    assert asyncio.run(runner.call(upstream)) == "hedged"
+    assert time.perf_counter() - start < 0.5
+    assert runner.hedges == 1
+
+    upstream = Upstream((0, "fast"))
+    assert asyncio.run(runner.call(upstream)) == "fast"
+    assert (upstream.calls, runner.hedges) == (1, 1)
+
+
+def test_circuit_breaker_fails_fast_then_recovers(monkeypatch):
+    """Sustained failures open the circuit until a trial call succeeds."""
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_seconds=30)
+    runner = executor(max_retries=5, breaker=breaker)
+    upstream = Upstream((0, ConnectionError("down")))
+
+    with pytest.raises(CircuitOpenError) as error:
+        asyncio.run(runner.call(upstream))
+    assert upstream.calls == 2
+    assert breaker.state == "open"
+    assert 1 <= error.value.retry_after <= 30
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(runner.call(upstream))
+    assert upstream.calls == 2
+
+    now = time.monotonic()
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: now + 31)
+    assert breaker.state == "half_open"
+    assert asyncio.run(runner.call(Upstream((0, "ok")))) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_only_upstream_timeouts_count_against_the_circuit():
+    """Callers running out of time can't open the circuit for everyone."""
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_seconds=30)
+    runner = executor(attempt_timeout_seconds=0.05, breaker=breaker)
+
+    async def run(upstream, timeout):
+        with deadline_scope(timeout):
+            return await runner.call(upstream)
+
+    for _ in range(3):
+        with pytest.raises(DeadlineExceededError):
+            asyncio.run(run(Upstream((5, "late")), 0.01))
+    assert (breaker.failures, breaker.state) == (0, "closed")
+
+    # A hung attempt is cut off, counted and retried
+    upstream = Upstream((5, "hung"), (0, "ok"))
+    assert asyncio.run(run(upstream, 5)) == "ok"
+    assert (upstream.calls, runner.retries) == (2, 1)
+
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(run(Upstream((5, "hung")), 0.5))
+    assert breaker.state == "open"
+
+
+def test_api_maps_open_circuit_and_deadline(monkeypatch):
+    """An open circuit is a 503 with Retry-After, a missed deadline a 504."""
+    client = TestClient(app)
+    breaker = get_executor("intake").breaker
+
+    monkeypatch.setattr(breaker, "opened_at", time.monotonic())
+    response = client.post(
+        "/api/agents/patient/intake", json={"conversation": "circuit is open"}
+    )
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+
+    class SlowModel:
+        async def ainvoke(self, messages):
+            await asyncio.sleep(5)
+
+    monkeypatch.setattr(breaker, "opened_at", None)
+    monkeypatch.setattr(intake_agent, "_structured_model", SlowModel())
+    start = time.perf_counter()
+    response = client.post(
+        "/api/agents/patient/intake",
+        json={"conversation": "model is slow"},
+        headers={"X-Request-Timeout": "0.1"},
+    )
+    assert response.status_code == 504
+    assert time.perf_counter() - start < 2
@@ -0,0 +1,167 @@
+"""Model call scheduler unit test module."""
+
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api.agents import PatientIntakeRequest, _request_priority
+from src.core.resilience import (
+    DeadlineExceededError,
+    ResilientExecutor,
+    deadline_scope,
+)
+from src.core.scheduler import (
+    PRIORITY_CRITICAL,
+    PRIORITY_LEVELS,
+    PRIORITY_NORMAL,
+    AdmissionRejectedError,
+    LLMScheduler,
+    get_scheduler,
+    priority_scope,
+)
+from src.main import app
+
+
+def test_critical_calls_jump_the_queue():
+    """Queued calls are served by priority, then in arrival order."""
+    scheduler = LLMScheduler(max_concurrency=1)
+    served = []
+
+    async def call(name, priority):
+        with priority_scope(priority):
+            async with scheduler.slot():
+                served.append(name)
+
+    async def run():
+        async with scheduler.slot():
+            tasks = [
+                asyncio.create_task(call("routine-1", PRIORITY_NORMAL)),
+                asyncio.create_task(call("routine-2", PRIORITY_NORMAL)),
+                asyncio.create_task(call("high", PRIORITY_LEVELS["high"])),
+                asyncio.create_task(call("critical", PRIORITY_CRITICAL)),
+            ]
+            await asyncio.sleep(0)
+            assert scheduler.stats()["queue_depth_by_priority"] == {
+                "critical": 1,
+                "high": 1,
+                "normal": 2,
+            }
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+
+    assert served == ["critical", "high", "routine-1", "routine-2"]
+    stats = scheduler.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["in_flight"] == 0
+    assert stats["admitted"] == 5
+    assert stats["wait_seconds"]["max"] > 0
+
+
+def test_token_budget_paces_calls():
+    """Calls wait for the token bucket to refill once the budget is spent."""
+    scheduler = LLMScheduler(max_concurrency=10, tokens_per_minute=6000)
+
+    async def run():
+        async with scheduler.slot(tokens=6000):
+            pass
+        start = time.perf_counter()
+        async with scheduler.slot(tokens=10):
+            return time.perf_counter() - start
+
+    waited = asyncio.run(run())
+    assert 0.05 < waited < 0.5
+
+
+def test_queued_calls_give_up_at_their_deadline():
+    """A call still queued at its deadline fails and leaves the queue."""
+    scheduler = LLMScheduler(max_concurrency=1)
+
+    async def run():
+        async with scheduler.slot():
+            with deadline_scope(0.05), pytest.raises(DeadlineExceededError):
+                async with scheduler.slot():
+                    pass
+        async with scheduler.slot():
+            pass
+
+    asyncio.run(run())
+    stats = scheduler.stats()
+    assert (stats["expired"], stats["queue_depth"], stats["in_flight"]) == (1, 0, 0)
+
+
+def test_retries_give_up_their_slot_while_backing_off():
+    """Another call is served in the backoff between a call's attempts."""
+    scheduler = LLMScheduler(max_concurrency=1)
+    runner = ResilientExecutor("test", base_delay_seconds=0.1, max_delay_seconds=0.1)
+    order = []
+
+    async def flaky():
+        order.append("flaky")
+        if order.count("flaky") == 1:
+            raise ConnectionError("reset")
+        return "retried"
+
+    async def other():
+        await asyncio.sleep(0.001)
+        async with scheduler.slot():
+            order.append("other")
+
+    async def run():
+        flaky_call = runner.call(flaky, slot=scheduler.slot)
+        return (await asyncio.gather(flaky_call, other()))[0]
+
+    # Full jitter may pick no delay at all, retry until the other call fits
+    while "other" not in order[1:-1]:
+        order.clear()
+        assert asyncio.run(run()) == "retried"
+    assert order == ["flaky", "other", "flaky"]
+    assert scheduler.stats()["in_flight"] == 0
+
+
+def test_admission_rejects_hopeless_requests():
+    """Requests are refused when the queue is full or the wait too long."""
+    scheduler = LLMScheduler(max_concurrency=2, max_queue_size=50)
+    scheduler.in_flight = 2
+    scheduler.service_time = 4.0
+    scheduler._queued_by_priority[PRIORITY_NORMAL] = 9
+
+    with pytest.raises(AdmissionRejectedError) as error:
+        scheduler.admit(PRIORITY_NORMAL, timeout_seconds=10)
+    assert error.value.status_code == 429
+    assert error.value.retry_after == pytest.approx(20)
+
+    scheduler.admit(PRIORITY_CRITICAL, timeout_seconds=10)
+
+    scheduler._queued_by_priority[PRIORITY_NORMAL] = 50
+    with pytest.raises(AdmissionRejectedError) as error:
+        scheduler.admit(PRIORITY_CRITICAL, timeout_seconds=None)
+    assert error.value.status_code == 503
+    assert scheduler.rejected == 2
+
+
+def test_api_sheds_routine_load_but_not_red_flags(monkeypatch):
+    """A saturated scheduler returns 429 to routine intakes only."""
+    scheduler = get_scheduler()
+    monkeypatch.setattr(scheduler, "in_flight", scheduler.max_concurrency)
+    monkeypatch.setattr(scheduler, "service_time", 60.0)
+    monkeypatch.setitem(scheduler._queued_by_priority, PRIORITY_NORMAL, 20)
+
+    client = TestClient(app)
+    response = client.post(
+        "/api/agents/patient/intake", json={"conversation": "sprained my wrist"}
+    )
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 30
+
+    flagged = PatientIntakeRequest(conversation="Crushing chest pain, I can't breathe")
+    assert _request_priority(flagged) == PRIORITY_CRITICAL
+    scheduler.admit(_request_priority(flagged), timeout_seconds=30)
+
+    hinted = PatientIntakeRequest(conversation="sprained my wrist", priority="high")
+    assert _request_priority(hinted) == PRIORITY_LEVELS["high"]
+
+    stats = client.get("/api/agents/scheduler/stats").json()
+    assert stats["queue_depth_by_priority"]["normal"] == 20
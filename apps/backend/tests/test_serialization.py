@@ -0,0 +1,88 @@
+"""Response serialization unit test module."""
+
+import json
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.agents import intake_agent
+from src.api import serialization
+from src.api.serialization import DEFAULT_RESULT_FIELDS, dumps, parse_fields
+from src.main import app
+from src.state import IntakeConversationInfo, RedFlag
+
+
+async def fake_parse(conversation, config=None):
+    return IntakeConversationInfo(
+        symptoms=["cough"],
+        pain_level=3,
+        chief_complaint=conversation,
+        additional_notes="",
+    )
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_encodes_messages_models_and_dates(monkeypatch, use_orjson):
+    """Messages, models and datetimes encode the same with or without orjson."""
+    if not use_orjson:
+        monkeypatch.setattr(serialization, "orjson", None)
+
+    value = {
+        "messages": [HumanMessage(content="hi"), AIMessage(content="hello")],
+        "red_flags": [RedFlag(flag="chest_pain", term="chest pain")],
+        "at": datetime(2025, 1, 2, tzinfo=timezone.utc),
+        "tags": {"urgent"},
+        1: "é",
+    }
+
+    assert json.loads(dumps(value)) == {
+        "messages": [
+            {"type": "human", "content": "hi"},
+            {"type": "ai", "content": "hello"},
+        ],
+        "red_flags": [{"flag": "chest_pain", "term": "chest pain"}],
+        "at": "2025-01-02T00:00:00+00:00",
+        "tags": ["urgent"],
+        "1": "é",
+    }
+    with pytest.raises(TypeError):
+        dumps({"unknown": object()})
+
+
+def test_parse_fields_selects_defaults_all_or_named_fields():
+    """No selection is compact, ``*`` is everything, unknown fields fail."""
+    assert parse_fields(None) == DEFAULT_RESULT_FIELDS
+    assert parse_fields("*") is None
+    assert parse_fields(" messages, errors,messages ") == ("messages", "errors")
+    with pytest.raises(ValueError, match="bogus"):
+        parse_fields("messages,bogus")
+
+
+def test_intake_returns_a_compact_projection_by_default(monkeypatch):
+    """The echoed conversation is only returned when asked for."""
+    monkeypatch.setattr(intake_agent, "_llm_parse_conversation", fake_parse)
+    client = TestClient(app)
+
+    response = client.post("/api/agents/patient/intake", json={"conversation": "cough"})
+    result = response.json()["result"]
+    assert "messages" not in result and "context" not in result
+    assert result["intake_conversation_info"]["chief_complaint"] == "cough"
+    assert set(result) <= set(DEFAULT_RESULT_FIELDS)
+
+    response = client.post(
+        "/api/agents/patient/intake",
+        params={"fields": "messages,last_node"},
+        json={"conversation": "cough"},
+    )
+    result = response.json()["result"]
+    assert set(result) == {"messages", "last_node"}
+    assert result["messages"][0] == {"type": "human", "content": "cough"}
+
+    response = client.post(
+        "/api/agents/patient/intake",
+        params={"fields": "transcript"},
+        json={"conversation": "cough"},
+    )
+    assert response.status_code == 422
@@ -0,0 +1,26 @@
+"""Startup cost unit test module."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+
+CHECK_LAZY_IMPORT = """
+import sys
+
+import src.main
+from src.agents.intake import get_intake_agent
+from src.graphs.main_graph import get_triage_workflow
+
+assert "langchain_google_genai" not in sys.modules
+assert get_intake_agent.cache_info().currsize == 0
+assert get_triage_workflow.cache_info().currsize == 0
+"""
+
+
+def test_importing_the_app_builds_no_graphs_or_clients():
+    """Graphs and model clients are built on first use, not at import."""
+    subprocess.run(
+        [sys.executable, "-c", CHECK_LAZY_IMPORT], cwd=BACKEND_ROOT, check=True
+    )
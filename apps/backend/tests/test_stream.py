@@ -0,0 +1,65 @@
+"""Streaming intake unit test module."""
+
+import json
+
+from fastapi.testclient import TestClient
+from langchain_core.runnables import RunnableGenerator
+
+from src.agents import intake_agent
+from src.main import app
+
+
+async def fake_partial_extraction(messages):
+    """Yield the extraction result one field at a time."""
+    yield {"symptoms": ["chest pain"]}
+    yield {"symptoms": ["chest pain"], "pain_level": 8}
+    yield {
+        "symptoms": ["chest pain"],
+        "pain_level": 8,
+        "chief_complaint": "Chest pain since this morning",
+        "additional_notes": "",
+    }
+
+
+def parse_sse(body: str) -> list[tuple[str, dict]]:
+    """Split a server-sent events body into (event, data) pairs."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data[6:])))
+    return events
+
+
+def test_stream_emits_node_progress_and_partials(monkeypatch):
+    """Node events and partial intake fields arrive before the final result."""
+    monkeypatch.setattr(
+        intake_agent, "_partial_model", RunnableGenerator(fake_partial_extraction)
+    )
+
+    client = TestClient(app)
+    response = client.post(
+        "/api/agents/patient/intake/stream",
+        json={"conversation": "Nurse: What brings you in? Patient: Chest pain."},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = parse_sse(response.text)
+    names = [event for event, _ in events]
+
+    assert events[0] == ("node_start", {"node": "supervisor"})
+    assert ("node_end", {"node": "intake"}) in events
+    assert [data for event, data in events if event == "intake_partial"] == [
+        {"symptoms": ["chest pain"]},
+        {"symptoms": ["chest pain"], "pain_level": 8},
+        {
+            "symptoms": ["chest pain"],
+            "pain_level": 8,
+            "chief_complaint": "Chest pain since this morning",
+            "additional_notes": "",
+        },
+    ]
+    assert names[-1] == "result"
+    assert names.index("intake_partial") < names.index("result")
+    assert events[-1][1]["intake_conversation_info"]["pain_level"] == 8
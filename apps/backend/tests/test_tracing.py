@@ -0,0 +1,138 @@
+"""Request tracing and profiling unit test module."""
+
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from langgraph.errors import GraphInterrupt, GraphRecursionError
+
+from benchmarks.fake_llm import FakeChatModel
+from src.agents import intake_agent
+from src.core import config
+from src.core.models import ModelRegistry
+from src.core.profiling import SamplingProfiler
+from src.core.tracing import get_tracer
+from src.main import app
+from src.state import IntakeConversationInfo
+
+
+@pytest.fixture
+def trace_path(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(config, "trace_path", str(path))
+    monkeypatch.setattr(intake_agent, "cache", None)
+    monkeypatch.setattr(intake_agent._batcher, "window", 0)
+    registry = ModelRegistry(factory=lambda settings: FakeChatModel(latency_ms=20))
+    monkeypatch.setattr(
+        intake_agent,
+        "_structured_model",
+        registry.get_structured_model(IntakeConversationInfo),
+    )
+    get_tracer.cache_clear()
+    yield path
+    get_tracer().close()
+    get_tracer.cache_clear()
+
+
+def read_spans(path):
+    get_tracer().flush()
+    return [
+        span
+        for line in path.read_text().splitlines()
+        for resource in json.loads(line)["resourceSpans"]
+        for scope in resource["scopeSpans"]
+        for span in scope["spans"]
+    ]
+
+
+def attributes(span):
+    return {
+        item["key"]: next(iter(item["value"].values())) for item in span["attributes"]
+    }
+
+
+def test_request_trace_reaches_the_model_call(trace_path, monkeypatch):
+    """The model call's span nests in the request's, through the nodes."""
+    monkeypatch.setattr(config, "profile_interval_ms", 1)
+    response = TestClient(app).post(
+        "/api/agents/patient/intake",
+        json={"conversation": "Patient: I sprained my wrist"},
+        headers={"X-Profile": "true"},
+    )
+    assert response.status_code == 200
+
+    spans = read_spans(trace_path)
+    by_id = {span["spanId"]: span for span in spans}
+    assert {span["traceId"] for span in spans} == {response.headers["X-Trace-Id"]}
+
+    llm = next(span for span in spans if span["name"] == "llm fake")
+    ancestors = []
+    span = llm
+    while "parentSpanId" in span:
+        span = by_id[span["parentSpanId"]]
+        ancestors.append(span["name"])
+    assert ancestors == [
+        "intake.extract",
+        "extract_conversation_info",
+        "intake",
+        "LangGraph",
+        "POST /api/agents/patient/intake",
+    ]
+    assert attributes(llm)["gen_ai.usage.output_tokens"] != "0"
+
+    root = attributes(span)
+    assert root["http.handler"] == "start_workflow"
+    assert root["http.status_code"] == "200"
+    assert root["profile.format"] == "collapsed"
+    assert "profile.collapsed" in root
+    assert get_tracer().stats()["profiles"] == 1
+
+
+def test_unsampled_requests_leave_no_spans(trace_path, monkeypatch):
+    monkeypatch.setattr(config, "trace_sample_rate", 0.0)
+    response = TestClient(app).post(
+        "/api/agents/patient/intake", json={"conversation": "Patient: I have a cough"}
+    )
+
+    assert response.status_code == 200
+    assert "X-Trace-Id" not in response.headers
+    assert not trace_path.exists()
+
+
+def test_profiler_folds_the_sampled_stacks():
+    """Samples of the same stack are counted on one collapsed line."""
+
+    def busy_wait():
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+
+    profiler = SamplingProfiler(interval_seconds=0.001)
+    profiler.start()
+    busy_wait()
+    profiler.stop()
+
+    lines = [line.rsplit(" ", 1) for line in profiler.collapsed().splitlines()]
+    heaviest = lines[0][0].split(";")
+    assert heaviest[-1].endswith("busy_wait")
+    assert "test_profiler_folds_the_sampled_stacks" in heaviest[-2]
+    assert sum(int(count) for _, count in lines) == sum(profiler.samples.values())
+
+
+def test_graph_errors_fail_spans_but_interrupts_do_not(trace_path):
+    """Only interrupts and commands are control flow, not errors."""
+    tracer = get_tracer()
+    for name, error in [
+        ("interrupted", GraphInterrupt()),
+        ("recursed", GraphRecursionError("Recursion limit reached")),
+    ]:
+        root = tracer.start_trace(name)
+        root.end(error)
+
+    spans = {span["name"]: span for span in read_spans(trace_path)}
+    assert spans["interrupted"]["status"] == {"code": 0}
+    assert spans["recursed"]["status"]["message"] == (
+        "GraphRecursionError: Recursion limit reached"
+    )
+    assert tracer.stats()["spans"] == 2
@@ -0,0 +1,121 @@
+"""Long transcript extraction unit test module."""
+
+import asyncio
+import time
+
+from src.agents import intake as intake_module
+from src.agents import intake_agent
+from src.agents.transcripts import (
+    Turn,
+    chunk_turns,
+    clean_turns,
+    merge_extractions,
+    split_turns,
+)
+from src.state import IntakeConversationInfo
+
+DELAY = 0.1
+
+
+def info(symptoms, pain_level, chief_complaint, notes=""):
+    return IntakeConversationInfo(
+        symptoms=symptoms,
+        pain_level=pain_level,
+        chief_complaint=chief_complaint,
+        additional_notes=notes,
+    )
+
+
+def test_turns_are_split_by_speaker_and_cleaned():
+    """Speaker labels split turns; filler and repeated turns are dropped."""
+    turns = split_turns(
+        "Visit notes.\nNurse: What brings you in? Patient: My knee hurts. "
+        "Nurse: Okay. Patient: It started after a fall on the stairs.\n"
+        "Patient: It started after a fall on the stairs!\nNurse: Any fever?\n"
+        "Patient: No.\nNurse: Any nausea?\nPatient: No."
+    )
+    assert turns[:3] == [
+        Turn(None, "Visit notes."),
+        Turn("Nurse", "What brings you in?"),
+        Turn("Patient", "My knee hurts."),
+    ]
+
+    cleaned = clean_turns(turns)
+    assert Turn("Nurse", "Okay.") not in cleaned
+    assert [turn.text for turn in cleaned].count("No.") == 2
+    assert len(cleaned) == len(turns) - 2
+
+
+def test_chunks_keep_questions_with_their_answers():
+    """Chunks respect the size limit and never end on a question."""
+    turns = [
+        Turn("Nurse", "How long has it hurt?"),
+        Turn("Patient", "About three days now."),
+        Turn("Nurse", "Does it hurt when you walk?"),
+        Turn("Patient", "Yes, especially on stairs."),
+        Turn("Patient", "x " * 40),
+    ]
+    chunks = chunk_turns(turns, max_chars=80)
+
+    assert chunks[0] == "Nurse: How long has it hurt?\nPatient: About three days now."
+    assert chunks[1].startswith("Nurse: Does it hurt when you walk?\nPatient: Yes")
+    assert all(len(chunk) <= 80 for chunk in chunks)
+    assert not any(chunk.endswith("?") for chunk in chunks)
+
+
+def test_extractions_merge_deterministically():
+    """Symptoms union, pain is maximal, the agreed complaint wins."""
+    merged = merge_extractions(
+        [
+            info(["knee pain", "swelling"], 4, "Knee injury", "Fell on stairs."),
+            info(["Swelling", "bruising"], 7, "Bruised knee"),
+            info([], 2, "knee injury", "Fell on stairs."),
+        ]
+    )
+    assert merged == info(
+        ["knee pain", "swelling", "bruising"], 7, "Knee injury", "Fell on stairs."
+    )
+
+
+def test_long_transcripts_are_extracted_in_concurrent_chunks(monkeypatch):
+    """Long conversations fan out to one call per chunk and merge."""
+
+    class ChunkModel:
+        def __init__(self):
+            self.prompts = []
+
+        async def ainvoke(self, messages):
+            prompt = messages[-1].content
+            self.prompts.append(prompt)
+            await asyncio.sleep(DELAY)
+            pain = 8 if "8 out of 10" in prompt else 3
+            return info(["knee pain"], pain, "Knee injury")
+
+    model = ChunkModel()
+    monkeypatch.setattr(intake_agent, "_structured_model", model)
+    monkeypatch.setattr(intake_agent, "cache", None)
+    monkeypatch.setattr(intake_module.config, "long_transcript_threshold_chars", 300)
+    monkeypatch.setattr(intake_module.config, "transcript_chunk_chars", 200)
+
+    conversation = "\n".join(
+        [
+            "Nurse: What brings you in today?",
+            "Patient: I twisted my knee playing football on Saturday afternoon.",
+            "Nurse: Mm-hmm.",
+            *[f"Patient: It has been swelling up, day {day}." for day in range(6)],
+            "Nurse: How bad is the pain?",
+            "Patient: It's about an 8 out of 10 when I put weight on it.",
+        ]
+    )
+    start = time.perf_counter()
+    result = asyncio.run(intake_agent._llm_parse_conversation(conversation))
+    elapsed = time.perf_counter() - start
+
+    assert len(model.prompts) > 1
+    assert not any("Mm-hmm" in prompt for prompt in model.prompts)
+    assert result == info(["knee pain"], 8, "Knee injury")
+    assert elapsed < DELAY * len(model.prompts)
+
+    model.prompts.clear()
+    asyncio.run(intake_agent._llm_parse_conversation("Patient: sore throat"))
+    assert len(model.prompts) == 1
@@ -0,0 +1,137 @@
+"""Triage agent unit test module."""
+
+import asyncio
+import time
+
+from langchain_core.runnables import RunnableGenerator
+
+from src.agents import get_triage_agent, intake_agent
+from src.agents.triage import SpeculativeTriage
+from src.core import config
+from src.graphs.main_graph import TriageWorkflow, conversation_update
+from src.state import IntakeConversationInfo, TriageDecision
+
+DELAY = 0.2
+
+
+class FakeTriageModel:
+    """Structured triage model that takes a while and records its prompts."""
+
+    def __init__(self):
+        self.prompts = []
+
+    async def ainvoke(self, messages):
+        self.prompts.append(messages[-1].content)
+        await asyncio.sleep(DELAY)
+        return TriageDecision(
+            priority_level=3,
+            reasoning="Stable, needs labs and imaging",
+            recommended_actions=["order_labs"],
+        )
+
+
+async def slow_partial_extraction(messages):
+    """Stream the triage inputs first, then the slow free-text fields."""
+    yield {"symptoms": ["cough", "fever"]}
+    yield {"symptoms": ["cough", "fever"], "pain_level": 1}
+    yield {"symptoms": ["cough", "fever"], "pain_level": 4}
+    await asyncio.sleep(DELAY)
+    yield {
+        "symptoms": ["cough", "fever"],
+        "pain_level": 4,
+        "chief_complaint": "Cough and fever for three days",
+        "additional_notes": "",
+    }
+
+
+def info(pain_level):
+    return IntakeConversationInfo(
+        symptoms=["cough"],
+        pain_level=pain_level,
+        chief_complaint="cough",
+        additional_notes="",
+    )
+
+
+def test_triage_starts_before_intake_finishes(monkeypatch):
+    """Triage overlaps the end of the extraction and its decision is kept."""
+    monkeypatch.setattr(config, "triage_enabled", True)
+    monkeypatch.setattr(config, "speculative_triage_enabled", True)
+    monkeypatch.setattr(intake_agent, "cache", None)
+    monkeypatch.setattr(
+        intake_agent, "_partial_model", RunnableGenerator(slow_partial_extraction)
+    )
+    get_triage_agent.cache_clear()
+    model = FakeTriageModel()
+    monkeypatch.setattr(get_triage_agent(), "_structured_model", model)
+    workflow = TriageWorkflow()
+
+    start = time.perf_counter()
+    result = asyncio.run(workflow.run(conversation_update("cough, fever")))
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 1.5 * DELAY
+    assert result["triage_decision"].priority_level == 3
+    assert result["last_node"] == "triage"
+    assert len(model.prompts) == 2 and '"pain_level": 4' in model.prompts[-1]
+    assert get_triage_agent().stats() == {
+        "started": 2,
+        "confirmed": 1,
+        "restarted": 1,
+        "missed": 0,
+    }
+    get_triage_agent.cache_clear()
+
+
+def test_triage_by_default_keeps_extractions_batched(monkeypatch):
+    """Without speculation intake isn't streamed and identical calls share one."""
+    monkeypatch.setattr(config, "triage_enabled", True)
+    monkeypatch.setattr(intake_agent, "_partial_model", None)
+    calls = []
+
+    class RecordingModel:
+        async def abatch(self, batch, return_exceptions=False):
+            calls.append(len(batch))
+            await asyncio.sleep(DELAY)
+            return [info(4) for _ in batch]
+
+    monkeypatch.setattr(intake_agent, "_structured_model", RecordingModel())
+    get_triage_agent.cache_clear()
+    monkeypatch.setattr(get_triage_agent(), "_structured_model", FakeTriageModel())
+    workflow = TriageWorkflow()
+
+    async def run():
+        return await asyncio.gather(
+            workflow.run(conversation_update("cough for a day")),
+            workflow.run(conversation_update("cough for a day")),
+            workflow.run(conversation_update("cough for a week")),
+        )
+
+    results = asyncio.run(run())
+    assert calls == [2]
+    assert [result["triage_decision"].priority_level for result in results] == [3] * 3
+    get_triage_agent.cache_clear()
+
+
+def test_changed_findings_discard_the_speculative_decision(monkeypatch):
+    """A decision started on findings that changed is made again."""
+    get_triage_agent.cache_clear()
+    agent = get_triage_agent()
+    model = FakeTriageModel()
+    monkeypatch.setattr(agent, "_structured_model", model)
+
+    async def run():
+        speculation = SpeculativeTriage(agent)
+        speculation.offer({"symptoms": ["cough"], "pain_level": 3})
+        assert speculation._task is None
+
+        speculation.prepare(info(2), None, None)
+        speculation.offer({"symptoms": ["Cough"], "pain_level": 3})
+        await asyncio.sleep(0)
+        return await speculation.decide(info(5))
+
+    assert asyncio.run(run()).priority_level == 3
+    assert '"pain_level": 3' in model.prompts[0]
+    assert '"pain_level": 5' in model.prompts[1]
+    assert agent.stats()["missed"] == 1
+    get_triage_agent.cache_clear()